@@ -0,0 +1,177 @@
+"""Checks that every integration query is served by an index at scale
+
+Calls each read method of PostgresIntegration (and the purge job's queries)
+against the seeded benchmark database, records the SQL it issues, with the
+real page size and parameters, and runs EXPLAIN on it instead of executing
+it. Exits with status 1 when a plan scans a whole table holding at least
+--min-rows rows that no index could serve: plans are checked again with
+enable_seqscan off, and a table still read in full (sequentially or through
+an index without any condition on it) means an index is missing. Scans the
+planner merely preferred at the seeded size are reported as warnings
+(failures with --strict). Small tables are left out, since Postgres rightly
+prefers a sequential scan for them. SupabaseIntegration sends the same
+selects and filters through PostgREST.
+
+Usage (from backend/, after python -m benchmarks.seed):
+    python -m benchmarks.explain
+    python -m benchmarks.explain --verbose
+"""
+import argparse
+import asyncio
+import json
+import sys
+from benchmarks.common import DATABASE_URL
+from configs.env import Env
+from utils.pagination import ListParams, encode_cursor
+
+LIVE = 'deleted_at IS NULL'
+
+def page(cursor=None):
+    """List parameters of a paginated request with the default page size"""
+    return ListParams(limit=Env.LIST_DEFAULT_LIMIT, cursor=cursor, fields=None)
+
+# (integration call, method and arguments); parameters point at rows created by benchmarks.seed
+QUERIES = [
+    ('get_all_athletes', lambda db: db.get_all_athletes(page())),
+    ('get_all_athletes (next page)', lambda db: db.get_all_athletes(page(encode_cursor(['Athlete 5000', 5000])))),
+    ('get_all_athletes (whole list)', lambda db: db.get_all_athletes()),
+    ('get_athlete_by_id', lambda db: db.get_athlete_by_id(1)),
+    ('get_media_path', lambda db: db.get_media_path('athlete', 1)),
+    ('get_media_paths', lambda db: db.get_media_paths('athlete', [1, 2, 3, 4, 5])),
+    ('get_teams_by_athlete_id', lambda db: db.get_teams_by_athlete_id(1, page())),
+    ('get_all_coaches', lambda db: db.get_all_coaches(page())),
+    ('get_teams_by_coach_id', lambda db: db.get_teams_by_coach_id(1, page())),
+    ('get_all_enrollments', lambda db: db.get_all_enrollments(page())),
+    ('get_enrollments_by_team_id', lambda db: db.get_enrollments_by_team_id(1, page())),
+    ('get_enrollments_by_athlete_id', lambda db: db.get_enrollments_by_athlete_id(1, page())),
+    ('get_athlete_ids_by_team_id', lambda db: db.get_athlete_ids_by_team_id(1)),
+    ('get_all_exercises', lambda db: db.get_all_exercises(page())),
+    ('get_all_sports', lambda db: db.get_all_sports(page())),
+    ('get_all_teams', lambda db: db.get_all_teams(page())),
+    ('get_team_by_id', lambda db: db.get_team_by_id(1)),
+    ('get_teams_with_details', lambda db: db.get_teams_with_details()),
+    ('get_athletes_by_team_id', lambda db: db.get_athletes_by_team_id(1, page())),
+    ('get_all_routines', lambda db: db.get_all_routines(page())),
+    ('get_routine_by_id', lambda db: db.get_routine_by_id(1)),
+    ('get_routines_by_athlete_id', lambda db: db.get_routines_by_athlete_id(1, page())),
+    ('get_schedule_by_athlete_id', lambda db: db.get_schedule_by_athlete_id(1, '2026-01-01', '2026-01-31')),
+    ('get_routine_exercises_by_athlete_id', lambda db: db.get_routine_exercises_by_athlete_id(1)),
+    ('get_routine_exercises_by_athlete_ids', lambda db: db.get_routine_exercises_by_athlete_ids(list(range(1, 11)), 'MONDAY')),
+    ('get_exercises_by_routine_id', lambda db: db.get_exercises_by_routine_id(1, page())),
+    ('get_excluded_dates', lambda db: db.get_excluded_dates(1, page())),
+    ('PurgeJob', lambda db: db.get_purge_candidates('routine_has_exercice', '2026-01-01T00:00:00', 0, Env.SOFT_DELETE_PURGE_BATCH_SIZE)),
+    ('PurgeJob (purge)', lambda db: db.purge('routine_has_exercice', [1, 2, 3])),
+]
+
+# Statements run inside SQL functions, which EXPLAIN cannot see through a call
+FUNCTION_QUERIES = [
+    ('soft_delete_cascade (athlete -> routine)', f"UPDATE routine SET deleted_at = now() WHERE id_athlete = ANY (ARRAY[1]) AND {LIVE}"),
+    ('soft_delete_cascade (exercise -> slots)', f"UPDATE routine_has_exercice SET deleted_at = now() WHERE id_exercise = ANY (ARRAY[1]) AND {LIVE}"),
+    ('check_routine_slot_overlap',
+     f"SELECT s.id FROM routine_has_exercice s JOIN routine r ON r.id = s.id_routine WHERE r.id_athlete = 1 "
+     f"AND r.{LIVE} AND s.{LIVE} AND s.id <> 1 AND s.days_of_week = 'MONDAY' AND s.start_hour < '10:00' AND s.end_hour > '09:00'"),
+]
+
+class StatementLog:
+    """Stands in for the connection pool: records each statement and its arguments instead of running it"""
+    def __init__(self):
+        self.statements = []
+
+    async def fetchval(self, sql, *args):
+        self.statements.append((sql, args))
+        return []
+
+    async def close(self):
+        pass
+
+async def record_statements():
+    """Returns (name, SQL, arguments) for every statement the integration calls issue"""
+    from integrations.postgres_integration import PostgresIntegration
+
+    Env.DATABASE_URL = DATABASE_URL
+    integration = await PostgresIntegration.connect()
+    pool, log = integration.pool, StatementLog()
+    integration.pool = log
+    try:
+        statements = []
+        for name, call in QUERIES:
+            integration.read_cache.clear()
+            integration.media_key_cache.clear()
+            del log.statements[:]
+            await call(integration)
+            statements += [(name if index == 0 else f"{name} #{index + 1}", sql, args) for index, (sql, args) in enumerate(log.statements)]
+        return statements + [(name, sql, ()) for name, sql in FUNCTION_QUERIES]
+    finally:
+        await integration.read_cache.close()
+        await pool.close()
+
+def seq_scans(plan):
+    """Yields the relations read with a sequential scan anywhere in a plan"""
+    if plan.get('Node Type') == 'Seq Scan':
+        yield plan['Relation Name']
+    for child in plan.get('Plans', ()):
+        yield from seq_scans(child)
+
+def _has_index_cond(plan):
+    return 'Index Cond' in plan or any(_has_index_cond(child) for child in plan.get('Plans', ()))
+
+def full_scans(plan):
+    """Yields the relations read in full, including index scans that have no index condition"""
+    node = plan.get('Node Type')
+    if node == 'Seq Scan' or (
+        node in ('Index Scan', 'Index Only Scan', 'Bitmap Heap Scan') and not _has_index_cond(plan)
+    ):
+        yield plan['Relation Name']
+    for child in plan.get('Plans', ()):
+        yield from full_scans(child)
+
+async def explain(connection, sql, args):
+    plan = await connection.fetchval(f"EXPLAIN (FORMAT JSON) {sql}", *args)
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]['Plan']
+
+async def check(min_rows, strict, verbose):
+    import asyncpg
+
+    statements = await record_statements()
+    connection = await asyncpg.connect(DATABASE_URL)
+    failures = []
+    try:
+        sizes = dict(await connection.fetch(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace"
+        ))
+        for name, sql, args in statements:
+            plan = await explain(connection, sql, args)
+            scanned = sorted({table for table in seq_scans(plan) if sizes.get(table, 0) >= min_rows})
+            status = "ok"
+            if scanned:
+                async with connection.transaction():
+                    await connection.execute("SET LOCAL enable_seqscan = off")
+                    unindexed = sorted({table for table in full_scans(await explain(connection, sql, args)) if table in scanned})
+                if unindexed:
+                    status = f"SEQ SCAN on {', '.join(unindexed)} (no usable index)"
+                else:
+                    status = f"seq scan on {', '.join(scanned)} (index available, not chosen at this size)"
+                if unindexed or strict:
+                    failures.append(name)
+            print(f"{name:42} {plan['Total Cost']:>12.2f}  {status}")
+            if verbose:
+                print(f"    {sql}")
+                rows = await connection.fetch(f"EXPLAIN {sql}", *args)
+                print('\n'.join(f"    {row[0]}" for row in rows))
+    finally:
+        await connection.close()
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--min-rows', type=int, default=1000, help="Ignore sequential scans of tables smaller than this")
+    parser.add_argument('--strict', action='store_true', help="Also fail on sequential scans an index could have avoided")
+    parser.add_argument('--verbose', action='store_true', help="Print every plan")
+    args = parser.parse_args()
+    failures = asyncio.run(check(args.min_rows, args.strict, args.verbose))
+    if failures:
+        print(f"\n{len(failures)} quer{'y' if len(failures) == 1 else 'ies'} scan large tables sequentially")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
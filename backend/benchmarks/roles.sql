@@ -0,0 +1,5 @@
+-- Role PostgREST runs requests as (the JWT issued by seed.py carries it)
+CREATE ROLE anon NOLOGIN;
+GRANT USAGE ON SCHEMA public TO anon;
+GRANT ALL ON ALL TABLES IN SCHEMA public TO anon;
+GRANT ALL ON ALL SEQUENCES IN SCHEMA public TO anon;
@@ -0,0 +1,205 @@
+"""Runs scripted load profiles against the API and reports latency percentiles and throughput
+
+Usage (from backend/, after benchmarks.seed):
+    python -m benchmarks.run --profiles home,routine_modal,photo,video_range --duration 30 --concurrency 32
+    python -m benchmarks.run --output after.json --baseline before.json --max-regression 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import httpx
+from benchmarks.common import bench_env
+
+async def home(client, rng, args):
+    """Home page: dashboard plus the avatars of one expanded team"""
+    response = await client.get('/api/dashboard/')
+    yield 'dashboard', response
+    teams = response.json().get('teams', []) if response.status_code == 200 else []
+    if teams:
+        for athlete in rng.choice(teams).get('athletes', [])[:args.avatars]:
+            if athlete.get('photo_path'):
+                yield 'avatar', await client.get(
+                    f"/api/athletes/{athlete['id']}/photo",
+                    params={'v': athlete['photo_path'], 'w': 80, 'h': 80, 'format': 'webp'}
+                )
+
+async def routine_modal(client, rng, args):
+    """Routine modal: an athlete's routines, the exercises of one of them and the exercise picker"""
+    athlete_id = rng.randint(1, args.athletes)
+    response = await client.get(f'/api/routines/athlete/{athlete_id}')
+    yield 'routines', response
+    routines = response.json() if response.status_code == 200 else []
+    if routines:
+        yield 'routine_exercises', await client.get(f"/api/routines/{rng.choice(routines)['id']}/exercises")
+    yield 'exercises', await client.get('/api/exercises/')
+
+async def photo(client, rng, args):
+    """Original photo download"""
+    yield 'photo', await client.get(f'/api/athletes/{rng.randint(1, args.athletes)}/photo')
+
+async def video_range(client, rng, args):
+    """Seek in a video: one ranged read of range_kb"""
+    start = rng.randrange(0, args.video_mb * 1024 * 1024 - args.range_kb * 1024)
+    yield 'video_range', await client.get(
+        f'/api/exercises/{rng.randint(1, args.exercises)}/video',
+        headers={'Range': f"bytes={start}-{start + args.range_kb * 1024 - 1}"}
+    )
+
+PROFILES = {
+    'home': home,
+    'routine_modal': routine_modal,
+    'photo': photo,
+    'video_range': video_range
+}
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+async def run_profile(name, args):
+    """Runs one profile with args.concurrency virtual users for args.duration seconds"""
+    scenario = PROFILES[name]
+    latencies = {}
+    errors = 0
+    iterations = 0
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        deadline = time.perf_counter() + args.duration
+
+        async def user(index):
+            nonlocal errors, iterations
+            rng = random.Random(args.seed * 1000 + index)
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                steps = scenario(client, rng, args)
+                while True:
+                    try:
+                        label, response = await steps.__anext__()
+                    except StopAsyncIteration:
+                        break
+                    except httpx.HTTPError:
+                        errors += 1
+                        break
+                    now = time.perf_counter()
+                    latencies.setdefault(label, []).append(now - start)
+                    if response.status_code >= 400:
+                        errors += 1
+                    start = now
+                iterations += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user(index) for index in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    requests = sum(len(values) for values in latencies.values())
+    every = [value for values in latencies.values() for value in values]
+    return {
+        "iterations": iterations,
+        "requests": requests,
+        "errors": errors,
+        "throughput": requests / elapsed,
+        "p50": percentile(every, 0.50),
+        "p95": percentile(every, 0.95),
+        "p99": percentile(every, 0.99),
+        "steps": {
+            label: {"requests": len(values), "p50": percentile(values, 0.50), "p95": percentile(values, 0.95), "p99": percentile(values, 0.99)}
+            for label, values in sorted(latencies.items())
+        }
+    }
+
+def print_report(results):
+    print(f"{'profile/step':<28}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<28}{result['requests']:>10}{result['errors']:>8}{result['throughput']:>10.1f}"
+              f"{result['p50'] * 1000:>10.1f}{result['p95'] * 1000:>10.1f}{result['p99'] * 1000:>10.1f}")
+        for label, step in result['steps'].items():
+            print(f"  {label:<26}{step['requests']:>10}{'':>8}{'':>10}"
+                  f"{step['p50'] * 1000:>10.1f}{step['p95'] * 1000:>10.1f}{step['p99'] * 1000:>10.1f}")
+
+def compare(results, baseline, max_regression):
+    """Returns the profiles whose p95 got worse than the baseline by more than max_regression"""
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before and before.get('p95') and result['p95'] > before['p95'] * (1 + max_regression):
+            regressions.append(f"{name}: p95 {before['p95'] * 1000:.1f} ms -> {result['p95'] * 1000:.1f} ms")
+    return regressions
+
+def start_server(args):
+    """Boots main:app with uvicorn against the local stand-ins and waits until it answers"""
+    env = {**os.environ, **bench_env()}
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--port', str(args.port), '--workers', str(args.workers), '--log-level', 'warning'],
+        env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{args.url}/metrics", timeout=1).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("The API did not start within 30 seconds")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', default=','.join(PROFILES))
+    parser.add_argument('--duration', type=float, default=30, help="Seconds per profile")
+    parser.add_argument('--concurrency', type=int, default=32, help="Virtual users per profile")
+    parser.add_argument('--warmup', type=float, default=3, help="Seconds of unmeasured load before each profile")
+    parser.add_argument('--url', help="Target an already running API instead of booting one")
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--athletes', type=int, default=10000, help="Scale used by benchmarks.seed")
+    parser.add_argument('--exercises', type=int, default=500, help="Scale used by benchmarks.seed")
+    parser.add_argument('--video-mb', type=int, default=32, help="Video size used by benchmarks.seed")
+    parser.add_argument('--range-kb', type=int, default=1024)
+    parser.add_argument('--avatars', type=int, default=20, help="Avatars loaded per Home page view")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Write the results as JSON")
+    parser.add_argument('--baseline', help="JSON results of a previous run to compare p95 against")
+    parser.add_argument('--max-regression', type=float, default=0.15, help="Allowed p95 increase over the baseline")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.profiles.split(',') if name not in PROFILES]
+    if unknown:
+        parser.error(f"Unknown profiles: {', '.join(unknown)}")
+
+    server = None
+    if not args.url:
+        args.url = f"http://127.0.0.1:{args.port}"
+        server = start_server(args)
+
+    try:
+        results = {}
+        for name in args.profiles.split(','):
+            if args.warmup:
+                asyncio.run(run_profile(name, argparse.Namespace(**{**vars(args), 'duration': args.warmup})))
+            results[name] = asyncio.run(run_profile(name, args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = compare(results, json.load(baseline), args.max_regression)
+        if regressions:
+            print("Regressions over the baseline:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+
+if __name__ == '__main__':
+    main()
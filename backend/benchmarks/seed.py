@@ -0,0 +1,137 @@
+"""Seeds the local benchmark stand-ins with synthetic data
+
+Usage (from backend/):
+    python -m benchmarks.seed --athletes 10000 --routine-exercises 100000
+"""
+import argparse
+import io
+import os
+import random
+from datetime import date, datetime, timedelta
+import boto3
+import psycopg2
+from psycopg2.extras import execute_values
+from benchmarks.common import DATABASE_URL, S3_ENDPOINT, S3_ID, S3_KEY, BUCKETS
+from migrate import migrate
+
+WEEKDAYS = ('MONDAY', 'TUESDAY', 'WEDNESDAY', 'THURSDAY', 'FRIDAY', 'SATURDAY', 'SUNDAY')
+TABLES = (
+    'routine_exercise_excluded_dates', 'routine_has_exercice', 'routine', 'enrollment',
+    'exercise', 'team', 'athlete', 'coach', 'level', 'sport', 'type_exercise'
+)
+PAGE_SIZE = 5000
+
+def photo_bytes(index, size):
+    """Returns a JPEG of the given size so photo and thumbnail work is realistic"""
+    from PIL import Image
+
+    image = Image.new('RGB', (size, size), ((index * 47) % 256, (index * 91) % 256, (index * 13) % 256))
+    output = io.BytesIO()
+    image.save(output, 'JPEG', quality=90)
+    return output.getvalue()
+
+def upload_media(photo_pool, photo_size, video_mb):
+    """Uploads a pool of photos and one video to S3, returning their keys"""
+    s3 = boto3.client('s3', endpoint_url=S3_ENDPOINT, aws_access_key_id=S3_ID, aws_secret_access_key=S3_KEY, region_name='us-east-1')
+    existing = {bucket['Name'] for bucket in s3.list_buckets().get('Buckets', [])}
+    for bucket in BUCKETS:
+        if bucket not in existing:
+            s3.create_bucket(Bucket=bucket)
+
+    photo_keys = []
+    for index in range(photo_pool):
+        key = f"bench/photo-{index}.jpg"
+        s3.put_object(Bucket='photos', Key=key, Body=photo_bytes(index, photo_size), ContentType='image/jpeg')
+        photo_keys.append(key)
+
+    video_key = 'bench/video.mp4'
+    s3.put_object(Bucket='videos', Key=video_key, Body=os.urandom(video_mb * 1024 * 1024), ContentType='video/mp4')
+    return photo_keys, video_key
+
+def insert(cursor, table, columns, rows):
+    execute_values(cursor, f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES %s', rows, page_size=PAGE_SIZE)
+
+def seed(args):
+    rng = random.Random(args.seed)
+    # Benchmark against the same indexes as production
+    migrate(DATABASE_URL)
+    photo_keys, video_key = upload_media(args.photo_pool, args.photo_size, args.video_mb)
+
+    def photo():
+        return rng.choice(photo_keys) if rng.random() < args.photo_ratio else None
+
+    now = datetime.now().replace(microsecond=0)
+    audit = (now, 'bench')
+
+    connection = psycopg2.connect(DATABASE_URL)
+    with connection, connection.cursor() as cursor:
+        cursor.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+
+        insert(cursor, 'level', ('name', 'created_at', 'created_by'), [(f"Level {i}", *audit) for i in range(1, 4)])
+        insert(cursor, 'sport', ('name', 'photo_path', 'created_at', 'created_by'),
+               [(f"Sport {i}", photo(), *audit) for i in range(1, args.sports + 1)])
+        insert(cursor, 'type_exercise', ('name', 'created_at', 'created_by'), [(f"Type {i}", *audit) for i in range(1, 6)])
+        insert(cursor, 'coach', ('id_level', 'name', 'photo_path', 'created_at', 'created_by'),
+               [(rng.randint(1, 3), f"Coach {i}", photo(), *audit) for i in range(1, args.coaches + 1)])
+        insert(cursor, 'team', ('id_coach', 'id_sport', 'name', 'photo_path', 'created_at', 'created_by'),
+               [(rng.randint(1, args.coaches), rng.randint(1, args.sports), f"Team {i}", photo(), *audit)
+                for i in range(1, args.teams + 1)])
+        insert(cursor, 'athlete', ('name', 'photo_path', 'created_at', 'created_by'),
+               [(f"Athlete {i}", photo(), *audit) for i in range(1, args.athletes + 1)])
+        insert(cursor, 'exercise', ('id_type', 'id_sport', 'name', 'reps', 'sets', 'photo_path', 'video_path', 'created_at', 'created_by'),
+               [(rng.randint(1, 5), rng.randint(1, args.sports), f"Exercise {i}", rng.randint(5, 20), rng.randint(1, 5),
+                 photo(), video_key, *audit) for i in range(1, args.exercises + 1)])
+
+        # Every athlete is in one team, some in a second one
+        enrollments = []
+        for athlete_id in range(1, args.athletes + 1):
+            for team_id in rng.sample(range(1, args.teams + 1), 2 if rng.random() < 0.2 else 1):
+                enrollments.append((team_id, athlete_id, *audit))
+        insert(cursor, 'enrollment', ('id_team', 'id_athlete', 'created_at', 'created_by'), enrollments)
+
+        routines = args.athletes * args.routines_per_athlete
+        insert(cursor, 'routine', ('id_athlete', 'name', 'created_at', 'created_by'),
+               [((i - 1) % args.athletes + 1, f"Routine {i}", *audit) for i in range(1, routines + 1)])
+
+        slots = []
+        for _ in range(args.routine_exercises):
+            start = rng.randrange(6 * 60, 21 * 60, 15)
+            end = start + rng.choice((30, 45, 60, 90))
+            slots.append((
+                rng.randint(1, routines), rng.randint(1, args.exercises), rng.choice(WEEKDAYS),
+                f"{start // 60:02d}:{start % 60:02d}", f"{end // 60:02d}:{end % 60:02d}", *audit
+            ))
+        insert(cursor, 'routine_has_exercice',
+               ('id_routine', 'id_exercise', 'days_of_week', 'start_hour', 'end_hour', 'created_at', 'created_by'), slots)
+
+        today = date.today()
+        excluded = [
+            (slot_id, today + timedelta(days=rng.randint(0, 90)), 'bench')
+            for slot_id in range(1, args.routine_exercises + 1) if rng.random() < args.excluded_ratio
+        ]
+        insert(cursor, 'routine_exercise_excluded_dates', ('id_routine_has_exercise', 'excluded_date', 'reason'), excluded)
+        cursor.execute("ANALYZE")
+    connection.close()
+
+    print(f"Seeded {args.athletes} athletes, {len(enrollments)} enrollments, {routines} routines, "
+          f"{args.routine_exercises} routine exercises and {len(excluded)} excluded dates")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--athletes', type=int, default=10000)
+    parser.add_argument('--routine-exercises', type=int, default=100000)
+    parser.add_argument('--routines-per-athlete', type=int, default=2)
+    parser.add_argument('--teams', type=int, default=200)
+    parser.add_argument('--coaches', type=int, default=50)
+    parser.add_argument('--sports', type=int, default=10)
+    parser.add_argument('--exercises', type=int, default=500)
+    parser.add_argument('--excluded-ratio', type=float, default=0.05, help="Share of slots with an excluded date")
+    parser.add_argument('--photo-ratio', type=float, default=0.8, help="Share of rows with a photo")
+    parser.add_argument('--photo-pool', type=int, default=20, help="Distinct photos uploaded to S3")
+    parser.add_argument('--photo-size', type=int, default=1600, help="Photo width/height in pixels")
+    parser.add_argument('--video-mb', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=42, help="Random seed, so runs are reproducible")
+    seed(parser.parse_args())
+
+if __name__ == '__main__':
+    main()
@@ -7,4 +7,120 @@ class Env:
     elif APP_ENV == "prod":
         pass
     else:
-        pass
\ No newline at end of file
+        pass
+
+    # Supabase
+    SUPABASE_URL = os.getenv("SUPABASE_URL")
+    SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+    # Direct Postgres connection string, used by migrate.py and the purge lock
+    DATABASE_URL = os.getenv("DATABASE_URL", "")
+
+    # Data access: "postgrest" (Supabase client over HTTP) or "postgres" (asyncpg
+    # pool on DATABASE_URL, skipping the PostgREST hop). Behind a transaction
+    # pooler (Supabase port 6543) set DATABASE_STATEMENT_CACHE_SIZE to 0
+    DATABASE_BACKEND = os.getenv("DATABASE_BACKEND", "postgrest")
+    DATABASE_POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", "2"))
+    DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "20"))
+    DATABASE_STATEMENT_CACHE_SIZE = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "100"))
+
+    # Shared HTTP connection pool used by the Supabase client
+    SUPABASE_POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+    SUPABASE_POOL_KEEPALIVE = int(os.getenv("SUPABASE_POOL_KEEPALIVE", "10"))
+    SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+    SUPABASE_CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+    SUPABASE_READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", "30"))
+    SUPABASE_POOL_TIMEOUT = float(os.getenv("SUPABASE_POOL_TIMEOUT", "10"))
+
+    # Media delivery: "proxy" streams bytes through the API, "redirect" answers
+    # with a redirect to a presigned S3 URL and only proxies as a fallback
+    MEDIA_DELIVERY_MODE = os.getenv("MEDIA_DELIVERY_MODE", "proxy")
+    MEDIA_REDIRECT_STATUS = int(os.getenv("MEDIA_REDIRECT_STATUS", "307"))
+    MEDIA_PRESIGNED_URL_EXPIRATION = int(os.getenv("MEDIA_PRESIGNED_URL_EXPIRATION", "3600"))
+    MEDIA_PRESIGNED_URL_REFRESH_MARGIN = int(os.getenv("MEDIA_PRESIGNED_URL_REFRESH_MARGIN", "300"))
+    MEDIA_PRESIGNED_URL_CACHE_SIZE = int(os.getenv("MEDIA_PRESIGNED_URL_CACHE_SIZE", "10000"))
+
+    # Read cache of Supabase results: "memory" (per worker) or "redis" (shared
+    # by every container, msgpack-encoded). Reference tables (sports, exercise
+    # types) are kept longer than other cached reads such as team details
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_PREFIX = os.getenv("CACHE_PREFIX", "athletrics")
+    REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "300"))
+    READ_CACHE_TTL = float(os.getenv("READ_CACHE_TTL", "60"))
+    READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", os.getenv("REFERENCE_CACHE_SIZE", "1024")))
+
+    # Share one Supabase call between identical reads that are in flight at the same time
+    SUPABASE_SINGLE_FLIGHT = os.getenv("SUPABASE_SINGLE_FLIGHT", "true").lower() == "true"
+
+    # Keyset pagination of list endpoints, opt-in through ?limit= or ?cursor=
+    # (the default page size applies when only a cursor is given)
+    LIST_DEFAULT_LIMIT = int(os.getenv("LIST_DEFAULT_LIMIT", "100"))
+    LIST_MAX_LIMIT = int(os.getenv("LIST_MAX_LIMIT", "1000"))
+
+    # Maximum number of items accepted by bulk endpoints
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "500"))
+
+    # Longest date range accepted by the athlete calendar
+    CALENDAR_MAX_DAYS = int(os.getenv("CALENDAR_MAX_DAYS", "366"))
+
+    # Seconds before an athlete's in-memory schedule index is reloaded, and
+    # how many athletes it keeps (least recently used are evicted)
+    SCHEDULE_INDEX_TTL = float(os.getenv("SCHEDULE_INDEX_TTL", "300"))
+    SCHEDULE_INDEX_SIZE = int(os.getenv("SCHEDULE_INDEX_SIZE", "10000"))
+
+    # HTTP caching: max-age of JSON reads (0 means always revalidate with the
+    # body's ETag, or the read cache's data version with CACHE_BACKEND=redis or
+    # a CHANGE_FEED) and of media URLs versioned with ?v=<path>
+    HTTP_CACHE_JSON_MAX_AGE = int(os.getenv("HTTP_CACHE_JSON_MAX_AGE", "0"))
+    HTTP_CACHE_MEDIA_MAX_AGE = int(os.getenv("HTTP_CACHE_MEDIA_MAX_AGE", "31536000"))
+
+    # Photo variants (?w=&h=&format=) generated with Pillow in a process pool
+    THUMBNAIL_MAX_SIZE = int(os.getenv("THUMBNAIL_MAX_SIZE", "2048"))
+    THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+    THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+
+    # Entity -> S3 key cache of the media service, and batch photo URLs (how
+    # many per request and how many missing variants are generated at once)
+    MEDIA_KEY_CACHE_TTL = float(os.getenv("MEDIA_KEY_CACHE_TTL", "300"))
+    MEDIA_KEY_CACHE_SIZE = int(os.getenv("MEDIA_KEY_CACHE_SIZE", "10000"))
+    MEDIA_BATCH_MAX_ITEMS = int(os.getenv("MEDIA_BATCH_MAX_ITEMS", "100"))
+    MEDIA_BATCH_CONCURRENCY = int(os.getenv("MEDIA_BATCH_CONCURRENCY", "16"))
+
+    # Direct-to-S3 uploads: presigned URL lifetime, size limits and multipart
+    # settings (videos above the threshold are uploaded in parallel parts)
+    UPLOAD_URL_EXPIRATION = int(os.getenv("UPLOAD_URL_EXPIRATION", "3600"))
+    UPLOAD_MAX_PHOTO_SIZE = int(os.getenv("UPLOAD_MAX_PHOTO_SIZE", str(20 * 1024 * 1024)))
+    UPLOAD_MAX_VIDEO_SIZE = int(os.getenv("UPLOAD_MAX_VIDEO_SIZE", str(5 * 1024 * 1024 * 1024)))
+    MULTIPART_THRESHOLD = int(os.getenv("MULTIPART_THRESHOLD", str(64 * 1024 * 1024)))
+    MULTIPART_PART_SIZE = int(os.getenv("MULTIPART_PART_SIZE", str(16 * 1024 * 1024)))
+
+    # S3 connection pool, timeouts and retries, plus in-flight call limits
+    # per bucket ("photos=32,videos=8"; other buckets use the default). A
+    # streamed download holds its slot until the last byte is sent
+    S3_POOL_SIZE = int(os.getenv("S3_POOL_SIZE", "50"))
+    S3_CONNECT_TIMEOUT = float(os.getenv("S3_CONNECT_TIMEOUT", "5"))
+    S3_READ_TIMEOUT = float(os.getenv("S3_READ_TIMEOUT", "30"))
+    S3_MAX_ATTEMPTS = int(os.getenv("S3_MAX_ATTEMPTS", "3"))
+    S3_DEFAULT_CONCURRENCY = int(os.getenv("S3_DEFAULT_CONCURRENCY", "32"))
+    S3_BUCKET_CONCURRENCY = os.getenv("S3_BUCKET_CONCURRENCY", "photos=32,videos=8")
+
+    # Report per-request Supabase/S3/serialization/handler timings in a Server-Timing header
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+
+    # Change feed that invalidates this worker's caches after writes made by
+    # other workers: "none", "realtime" (Supabase Realtime) or "postgres"
+    # (LISTEN/NOTIFY, see public/architecture/change_feed.sql)
+    CHANGE_FEED = os.getenv("CHANGE_FEED", "none")
+    CHANGE_FEED_DATABASE_URL = os.getenv("CHANGE_FEED_DATABASE_URL", DATABASE_URL)
+    CHANGE_FEED_CHANNEL = os.getenv("CHANGE_FEED_CHANNEL", "cache_invalidation")
+    CHANGE_FEED_TABLES = os.getenv(
+        "CHANGE_FEED_TABLES", "athlete,coach,team,sport,exercise,type_exercise,enrollment,routine,routine_has_exercice"
+    )
+    CHANGE_FEED_RECONNECT_DELAY = float(os.getenv("CHANGE_FEED_RECONNECT_DELAY", "5"))
+
+    # Deletes only set deleted_at; rows deleted longer than the retention are
+    # hard-deleted in batches every interval seconds (0 disables the purge) by
+    # the one worker holding an advisory lock on DATABASE_URL
+    SOFT_DELETE_PURGE_INTERVAL = float(os.getenv("SOFT_DELETE_PURGE_INTERVAL", "0"))
+    SOFT_DELETE_RETENTION_DAYS = float(os.getenv("SOFT_DELETE_RETENTION_DAYS", "30"))
+    SOFT_DELETE_PURGE_BATCH_SIZE = int(os.getenv("SOFT_DELETE_PURGE_BATCH_SIZE", "500"))
@@ -1,55 +1,82 @@
 from integrations.supabase_integration import SupabaseIntegration
-from utils.s3 import S3Client
+from datetime import date
+from utils.pagination import ListParams
+from utils.schedule import expand_weekly_slots
+from utils.intervals import ScheduleIndex
+from controllers.media_controller import MediaController
+from utils.thumbnails import ImageVariant
 from models.athlete_models import *
 
 class AthleteController:
-    def __init__(self):
-        self.supabase_integration = SupabaseIntegration()
-        self.s3 = S3Client()
+    def __init__(self, supabase_integration: SupabaseIntegration, schedule_index: ScheduleIndex):
+        self.supabase_integration = supabase_integration
+        self.schedule_index = schedule_index
+        self.media = MediaController(supabase_integration)
     
-    def get_all_athletes(self):
+    async def get_all_athletes(self, params: ListParams = None):
         """Returns all athletes"""
-        return self.supabase_integration.get_all_athletes()
+        return await self.supabase_integration.get_all_athletes(params)
     
-    def get_athlete_by_id(self, athlete_id: int):
+    async def get_athlete_by_id(self, athlete_id: int):
         """Returns an athlete by ID"""
-        return self.supabase_integration.get_athlete_by_id(athlete_id)
-    
-    def get_athlete_photo(self, athlete_id: int):
-        """Returns the photo bytes of an athlete by ID"""
-        photo_path = self.supabase_integration.get_athlete_photo_path_by_id(athlete_id)
-        if not photo_path:
-            return None, None
-    
-        # Return bytes of the image
-        file_bytes = self.s3.get_file('photos', photo_path)
-        
-        # Determine content type based on extension
-        if photo_path.lower().endswith('.png'):
-            content_type = 'image/png'
-        elif photo_path.lower().endswith(('.jpg', '.jpeg')):
-            content_type = 'image/jpeg'
-        elif photo_path.lower().endswith('.gif'):
-            content_type = 'image/gif'
-        elif photo_path.lower().endswith('.webp'):
-            content_type = 'image/webp'
-        else:
-            content_type = 'application/octet-stream'
-        
-        return file_bytes, content_type
-    
-    def create_athlete(self, payload: AthleteCreate):
+        return await self.supabase_integration.get_athlete_by_id(athlete_id)
+    
+    async def get_athlete_photo(self, athlete_id: int, byte_range: str = None, if_range: str = None, if_none_match: str = None, if_modified_since: str = None, variant: ImageVariant = None):
+        """Returns a streaming S3 object with the photo of an athlete by ID"""
+        return await self.media.get_photo('athlete', athlete_id, byte_range, if_range, if_none_match, if_modified_since, variant)
+    
+    async def get_athlete_photo_url(self, athlete_id: int):
+        """Returns a presigned URL for the photo of an athlete by ID"""
+        return await self.media.get_photo_url('athlete', athlete_id)
+    
+    async def create_athlete(self, payload: AthleteCreate):
         """Creates a new athlete"""
-        return self.supabase_integration.create_athlete(payload)
+        return await self.supabase_integration.create_athlete(payload)
     
-    def update_athlete(self, athlete_id: int, payload: AthleteUpdate):
+    async def update_athlete(self, athlete_id: int, payload: AthleteUpdate):
         """Updates an athlete"""
-        return self.supabase_integration.update_athlete(athlete_id, payload)
+        return await self.supabase_integration.update_athlete(athlete_id, payload)
     
-    def delete_athlete(self, athlete_id: int):
-        """Deletes an athlete"""
-        return self.supabase_integration.delete_athlete(athlete_id)
+    async def delete_athlete(self, athlete_id: int, deleted_by: str = None):
+        """Soft-deletes an athlete with their enrollments and routines"""
+        result = await self.supabase_integration.delete_athlete(athlete_id, deleted_by)
+        self.schedule_index.invalidate(athlete_id)
+        return result
     
-    def get_teams_by_athlete_id(self, athlete_id: int):
+    async def get_teams_by_athlete_id(self, athlete_id: int, params: ListParams = None):
         """Returns all teams of the athlete by athlete ID"""
-        return self.supabase_integration.get_teams_by_athlete_id(athlete_id)
\ No newline at end of file
+        return await self.supabase_integration.get_teams_by_athlete_id(athlete_id, params)
+    
+    async def get_athlete_calendar(self, athlete_id: int, start: date, end: date):
+        """Returns the dated exercise occurrences of an athlete between two dates"""
+        result = await self.supabase_integration.get_schedule_by_athlete_id(athlete_id, start.isoformat(), end.isoformat())
+
+        slots = []
+        for routine in result.data:
+            for routine_exercise in routine.get('routine_has_exercice') or []:
+                excluded_dates = routine_exercise.get('routine_exercise_excluded_dates') or []
+                slots.append({
+                    **routine_exercise,
+                    'routine': routine,
+                    'excluded_dates': {date.fromisoformat(item['excluded_date']) for item in excluded_dates}
+                })
+
+        return [
+            {
+                "date": occurrence_date.isoformat(),
+                "start_hour": slot['start_hour'],
+                "end_hour": slot['end_hour'],
+                "routine_id": slot['routine']['id'],
+                "routine_name": slot['routine']['name'],
+                "routine_exercise_id": slot['id'],
+                "exercise_id": slot['id_exercise'],
+                "exercise_name": (slot.get('exercise') or {}).get('name')
+            }
+            for occurrence_date, slot in expand_weekly_slots(slots, start, end)
+        ]
+    
+    async def get_athlete_conflicts(self, athlete_id: int):
+        """Returns the groups of overlapping routine slots of an athlete"""
+        async with self.schedule_index.lock(athlete_id):
+            await self.schedule_index.ensure_loaded(self.supabase_integration, athlete_id)
+            return self.schedule_index.conflicts(athlete_id)
\ No newline at end of file
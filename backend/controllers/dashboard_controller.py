@@ -0,0 +1,16 @@
+from integrations.supabase_integration import SupabaseIntegration
+
+class DashboardController:
+    def __init__(self, supabase_integration: SupabaseIntegration):
+        self.supabase_integration = supabase_integration
+    
+    async def get_teams(self):
+        """Returns all teams with coach, sport and enrolled athletes"""
+        result = await self.supabase_integration.get_teams_with_details()
+        teams = []
+        # Rows may be shared with concurrent coalesced reads, so build new dicts instead of editing them
+        for row in result.data:
+            team = {key: value for key, value in row.items() if key != 'enrollment'}
+            team['athletes'] = [enrollment['athlete'] for enrollment in row.get('enrollment') or [] if enrollment.get('athlete')]
+            teams.append(team)
+        return teams
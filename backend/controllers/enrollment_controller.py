@@ -1,34 +1,70 @@
 from integrations.supabase_integration import SupabaseIntegration
+from typing import List
+from utils.pagination import ListParams
+from utils.bulk import split_duplicates, fill_results, update_results, delete_results
 from models.enrollment_models import *
 
 class EnrollmentController:
-    def __init__(self):
-        self.supabase_integration = SupabaseIntegration()
+    def __init__(self, supabase_integration: SupabaseIntegration):
+        self.supabase_integration = supabase_integration
     
-    def get_all_enrollments(self):
+    async def get_all_enrollments(self, params: ListParams = None):
         """Returns all enrollments"""
-        return self.supabase_integration.get_all_enrollments()
+        return await self.supabase_integration.get_all_enrollments(params)
     
-    def get_enrollment_by_id(self, enrollment_id: int):
+    async def get_enrollment_by_id(self, enrollment_id: int):
         """Returns an enrollment by ID"""
-        return self.supabase_integration.get_enrollment_by_id(enrollment_id)
+        return await self.supabase_integration.get_enrollment_by_id(enrollment_id)
     
-    def get_enrollments_by_team(self, team_id: int):
+    async def get_enrollments_by_team(self, team_id: int, params: ListParams = None):
         """Returns all enrollments of a team"""
-        return self.supabase_integration.get_enrollments_by_team_id(team_id)
+        return await self.supabase_integration.get_enrollments_by_team_id(team_id, params)
     
-    def get_enrollments_by_athlete(self, athlete_id: int):
+    async def get_enrollments_by_athlete(self, athlete_id: int, params: ListParams = None):
         """Returns all enrollments of an athlete"""
-        return self.supabase_integration.get_enrollments_by_athlete_id(athlete_id)
+        return await self.supabase_integration.get_enrollments_by_athlete_id(athlete_id, params)
     
-    def create_enrollment(self, payload: EnrollmentCreate):
+    async def create_enrollment(self, payload: EnrollmentCreate):
         """Creates a new enrollment"""
-        return self.supabase_integration.create_enrollment(payload)
+        return await self.supabase_integration.create_enrollment(payload)
     
-    def update_enrollment(self, enrollment_id: int, payload: EnrollmentUpdate):
+    async def update_enrollment(self, enrollment_id: int, payload: EnrollmentUpdate):
         """Updates an enrollment"""
-        return self.supabase_integration.update_enrollment(enrollment_id, payload)
+        return await self.supabase_integration.update_enrollment(enrollment_id, payload)
     
-    def delete_enrollment(self, enrollment_id: int):
-        """Deletes an enrollment"""
-        return self.supabase_integration.delete_enrollment(enrollment_id)
\ No newline at end of file
+    async def delete_enrollment(self, enrollment_id: int, deleted_by: str = None):
+        """Soft-deletes an enrollment"""
+        return await self.supabase_integration.delete_enrollment(enrollment_id, deleted_by)
+    
+    async def create_enrollments(self, payload: List[EnrollmentCreate]):
+        """Creates several enrollments at once, skipping repeated and already enrolled team/athlete pairs"""
+        indexes, results = split_duplicates(payload, lambda enrollment: (enrollment.id_team, enrollment.id_athlete))
+        if indexes:
+            # The live enrollment key would reject the whole insert for one existing pair
+            existing = await self.supabase_integration.get_live_enrollments(
+                list({payload[index].id_team for index in indexes}),
+                list({payload[index].id_athlete for index in indexes})
+            )
+            enrolled = {(row['id_team'], row['id_athlete']) for row in existing.data}
+            for index in indexes:
+                if (payload[index].id_team, payload[index].id_athlete) in enrolled:
+                    results[index] = {"index": index, "status": 409, "detail": "Athlete already enrolled in this team"}
+            indexes = [index for index in indexes if results[index] is None]
+        if indexes:
+            result = await self.supabase_integration.create_enrollments([payload[index] for index in indexes])
+            fill_results(results, indexes, result.data, 201)
+        return results
+    
+    async def update_enrollments(self, payload: List[EnrollmentUpdate]):
+        """Updates several enrollments at once, skipping repeated IDs"""
+        indexes, results = split_duplicates(payload, lambda enrollment: enrollment.id)
+        if indexes:
+            result = await self.supabase_integration.update_enrollments([payload[index] for index in indexes])
+            update_results(results, indexes, [payload[index].id for index in indexes], result.data)
+        return results
+    
+    async def delete_enrollments(self, enrollment_ids: List[int], deleted_by: str = None):
+        """Soft-deletes several enrollments at once"""
+        enrollment_ids = list(dict.fromkeys(enrollment_ids))
+        result = await self.supabase_integration.delete_enrollments(enrollment_ids, deleted_by)
+        return delete_results(enrollment_ids, result.data)
\ No newline at end of file
@@ -1,80 +1,60 @@
 from integrations.supabase_integration import SupabaseIntegration
-from utils.s3 import S3Client
+from utils.pagination import ListParams
+from controllers.media_controller import MediaController
+from utils.intervals import ScheduleIndex
+from utils.thumbnails import ImageVariant
 from models.exercise_models import *
 
 class ExerciseController:
-    def __init__(self):
-        self.supabase_integration = SupabaseIntegration()
-        self.s3 = S3Client()
+    def __init__(self, supabase_integration: SupabaseIntegration, schedule_index: ScheduleIndex):
+        self.supabase_integration = supabase_integration
+        self.schedule_index = schedule_index
+        self.media = MediaController(supabase_integration)
     
-    def get_all_exercises(self):
+    async def get_all_exercises(self, params: ListParams = None):
         """Returns all exercises"""
-        return self.supabase_integration.get_all_exercises()
+        return await self.supabase_integration.get_all_exercises(params)
     
-    def get_exercise_by_id(self, exercise_id: int):
+    async def get_exercise_by_id(self, exercise_id: int):
         """Returns an exercise by ID"""
-        return self.supabase_integration.get_exercise_by_id(exercise_id)
+        return await self.supabase_integration.get_exercise_by_id(exercise_id)
     
-    def get_exercises_by_team(self, team_id: int):
+    async def get_exercises_by_team(self, team_id: int, params: ListParams = None):
         """Returns all exercises of a team"""
-        return self.supabase_integration.get_exercises_by_team_id(team_id)
+        return await self.supabase_integration.get_exercises_by_team_id(team_id, params)
     
-    def get_exercises_by_athlete(self, athlete_id: int):
+    async def get_exercises_by_athlete(self, athlete_id: int, params: ListParams = None):
         """Returns all exercises of an athlete"""
-        return self.supabase_integration.get_exercises_by_athlete_id(athlete_id)
+        return await self.supabase_integration.get_exercises_by_athlete_id(athlete_id, params)
     
-    def get_exercise_photo(self, exercise_id: int):
-        """Returns the photo bytes of an exercise by ID"""
-        photo_path = self.supabase_integration.get_exercise_photo_path_by_id(exercise_id)
-        if not photo_path:
-            return None, None
+    async def get_exercise_photo(self, exercise_id: int, byte_range: str = None, if_range: str = None, if_none_match: str = None, if_modified_since: str = None, variant: ImageVariant = None):
+        """Returns a streaming S3 object with the photo of an exercise by ID"""
+        return await self.media.get_photo('exercise', exercise_id, byte_range, if_range, if_none_match, if_modified_since, variant)
     
-        # Return bytes of the image
-        file_bytes = self.s3.get_file('photos', photo_path)
-        
-        # Determine content type based on extension
-        if photo_path.lower().endswith('.png'):
-            content_type = 'image/png'
-        elif photo_path.lower().endswith(('.jpg', '.jpeg')):
-            content_type = 'image/jpeg'
-        elif photo_path.lower().endswith('.gif'):
-            content_type = 'image/gif'
-        elif photo_path.lower().endswith('.webp'):
-            content_type = 'image/webp'
-        else:
-            content_type = 'application/octet-stream'
-        
-        return file_bytes, content_type
+    async def get_exercise_video(self, exercise_id: int, byte_range: str = None, if_range: str = None, if_none_match: str = None, if_modified_since: str = None):
+        """Returns a streaming S3 object with the video of an exercise by ID"""
+        return await self.media.get_file('exercise', exercise_id, 'video_path', 'videos', byte_range, if_range, if_none_match, if_modified_since)
     
-    def get_exercise_video(self, exercise_id: int):
-        """Returns the video bytes of an exercise by ID"""
-        video_path = self.supabase_integration.get_exercise_video_path_by_id(exercise_id)
-        if not video_path:
-            return None, None
+    async def get_exercise_photo_url(self, exercise_id: int):
+        """Returns a presigned URL for the photo of an exercise by ID"""
+        return await self.media.get_photo_url('exercise', exercise_id)
     
-        # Return bytes of the video
-        file_bytes = self.s3.get_file('videos', video_path)
-        
-        # Determine content type based on extension
-        if video_path.lower().endswith('.mp4'):
-            content_type = 'video/mp4'
-        elif video_path.lower().endswith('.webm'):
-            content_type = 'video/webm'
-        elif video_path.lower().endswith('.ogg'):
-            content_type = 'video/ogg'
-        else:
-            content_type = 'application/octet-stream'
-        
-        return file_bytes, content_type
+    async def get_exercise_video_url(self, exercise_id: int):
+        """Returns a presigned URL for the video of an exercise by ID"""
+        return await self.media.get_file_url('exercise', exercise_id, 'video_path', 'videos')
     
-    def create_exercise(self, payload: ExerciseCreate):
+    async def create_exercise(self, payload: ExerciseCreate):
         """Creates a new exercise"""
-        return self.supabase_integration.create_exercise(payload)
+        return await self.supabase_integration.create_exercise(payload)
     
-    def update_exercise(self, exercise_id: int, payload: ExerciseUpdate):
+    async def update_exercise(self, exercise_id: int, payload: ExerciseUpdate):
         """Updates an exercise"""
-        return self.supabase_integration.update_exercise(exercise_id, payload)
-    
-    def delete_exercise(self, exercise_id: int):
-        """Deletes an exercise"""
-        return self.supabase_integration.delete_exercise(exercise_id)
\ No newline at end of file
+        return await self.supabase_integration.update_exercise(exercise_id, payload)
+    
+    async def delete_exercise(self, exercise_id: int, deleted_by: str = None):
+        """Soft-deletes an exercise and the routine slots using it"""
+        result = await self.supabase_integration.delete_exercise(exercise_id, deleted_by)
+        if result.data:
+            # The slots may belong to any athlete, so reload every schedule lazily
+            self.schedule_index.invalidate_all()
+        return result
\ No newline at end of file
@@ -0,0 +1,176 @@
+import asyncio
+import math
+import os
+import uuid
+from typing import Dict, List
+from configs.env import Env
+from integrations.supabase_integration import SupabaseIntegration
+from models.media_models import UploadRequest, UploadComplete, UploadAbort
+from utils.media import media_type
+from utils.s3 import AsyncS3Client, ObjectTooLargeError
+from utils.thumbnails import ImageVariant, ensure_variant, forget_source_etag, get_variant_stream
+
+# Column and bucket holding each kind of file
+MEDIA_KINDS = {
+    'photo': ('photo_path', 'photos'),
+    'video': ('video_path', 'videos')
+}
+
+def max_upload_size(kind: str):
+    """Largest photo or video accepted for upload, in bytes"""
+    return Env.UPLOAD_MAX_PHOTO_SIZE if kind == 'photo' else Env.UPLOAD_MAX_VIDEO_SIZE
+
+class MediaController:
+    """Resolves photos and videos of any entity to S3 keys and downloads them"""
+    def __init__(self, supabase_integration: SupabaseIntegration):
+        self.supabase_integration = supabase_integration
+        self.s3 = AsyncS3Client()
+    
+    async def get_file(self, table: str, entity_id: int, column: str, bucket: str, byte_range: str = None, if_range: str = None, if_none_match: str = None, if_modified_since: str = None, variant: ImageVariant = None):
+        """Returns a streaming S3 object and its content type for the file stored in a column of a row"""
+        path = await self.supabase_integration.get_media_path(table, entity_id, column)
+        if not path:
+            return None, None
+
+        if variant:
+            # Resized/re-encoded rendition, served from the S3 variant cache
+            s3_object = await get_variant_stream(self.s3, bucket, path, variant, byte_range, if_range, if_none_match, if_modified_since)
+            return s3_object, variant.content_type
+
+        # Stream the file (or the requested byte range) from S3
+        s3_object = await self.s3.get_file_stream(bucket, path, byte_range, if_range, if_none_match, if_modified_since)
+        return s3_object, media_type(path, s3_object)
+    
+    async def get_file_url(self, table: str, entity_id: int, column: str, bucket: str):
+        """Returns a presigned URL for the file stored in a column of a row"""
+        path = await self.supabase_integration.get_media_path(table, entity_id, column)
+        if not path:
+            return None
+        return self.s3.get_cached_file_url(
+            bucket,
+            path,
+            Env.MEDIA_PRESIGNED_URL_EXPIRATION,
+            Env.MEDIA_PRESIGNED_URL_REFRESH_MARGIN,
+            Env.MEDIA_PRESIGNED_URL_CACHE_SIZE
+        )
+    
+    async def get_photo(self, table: str, entity_id: int, byte_range: str = None, if_range: str = None, if_none_match: str = None, if_modified_since: str = None, variant: ImageVariant = None):
+        """Returns a streaming S3 object with the photo of a row"""
+        return await self.get_file(table, entity_id, 'photo_path', 'photos', byte_range, if_range, if_none_match, if_modified_since, variant)
+    
+    async def get_photo_url(self, table: str, entity_id: int):
+        """Returns a presigned URL for the photo of a row"""
+        return await self.get_file_url(table, entity_id, 'photo_path', 'photos')
+    
+    async def get_photos(self, ids_by_table: Dict[str, List[int]], variant: ImageVariant = None):
+        """Returns presigned URLs for the photos of many rows
+
+        Clients download the files straight from S3, so the response stays
+        small whatever the photo sizes. Missing variants are generated first,
+        a few at a time.
+
+        :param ids_by_table: e.g. {'athlete': [1, 2], 'coach': [3]}
+        :return: {table: {id: {"content_type", "url"} or None}}
+        """
+        tables = list(ids_by_table)
+        lookups = await asyncio.gather(*(self.supabase_integration.get_media_paths(table, ids_by_table[table]) for table in tables))
+        paths = dict(zip(tables, lookups))
+
+        semaphore = asyncio.Semaphore(Env.MEDIA_BATCH_CONCURRENCY)
+
+        async def resolve(path):
+            if not path:
+                return None
+            key, content_type = path, media_type(path)
+            if variant:
+                async with semaphore:
+                    key = await ensure_variant(self.s3, 'photos', path, variant)
+                if not key:
+                    return None
+                content_type = variant.content_type
+            url = self.s3.get_cached_file_url(
+                'photos',
+                key,
+                Env.MEDIA_PRESIGNED_URL_EXPIRATION,
+                Env.MEDIA_PRESIGNED_URL_REFRESH_MARGIN,
+                Env.MEDIA_PRESIGNED_URL_CACHE_SIZE
+            )
+            return {"content_type": content_type, "url": url} if url else None
+
+        items = [(table, entity_id, path) for table, table_paths in paths.items() for entity_id, path in table_paths.items()]
+        photos = await asyncio.gather(*(resolve(path) for _, _, path in items))
+
+        result = {table: {} for table in ids_by_table}
+        for (table, entity_id, _), photo in zip(items, photos):
+            result[table][entity_id] = photo
+        return result
+    
+    async def create_upload(self, payload: UploadRequest):
+        """Returns presigned URLs that let the client upload a file straight to S3
+
+        Large videos get a multipart upload with one presigned URL per part so
+        the parts can be sent in parallel; everything else is a single POST
+        whose signed policy caps the size at the declared one. Returns False
+        if the row does not exist and None if S3 could not start the upload.
+        """
+        _, bucket = MEDIA_KINDS[payload.kind]
+        if not await self.supabase_integration.exists(payload.entity, payload.entity_id):
+            return False
+        extension = os.path.splitext(payload.filename)[1].lower()
+        # A fresh key per upload keeps old URLs (and cached ?v= variants) valid
+        key = f"{payload.entity}/{payload.entity_id}/{uuid.uuid4().hex}{extension}"
+
+        if payload.kind == 'video' and payload.size > Env.MULTIPART_THRESHOLD:
+            part_size = max(Env.MULTIPART_PART_SIZE, math.ceil(payload.size / 10000))
+            part_count = math.ceil(payload.size / part_size)
+            upload_id, urls = await self.s3.create_multipart_upload(
+                bucket, key, payload.content_type, part_count, Env.UPLOAD_URL_EXPIRATION
+            )
+            if not upload_id:
+                return None
+            return {
+                "key": key,
+                "method": "multipart",
+                "upload_id": upload_id,
+                "part_size": part_size,
+                "parts": [{"part_number": number, "url": url} for number, url in enumerate(urls, start=1)]
+            }
+
+        form = self.s3.get_upload_form(bucket, key, payload.content_type, payload.size, Env.UPLOAD_URL_EXPIRATION)
+        if not form:
+            return None
+        return {
+            "key": key,
+            "method": "POST",
+            "url": form['url'],
+            "fields": form['fields']
+        }
+    
+    async def complete_upload(self, payload: UploadComplete):
+        """Finishes an upload and records its key on the row, returning the updated row or None
+
+        Presigned part URLs do not bound the size of a multipart upload, so
+        the assembled object is checked and deleted if it is too large.
+        """
+        column, bucket = MEDIA_KINDS[payload.kind]
+        if payload.upload_id:
+            parts = [(part.part_number, part.etag) for part in payload.parts or []]
+            if not await self.s3.complete_multipart_upload(bucket, payload.key, payload.upload_id, parts):
+                return None
+        info = await self.s3.get_file_info(bucket, payload.key)
+        if info is None:
+            return None
+        size = info['ContentLength']
+        max_size = max_upload_size(payload.kind)
+        if size > max_size:
+            await self.s3.delete_file(bucket, payload.key)
+            raise ObjectTooLargeError(size, max_size)
+        forget_source_etag(bucket, payload.key)
+        return await self.supabase_integration.set_media_path(payload.entity, payload.entity_id, column, payload.key)
+    
+    async def abort_upload(self, payload: UploadAbort):
+        """Cancels a multipart upload, or returns False if the row does not exist"""
+        _, bucket = MEDIA_KINDS[payload.kind]
+        if not await self.supabase_integration.exists(payload.entity, payload.entity_id):
+            return False
+        return await self.s3.abort_multipart_upload(bucket, payload.key, payload.upload_id)
@@ -1,54 +1,220 @@
+import asyncio
+from contextlib import AsyncExitStack
 from integrations.supabase_integration import SupabaseIntegration
+from postgrest.exceptions import APIError
+from typing import List
+from utils.pagination import ListParams
+from utils.bulk import split_duplicates, fill_results, update_results, delete_results
+from utils.intervals import EXCLUSION_VIOLATION, IntervalIndex, ScheduleConflictError, ScheduleIndex, to_minutes
 from models.routine_models import *
 
 class RoutineController:
-    def __init__(self):
-        self.supabase_integration = SupabaseIntegration()
+    def __init__(self, supabase_integration: SupabaseIntegration, schedule_index: ScheduleIndex):
+        self.supabase_integration = supabase_integration
+        self.schedule_index = schedule_index
     
-    def get_all_routines(self):
+    async def _get_athlete_id(self, routine_id: int):
+        """Returns the athlete that owns a routine, or None if the routine does not exist"""
+        routine = await self.supabase_integration.get_routine_by_id(routine_id)
+        return routine.data[0]['id_athlete'] if routine.data else None
+
+    async def _check_slots(self, payload, indexes, athlete_ids, results, moved=()):
+        """Marks the items overlapping the athletes' schedules or each other as 409; returns the indexes of the others
+
+        moved holds the IDs of slots being rewritten by the batch, whose
+        current position must not count as a conflict.
+        """
+        for athlete_id in athlete_ids:
+            await self.schedule_index.ensure_loaded(self.supabase_integration, athlete_id)
+        # Items of the batch must not overlap each other either
+        pending = {}
+        accepted = []
+        for index, athlete_id in zip(indexes, athlete_ids):
+            item = payload[index]
+            start, end = to_minutes(item.start_hour), to_minutes(item.end_hour)
+            batch_index = pending.setdefault((athlete_id, item.days_of_week), IntervalIndex())
+            conflicts = [
+                slot_id for slot_id in self.schedule_index.overlapping(athlete_id, item.days_of_week, item.start_hour, item.end_hour)
+                if slot_id not in moved
+            ]
+            batch_conflicts = batch_index.overlapping(start, end)
+            if conflicts or batch_conflicts:
+                results[index] = {
+                    "index": index,
+                    "status": 409,
+                    "detail": str(ScheduleConflictError(conflicts)) if conflicts else f"Overlaps item {batch_conflicts[0]}"
+                }
+                continue
+            batch_index.add(start, end, index)
+            accepted.append(index)
+        return accepted
+    
+    async def get_all_routines(self, params: ListParams = None):
         """Returns all routines"""
-        return self.supabase_integration.get_all_routines()
+        return await self.supabase_integration.get_all_routines(params)
     
-    def get_routine_by_id(self, routine_id: int):
+    async def get_routine_by_id(self, routine_id: int):
         """Returns a routine by ID"""
-        return self.supabase_integration.get_routine_by_id(routine_id)
+        return await self.supabase_integration.get_routine_by_id(routine_id)
     
-    def get_routines_by_athlete(self, athlete_id: int):
+    async def get_routines_by_athlete(self, athlete_id: int, params: ListParams = None):
         """Returns all routines of an athlete"""
-        return self.supabase_integration.get_routines_by_athlete_id(athlete_id)
+        return await self.supabase_integration.get_routines_by_athlete_id(athlete_id, params)
     
-    def get_exercises_by_routine(self, routine_id: int):
+    async def get_exercises_by_routine(self, routine_id: int, params: ListParams = None):
         """Returns all exercises in a routine with their schedule"""
-        return self.supabase_integration.get_exercises_by_routine_id(routine_id)
+        return await self.supabase_integration.get_exercises_by_routine_id(routine_id, params)
     
-    def create_routine(self, payload: RoutineCreate):
+    async def create_routine(self, payload: RoutineCreate):
         """Creates a new routine"""
-        return self.supabase_integration.create_routine(payload)
+        return await self.supabase_integration.create_routine(payload)
     
-    def update_routine(self, routine_id: int, payload: RoutineUpdate):
+    async def update_routine(self, routine_id: int, payload: RoutineUpdate):
         """Updates a routine"""
-        return self.supabase_integration.update_routine(routine_id, payload)
+        return await self.supabase_integration.update_routine(routine_id, payload)
     
-    def delete_routine(self, routine_id: int):
-        """Deletes a routine"""
-        return self.supabase_integration.delete_routine(routine_id)
+    async def delete_routine(self, routine_id: int, deleted_by: str = None):
+        """Soft-deletes a routine with its exercises"""
+        result = await self.supabase_integration.delete_routine(routine_id, deleted_by)
+        for routine in result.data:
+            self.schedule_index.invalidate(routine['id_athlete'])
+        return result
     
-    def add_exercise_to_routine(self, payload: RoutineHasExerciseCreate):
-        """Adds an exercise to a routine"""
-        return self.supabase_integration.add_exercise_to_routine(payload)
+    async def add_exercise_to_routine(self, payload: RoutineHasExerciseCreate):
+        """Adds an exercise to a routine, refusing slots that overlap the athlete's schedule"""
+        athlete_id = await self._get_athlete_id(payload.id_routine)
+        if athlete_id is None:
+            return await self.supabase_integration.add_exercise_to_routine(payload)
+
+        async with self.schedule_index.lock(athlete_id):
+            await self.schedule_index.ensure_loaded(self.supabase_integration, athlete_id)
+            conflicts = self.schedule_index.overlapping(athlete_id, payload.days_of_week, payload.start_hour, payload.end_hour)
+            if conflicts:
+                raise ScheduleConflictError(conflicts)
+            try:
+                result = await self.supabase_integration.add_exercise_to_routine(payload)
+            except APIError as e:
+                # Another worker wrote an overlapping slot since the index was loaded
+                if e.code != EXCLUSION_VIOLATION:
+                    raise
+                self.schedule_index.invalidate(athlete_id)
+                raise ScheduleConflictError.from_api_error(e)
+            for row in result.data:
+                self.schedule_index.add(athlete_id, row)
+            return result
     
-    def remove_exercise_from_routine(self, routine_exercise_id: int):
+    async def remove_exercise_from_routine(self, routine_exercise_id: int, deleted_by: str = None):
         """Removes an exercise from a routine"""
-        return self.supabase_integration.remove_exercise_from_routine(routine_exercise_id)
+        result = await self.supabase_integration.remove_exercise_from_routine(routine_exercise_id, deleted_by)
+        self.schedule_index.remove(routine_exercise_id)
+        return result
+    
+    async def add_exercises_to_routine(self, payload: List[RoutineHasExerciseCreate]):
+        """Adds several exercises to a routine at once, skipping repeated and overlapping slots"""
+        indexes, results = split_duplicates(
+            payload,
+            lambda item: (item.id_routine, item.id_exercise, item.days_of_week, item.start_hour)
+        )
+        if not indexes:
+            return results
+
+        athlete_id = await self._get_athlete_id(payload[indexes[0]].id_routine)
+        if athlete_id is None:
+            result = await self.supabase_integration.add_exercises_to_routine([payload[index] for index in indexes])
+            return fill_results(results, indexes, result.data, 201)
+
+        async with self.schedule_index.lock(athlete_id):
+            for attempt in range(2):
+                accepted = await self._check_slots(payload, indexes, [athlete_id] * len(indexes), results)
+                if not accepted:
+                    break
+                try:
+                    result = await self.supabase_integration.add_exercises_to_routine([payload[index] for index in accepted])
+                except APIError as e:
+                    # Another worker wrote an overlapping slot: reload the schedule and check again once
+                    if e.code != EXCLUSION_VIOLATION:
+                        raise
+                    self.schedule_index.invalidate(athlete_id)
+                    if attempt:
+                        raise ScheduleConflictError.from_api_error(e)
+                    continue
+                fill_results(results, accepted, result.data, 201)
+                for row in result.data:
+                    self.schedule_index.add(athlete_id, row)
+                break
+        return results
     
-    def add_excluded_date(self, payload: ExcludedDateCreate):
+    async def update_routine_exercises(self, payload: List[RoutineHasExerciseUpdate]):
+        """Updates several routine exercises at once, skipping repeated IDs and overlapping slots"""
+        indexes, results = split_duplicates(payload, lambda item: item.id)
+        if not indexes:
+            return results
+
+        routine_ids = list(dict.fromkeys(payload[index].id_routine for index in indexes))
+        owners = dict(zip(routine_ids, await asyncio.gather(*(self._get_athlete_id(routine_id) for routine_id in routine_ids))))
+        for index in indexes:
+            if owners[payload[index].id_routine] is None:
+                results[index] = {"index": index, "status": 404, "detail": "Routine not found"}
+        indexes = [index for index in indexes if owners[payload[index].id_routine] is not None]
+        if not indexes:
+            return results
+
+        athlete_ids = [owners[payload[index].id_routine] for index in indexes]
+        moved = {payload[index].id for index in indexes}
+        async with AsyncExitStack() as stack:
+            # Locks are taken in a fixed order so concurrent batches cannot deadlock
+            for athlete_id in sorted(set(athlete_ids)):
+                await stack.enter_async_context(self.schedule_index.lock(athlete_id))
+            for attempt in range(2):
+                accepted = await self._check_slots(payload, indexes, athlete_ids, results, moved)
+                if not accepted:
+                    break
+                try:
+                    result = await self.supabase_integration.update_routine_exercises([payload[index] for index in accepted])
+                except APIError as e:
+                    if e.code != EXCLUSION_VIOLATION:
+                        raise
+                    for athlete_id in set(athlete_ids):
+                        self.schedule_index.invalidate(athlete_id)
+                    if attempt:
+                        raise ScheduleConflictError.from_api_error(e)
+                    continue
+                update_results(results, accepted, [payload[index].id for index in accepted], result.data)
+                for row in result.data:
+                    self.schedule_index.replace(row, owners[row['id_routine']])
+                break
+        return results
+    
+    async def remove_exercises_from_routine(self, routine_exercise_ids: List[int], deleted_by: str = None):
+        """Removes several exercises from routines at once"""
+        routine_exercise_ids = list(dict.fromkeys(routine_exercise_ids))
+        result = await self.supabase_integration.remove_exercises_from_routine(routine_exercise_ids, deleted_by)
+        for row in result.data:
+            self.schedule_index.remove(row['id'])
+        return delete_results(routine_exercise_ids, result.data)
+    
+    async def add_excluded_date(self, payload: ExcludedDateCreate):
         """Adds an excluded date to a routine exercise"""
-        return self.supabase_integration.add_excluded_date(payload)
+        return await self.supabase_integration.add_excluded_date(payload)
     
-    def get_excluded_dates(self, routine_exercise_id: int):
+    async def get_excluded_dates(self, routine_exercise_id: int, params: ListParams = None):
         """Returns all excluded dates for a routine exercise"""
-        return self.supabase_integration.get_excluded_dates(routine_exercise_id)
+        return await self.supabase_integration.get_excluded_dates(routine_exercise_id, params)
     
-    def delete_excluded_date(self, excluded_date_id: int):
+    async def delete_excluded_date(self, excluded_date_id: int):
         """Deletes an excluded date"""
-        return self.supabase_integration.delete_excluded_date(excluded_date_id)
+        return await self.supabase_integration.delete_excluded_date(excluded_date_id)
+    
+    async def add_excluded_dates(self, payload: List[ExcludedDateCreate]):
+        """Adds several excluded dates at once, skipping repeated dates"""
+        indexes, results = split_duplicates(payload, lambda item: (item.id_routine_has_exercise, item.excluded_date))
+        if indexes:
+            result = await self.supabase_integration.add_excluded_dates([payload[index] for index in indexes])
+            fill_results(results, indexes, result.data, 201)
+        return results
+    
+    async def delete_excluded_dates(self, excluded_date_ids: List[int]):
+        """Deletes several excluded dates at once"""
+        excluded_date_ids = list(dict.fromkeys(excluded_date_ids))
+        result = await self.supabase_integration.delete_excluded_dates(excluded_date_ids)
+        return delete_results(excluded_date_ids, result.data)
\ No newline at end of file
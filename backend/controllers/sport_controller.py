@@ -1,51 +1,38 @@
 from integrations.supabase_integration import SupabaseIntegration
-from utils.s3 import S3Client
+from utils.pagination import ListParams
+from controllers.media_controller import MediaController
+from utils.thumbnails import ImageVariant
 from models.sport_models import *
 
 class SportController:
-    def __init__(self):
-        self.supabase_integration = SupabaseIntegration()
-        self.s3 = S3Client()
+    def __init__(self, supabase_integration: SupabaseIntegration):
+        self.supabase_integration = supabase_integration
+        self.media = MediaController(supabase_integration)
     
-    def get_all_sports(self):
+    async def get_all_sports(self, params: ListParams = None):
         """Returns all sports"""
-        return self.supabase_integration.get_all_sports()
+        return await self.supabase_integration.get_all_sports(params)
     
-    def get_sport_by_id(self, sport_id: int):
+    async def get_sport_by_id(self, sport_id: int):
         """Returns a sport by ID"""
-        return self.supabase_integration.get_sport_by_id(sport_id)
+        return await self.supabase_integration.get_sport_by_id(sport_id)
     
-    def get_sport_photo(self, sport_id: int):
-        """Returns the photo bytes of a sport by ID"""
-        photo_path = self.supabase_integration.get_sport_photo_path_by_id(sport_id)
-        if not photo_path:
-            return None, None
+    async def get_sport_photo(self, sport_id: int, byte_range: str = None, if_range: str = None, if_none_match: str = None, if_modified_since: str = None, variant: ImageVariant = None):
+        """Returns a streaming S3 object with the photo of a sport by ID"""
+        return await self.media.get_photo('sport', sport_id, byte_range, if_range, if_none_match, if_modified_since, variant)
     
-        # Return bytes of the image
-        file_bytes = self.s3.get_file('photos', photo_path)
-        
-        # Determine content type based on extension
-        if photo_path.lower().endswith('.png'):
-            content_type = 'image/png'
-        elif photo_path.lower().endswith(('.jpg', '.jpeg')):
-            content_type = 'image/jpeg'
-        elif photo_path.lower().endswith('.gif'):
-            content_type = 'image/gif'
-        elif photo_path.lower().endswith('.webp'):
-            content_type = 'image/webp'
-        else:
-            content_type = 'application/octet-stream'
-        
-        return file_bytes, content_type
+    async def get_sport_photo_url(self, sport_id: int):
+        """Returns a presigned URL for the photo of a sport by ID"""
+        return await self.media.get_photo_url('sport', sport_id)
     
-    def create_sport(self, payload: SportCreate):
+    async def create_sport(self, payload: SportCreate):
         """Creates a new sport"""
-        return self.supabase_integration.create_sport(payload)
+        return await self.supabase_integration.create_sport(payload)
     
-    def update_sport(self, sport_id: int, payload: SportUpdate):
+    async def update_sport(self, sport_id: int, payload: SportUpdate):
         """Updates a sport"""
-        return self.supabase_integration.update_sport(sport_id, payload)
+        return await self.supabase_integration.update_sport(sport_id, payload)
     
-    def delete_sport(self, sport_id: int):
-        """Deletes a sport"""
-        return self.supabase_integration.delete_sport(sport_id)
\ No newline at end of file
+    async def delete_sport(self, sport_id: int, deleted_by: str = None):
+        """Soft-deletes a sport"""
+        return await self.supabase_integration.delete_sport(sport_id, deleted_by)
\ No newline at end of file
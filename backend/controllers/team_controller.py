@@ -1,59 +1,69 @@
 from integrations.supabase_integration import SupabaseIntegration
-from utils.s3 import S3Client
+from utils.pagination import ListParams
+from utils.intervals import minute_mask, free_windows, to_minutes, to_hour
+from controllers.media_controller import MediaController
+from utils.thumbnails import ImageVariant
 from models.team_models import *
 
 class TeamController:
-    def __init__(self):
-        self.supabase_integration = SupabaseIntegration()
-        self.s3 = S3Client()
+    def __init__(self, supabase_integration: SupabaseIntegration):
+        self.supabase_integration = supabase_integration
+        self.media = MediaController(supabase_integration)
     
-    def get_all_teams(self):
+    async def get_all_teams(self, params: ListParams = None):
         """Returns all teams"""
-        return self.supabase_integration.get_all_teams()
+        return await self.supabase_integration.get_all_teams(params)
     
-    def get_team_by_id(self, team_id: int):
+    async def get_team_by_id(self, team_id: int):
         """Returns a team by ID"""
-        return self.supabase_integration.get_team_by_id(team_id)
+        return await self.supabase_integration.get_team_by_id(team_id)
     
-    def get_teams_by_coach(self, coach_id: int):
+    async def get_teams_by_coach(self, coach_id: int, params: ListParams = None):
         """Returns all teams of a coach"""
-        return self.supabase_integration.get_teams_by_coach_id(coach_id)
-    
-    def get_team_photo(self, team_id: int):
-        """Returns the photo bytes of a team by ID"""
-        photo_path = self.supabase_integration.get_team_photo_path_by_id(team_id)
-        if not photo_path:
-            return None, None
-    
-        # Return bytes of the image
-        file_bytes = self.s3.get_file('photos', photo_path)
-        
-        # Determine content type based on extension
-        if photo_path.lower().endswith('.png'):
-            content_type = 'image/png'
-        elif photo_path.lower().endswith(('.jpg', '.jpeg')):
-            content_type = 'image/jpeg'
-        elif photo_path.lower().endswith('.gif'):
-            content_type = 'image/gif'
-        elif photo_path.lower().endswith('.webp'):
-            content_type = 'image/webp'
-        else:
-            content_type = 'application/octet-stream'
-        
-        return file_bytes, content_type
-    
-    def create_team(self, payload: TeamCreate):
+        return await self.supabase_integration.get_teams_by_coach_id(coach_id, params)
+    
+    async def get_team_photo(self, team_id: int, byte_range: str = None, if_range: str = None, if_none_match: str = None, if_modified_since: str = None, variant: ImageVariant = None):
+        """Returns a streaming S3 object with the photo of a team by ID"""
+        return await self.media.get_photo('team', team_id, byte_range, if_range, if_none_match, if_modified_since, variant)
+    
+    async def get_team_photo_url(self, team_id: int):
+        """Returns a presigned URL for the photo of a team by ID"""
+        return await self.media.get_photo_url('team', team_id)
+    
+    async def create_team(self, payload: TeamCreate):
         """Creates a new team"""
-        return self.supabase_integration.create_team(payload)
+        return await self.supabase_integration.create_team(payload)
     
-    def update_team(self, team_id: int, payload: TeamUpdate):
+    async def update_team(self, team_id: int, payload: TeamUpdate):
         """Updates a team"""
-        return self.supabase_integration.update_team(team_id, payload)
+        return await self.supabase_integration.update_team(team_id, payload)
     
-    def delete_team(self, team_id: int):
-        """Deletes a team"""
-        return self.supabase_integration.delete_team(team_id)
+    async def delete_team(self, team_id: int, deleted_by: str = None):
+        """Soft-deletes a team with its enrollments"""
+        return await self.supabase_integration.delete_team(team_id, deleted_by)
     
-    def get_athletes_by_team_id(self, team_id: int):
+    async def get_athletes_by_team_id(self, team_id: int, params: ListParams = None):
         """Returns all athletes enrolled in a team"""
-        return self.supabase_integration.get_athletes_by_team_id(team_id)
+        return await self.supabase_integration.get_athletes_by_team_id(team_id, params)
+    
+    async def get_team_free_slots(self, team_id: int, day: str, duration: int, start_hour: str, end_hour: str):
+        """Returns the windows of a weekday in which no athlete of a team has a routine exercise"""
+        enrollments = await self.supabase_integration.get_athlete_ids_by_team_id(team_id)
+        athlete_ids = list({enrollment['id_athlete'] for enrollment in enrollments.data})
+
+        busy = 0
+        if athlete_ids:
+            slots = await self.supabase_integration.get_routine_exercises_by_athlete_ids(athlete_ids, day)
+            for slot in slots.data:
+                busy |= minute_mask(to_minutes(slot['start_hour']), to_minutes(slot['end_hour']))
+
+        return {
+            "team_id": team_id,
+            "day": day,
+            "duration": duration,
+            "athletes": len(athlete_ids),
+            "free_slots": [
+                {"start_hour": to_hour(start), "end_hour": to_hour(end), "minutes": end - start}
+                for start, end in free_windows(busy, to_minutes(start_hour), to_minutes(end_hour), duration)
+            ]
+        }
@@ -1,13 +1,14 @@
 from integrations.supabase_integration import SupabaseIntegration
+from utils.pagination import ListParams
 
 class TypeExerciseController:
-    def __init__(self):
-        self.supabase_integration = SupabaseIntegration()
+    def __init__(self, supabase_integration: SupabaseIntegration):
+        self.supabase_integration = supabase_integration
     
-    def get_all_type_exercises(self):
+    async def get_all_type_exercises(self, params: ListParams = None):
         """Returns all exercise types"""
-        return self.supabase_integration.get_all_type_exercises()
+        return await self.supabase_integration.get_all_type_exercises(params)
     
-    def get_type_exercise_by_id(self, type_id: int):
+    async def get_type_exercise_by_id(self, type_id: int):
         """Returns an exercise type by ID"""
-        return self.supabase_integration.get_type_exercise_by_id(type_id)
+        return await self.supabase_integration.get_type_exercise_by_id(type_id)
@@ -0,0 +1,909 @@
+import json
+import logging
+import time
+from fastapi import HTTPException
+from postgrest import APIResponse
+from postgrest.exceptions import APIError
+from typing import List
+from configs.env import Env
+from utils.cache import TTLCache, cached, create_cache_backend, invalidates
+from utils.metrics import record
+from utils.single_flight import SingleFlight, coalesced
+from utils.soft_delete import cascade_tables
+from utils.pagination import FIELD_PATTERN, ListParams, Page, encode_cursor, select_columns
+from utils.projection import projection
+from models.athlete_models import *
+from models.coach_models import *
+from models.enrollment_models import *
+from models.exercise_models import *
+from models.sport_models import *
+from models.team_models import *
+from models.routine_models import *
+
+logger = logging.getLogger(__name__)
+
+# Tables without deleted_at, whose deletes stay hard
+HARD_DELETE_TABLES = ('routine_exercise_excluded_dates',)
+
+# (table, embedded relation) -> (foreign key, whether the relation holds many rows)
+RELATIONS = {
+    ('enrollment', 'team'): ('id_team', False),
+    ('enrollment', 'athlete'): ('id_athlete', False),
+    ('team', 'coach'): ('id_coach', False),
+    ('team', 'sport'): ('id_sport', False),
+    ('team', 'enrollment'): ('id_team', True),
+    ('routine', 'routine_has_exercice'): ('id_routine', True),
+    ('routine_has_exercice', 'routine'): ('id_routine', False),
+    ('routine_has_exercice', 'exercise'): ('id_exercise', False),
+    ('routine_has_exercice', 'routine_exercise_excluded_dates'): ('id_routine_has_exercise', True),
+}
+
+OPERATORS = {'eq': '=', 'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}
+
+def _ident(name):
+    if not FIELD_PATTERN.match(name):
+        raise ValueError(f"Invalid identifier: {name}")
+    return f'"{name}"'
+
+def parse_select(select):
+    """Parses a PostgREST select string into columns and (relation, items) embeds"""
+    items = []
+    depth = 0
+    start = 0
+    for index, char in enumerate(select + ','):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            item = select[start:index].strip()
+            start = index + 1
+            if not item:
+                continue
+            if '(' in item:
+                name = item[:item.index('(')].split('!')[0].strip()
+                items.append((name, parse_select(item[item.index('(') + 1:item.rindex(')')])))
+            else:
+                items.append(item)
+    return items
+
+class Statement:
+    """SQL text under construction with its positional arguments
+
+    Every value is sent as text and cast to the type of the column it is
+    compared with, so asyncpg never has to guess (and PostgREST-style string
+    dates and times work unchanged).
+    """
+    def __init__(self, column_types):
+        self.column_types = column_types
+        self.args = []
+        self.aliases = 0
+
+    def alias(self):
+        self.aliases += 1
+        return f"t{self.aliases}"
+
+    def value(self, table, column, value):
+        column_type = self.column_types[(table, column)]
+        if isinstance(value, (list, tuple)):
+            self.args.append([None if item is None else str(item) for item in value])
+            return f"${len(self.args)}::text[]::{column_type}[]"
+        self.args.append(str(value))
+        return f"${len(self.args)}::text::{column_type}"
+
+    def json(self, value):
+        self.args.append(value)
+        return f"${len(self.args)}::json"
+
+    def select_list(self, table, alias, items, embed_filters, path=''):
+        parts = []
+        for item in items:
+            if isinstance(item, str):
+                parts.append(f"{alias}.*" if item == '*' else f"{alias}.{_ident(item)}")
+                continue
+            name, children = item
+            foreign_key, to_many = RELATIONS[(table, name)]
+            child = self.alias()
+            columns = self.select_list(name, child, children, embed_filters, f"{path}{name}.")
+            if to_many:
+                conditions = [f"{child}.{_ident(foreign_key)} = {alias}.id"]
+                conditions += self.conditions(name, child, embed_filters.get(path + name, ()))
+                parts.append(
+                    f"(SELECT coalesce(json_agg(x), '[]'::json) FROM (SELECT {columns} FROM {_ident(name)} {child} "
+                    f"WHERE {' AND '.join(conditions)}) x) AS {_ident(name)}"
+                )
+            else:
+                # Like PostgREST, a filtered-out to-one embed is null
+                conditions = [f"{child}.id = {alias}.{_ident(foreign_key)}"]
+                conditions += self.conditions(name, child, embed_filters.get(path + name, ()))
+                parts.append(
+                    f"(SELECT row_to_json(x) FROM (SELECT {columns} FROM {_ident(name)} {child} "
+                    f"WHERE {' AND '.join(conditions)}) x) AS {_ident(name)}"
+                )
+        return ', '.join(parts)
+
+    def conditions(self, table, alias, filters):
+        """Returns SQL conditions for (column, operator, value) filters; 'relation.column' filters rows by a to-one relation"""
+        conditions = []
+        for column, operator, value in filters:
+            if '.' in column:
+                relation, relation_column = column.split('.', 1)
+                foreign_key, _ = RELATIONS[(table, relation)]
+                child = self.alias()
+                inner = self.conditions(relation, child, [(relation_column, operator, value)])
+                conditions.append(
+                    f"EXISTS (SELECT 1 FROM {_ident(relation)} {child} WHERE {child}.id = {alias}.{_ident(foreign_key)} AND {inner[0]})"
+                )
+            elif operator == 'is':
+                conditions.append(f"{alias}.{_ident(column)} IS NULL")
+            elif operator == 'in':
+                conditions.append(f"{alias}.{_ident(column)} = ANY({self.value(table, column, value)})")
+            else:
+                conditions.append(f"{alias}.{_ident(column)} {OPERATORS[operator]} {self.value(table, column, value)}")
+        return conditions
+
+def _aggregate(sql):
+    return f"SELECT coalesce(json_agg(r), '[]'::json) FROM ({sql}) r"
+
+def _returning(sql):
+    # Data-modifying statements must stay at the top level of a WITH
+    return f"WITH r AS ({sql} RETURNING t0.*) SELECT coalesce(json_agg(r), '[]'::json) FROM r"
+
+async def _init_connection(connection):
+    await connection.set_type_codec('json', encoder=json.dumps, decoder=json.loads, schema='pg_catalog')
+
+class PostgresIntegration:
+    """SupabaseIntegration over a direct asyncpg pool instead of PostgREST
+
+    Queries are built from the same select strings (utils.projection) and
+    return the same JSON shapes: Postgres aggregates the rows with json_agg,
+    so each call is one round trip with one prepared statement, cached per
+    connection by asyncpg. Errors are raised as postgrest APIError with the
+    SQLSTATE as code, like PostgREST reports them.
+    """
+    def __init__(self, pool, column_types):
+        self.pool = pool
+        self.column_types = column_types
+        # Cached reads, tagged so writes can invalidate them (see utils.cache)
+        self.read_cache = create_cache_backend()
+        # Entity -> S3 key lookups done before every photo/video download
+        self.media_key_cache = TTLCache(Env.MEDIA_KEY_CACHE_SIZE, Env.MEDIA_KEY_CACHE_TTL)
+        # Identical reads in flight at the same time share one query
+        self.single_flight = SingleFlight() if Env.SUPABASE_SINGLE_FLIGHT else None
+
+    @classmethod
+    async def connect(cls):
+        """Creates the process-wide connection pool and loads the column types of the public schema"""
+        import asyncpg
+
+        pool = await asyncpg.create_pool(
+            Env.DATABASE_URL,
+            min_size=Env.DATABASE_POOL_MIN_SIZE,
+            max_size=Env.DATABASE_POOL_SIZE,
+            statement_cache_size=Env.DATABASE_STATEMENT_CACHE_SIZE,
+            command_timeout=Env.SUPABASE_READ_TIMEOUT,
+            init=_init_connection
+        )
+        try:
+            rows = await pool.fetch(
+                "SELECT table_name, column_name, format_type(atttypid, atttypmod) AS column_type "
+                "FROM information_schema.columns JOIN pg_attribute ON attrelid = format('%I.%I', table_schema, table_name)::regclass "
+                "AND attname = column_name WHERE table_schema = 'public'"
+            )
+        except Exception:
+            await pool.close()
+            logger.exception("Error connecting to Postgres")
+            raise
+        return cls(pool, {(row['table_name'], row['column_name']): row['column_type'] for row in rows})
+
+    async def close(self):
+        """Closes the connection pool and the read cache"""
+        await self.read_cache.close()
+        await self.pool.close()
+
+    def get_client(self):
+        return self.pool
+
+    async def _fetch(self, statement: Statement, sql):
+        import asyncpg
+
+        start = time.perf_counter()
+        try:
+            rows = await self.pool.fetchval(sql, *statement.args)
+        except asyncpg.PostgresError as e:
+            raise APIError({'message': e.message, 'code': e.sqlstate, 'details': e.detail, 'hint': e.hint})
+        finally:
+            record('db', time.perf_counter() - start)
+        return rows
+
+    async def _select(self, table, select, filters=(), order=(), limit=None, embed_filters=None, live=True, statement=None, extra=()):
+        statement = statement or Statement(self.column_types)
+        columns = statement.select_list(table, 't0', parse_select(select), embed_filters or {})
+        conditions = (["t0.deleted_at IS NULL"] if live and table not in HARD_DELETE_TABLES else [])
+        conditions += statement.conditions(table, 't0', filters) + list(extra)
+        sql = f"SELECT {columns} FROM {_ident(table)} t0"
+        if conditions:
+            sql += f" WHERE {' AND '.join(conditions)}"
+        if order:
+            sql += f" ORDER BY {', '.join(f't0.{_ident(column)}' for column in order)}"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+        return await self._fetch(statement, _aggregate(sql))
+
+    async def _query(self, table, select, filters=(), order=(), **kwargs):
+        return APIResponse(data=await self._select(table, select, filters, order, **kwargs), count=None)
+
+    async def _page(self, table, select, filters=(), params: ListParams = None, sort=None):
+        """Same keyset pagination as utils.pagination.paginate"""
+        order = (sort, 'id') if sort else ('id',)
+        if params is None or not params.paginated:
+            return Page(await self._select(table, select, filters, order))
+
+        statement = Statement(self.column_types)
+        extra = []
+        if params.cursor_values:
+            if sort:
+                if len(params.cursor_values) != 2:
+                    raise HTTPException(status_code=400, detail="Invalid cursor")
+                value, last_id = params.cursor_values
+                extra.append(
+                    f"(t0.{_ident(sort)}, t0.id) > ({statement.value(table, sort, value)}, {statement.value(table, 'id', last_id)})"
+                )
+            else:
+                extra.append(f"t0.id > {statement.value(table, 'id', params.cursor_values[-1])}")
+        # Fetch one extra row to know whether there is a next page
+        rows = await self._select(table, select, filters, order, params.limit + 1, statement=statement, extra=extra)
+        next_cursor = None
+        if len(rows) > params.limit:
+            rows = rows[:params.limit]
+            last = rows[-1]
+            next_cursor = encode_cursor([last[sort], last['id']] if sort else [last['id']])
+        return Page(rows, next_cursor, paginated=True)
+
+    async def _write(self, statement: Statement, sql):
+        return APIResponse(data=await self._fetch(statement, _returning(sql)), count=None)
+
+    async def _insert(self, table, rows):
+        if isinstance(rows, dict):
+            rows = [rows]
+        statement = Statement(self.column_types)
+        columns = ', '.join(_ident(column) for column in rows[0])
+        return await self._write(statement, (
+            f"INSERT INTO {_ident(table)} AS t0 ({columns}) SELECT {columns} "
+            f"FROM json_populate_recordset(NULL::{_ident(table)}, {statement.json(rows)})"
+        ))
+
+    async def _rpc(self, function, items):
+        """Calls a set-returning SQL function taking the items as JSON, like client.rpc(function, {'items': items})"""
+        statement = Statement(self.column_types)
+        return APIResponse(data=await self._fetch(statement, _aggregate(f"SELECT * FROM {_ident(function)}({statement.json(items)})")), count=None)
+
+    async def _update(self, table, data, filters, live=True):
+        statement = Statement(self.column_types)
+        assignments = ', '.join(f"{_ident(column)} = j.{_ident(column)}" for column in data)
+        source = f"json_populate_record(NULL::{_ident(table)}, {statement.json(data)}) j"
+        conditions = (["t0.deleted_at IS NULL"] if live and table not in HARD_DELETE_TABLES else [])
+        conditions += statement.conditions(table, 't0', filters)
+        return await self._write(statement, (
+            f"UPDATE {_ident(table)} t0 SET {assignments} FROM {source} WHERE {' AND '.join(conditions)}"
+        ))
+
+    async def _delete(self, table, filters):
+        statement = Statement(self.column_types)
+        conditions = statement.conditions(table, 't0', filters)
+        return await self._write(statement, (
+            f"DELETE FROM {_ident(table)} t0 WHERE {' AND '.join(conditions)}"
+        ))
+
+    @coalesced
+    async def get_media_path(self, table: str, entity_id: int, column: str = 'photo_path'):
+        """Returns the S3 key stored in a photo/video column of a row, or None"""
+        key = (table, column, entity_id)
+        hit, path = self.media_key_cache.get(key)
+        if hit:
+            return path
+        rows = await self._select(table, column, [('id', 'eq', entity_id)])
+        path = rows[0].get(column) if rows else None
+        self.media_key_cache.set(key, path)
+        return path
+
+    async def exists(self, table: str, entity_id: int):
+        """Returns whether a live row with this ID exists"""
+        return bool(await self._select(table, 'id', [('id', 'eq', entity_id)], limit=1))
+
+    @coalesced
+    async def get_media_paths(self, table: str, entity_ids: List[int], column: str = 'photo_path'):
+        """Returns {id: S3 key} for several rows, querying only the IDs missing from the key cache"""
+        paths = {}
+        missing = []
+        for entity_id in entity_ids:
+            hit, path = self.media_key_cache.get((table, column, entity_id))
+            if hit:
+                paths[entity_id] = path
+            else:
+                missing.append(entity_id)
+        if missing:
+            rows = await self._select(table, f'id, {column}', [('id', 'in', missing)])
+            found = {row['id']: row.get(column) for row in rows}
+            for entity_id in missing:
+                paths[entity_id] = found.get(entity_id)
+                self.media_key_cache.set((table, column, entity_id), paths[entity_id])
+        return paths
+
+    async def set_media_path(self, table: str, entity_id: int, column: str, path: str):
+        """Records the S3 key of an uploaded photo/video on a row"""
+        result = await self._update(table, {column: path}, [('id', 'eq', entity_id)])
+        self.media_key_cache.invalidate(table)
+        await self.read_cache.invalidate(table, f"{table}:{entity_id}")
+        return result
+
+    async def soft_delete(self, table: str, ids: List[int], deleted_by: str = None, column: str = 'id'):
+        """Marks live rows as deleted, along with the rows they own, in one transaction (see utils.soft_delete.CASCADE)"""
+        statement = Statement(self.column_types)
+        statement.args.extend([table, ids, deleted_by, column])
+        data = await self._fetch(statement, "SELECT soft_delete_cascade($1::text, $2::integer[], $3::text, $4::text)")
+        if data:
+            await self.read_cache.invalidate(*cascade_tables(table))
+        return APIResponse(data=data, count=None)
+
+    async def get_purge_candidates(self, table: str, cutoff: str, after_id: int, limit: int):
+        """Returns the IDs of rows soft-deleted before cutoff, in ID order"""
+        rows = await self._select(table, 'id', [('deleted_at', 'lt', cutoff), ('id', 'gt', after_id)], ('id',), limit, live=False)
+        return [row['id'] for row in rows]
+
+    async def purge(self, table: str, ids: List[int]):
+        """Hard-deletes rows, with the excluded dates of purged routine exercises"""
+        if table == 'routine_has_exercice':
+            await self._delete('routine_exercise_excluded_dates', [('id_routine_has_exercise', 'in', ids)])
+        result = await self._delete(table, [('id', 'in', ids)])
+        return len(result.data)
+
+    @coalesced
+    async def get_all_athletes(self, params: ListParams = None):
+        """Returns all athletes"""
+        return await self._page('athlete', select_columns(params, 'name', AthleteSummary), params=params, sort='name')
+
+    @coalesced
+    async def get_athlete_by_id(self, athlete_id: int):
+        """Returns an athlete by ID"""
+        return await self._query('athlete', projection(AthleteSummary), [('id', 'eq', athlete_id)])
+
+    @coalesced
+    async def get_teams_by_athlete_id(self, athlete_id: int, params: ListParams = None):
+        """Returns all teams of the athlete"""
+        select = f"id, team({select_columns(params, model=TeamSummary)})"
+        return await self._page('enrollment', select, [('id_athlete', 'eq', athlete_id)], params)
+
+    @invalidates('athlete', cache='media_key_cache')
+    async def create_athlete(self, athlete: AthleteCreate):
+        """Creates a new athlete"""
+        data = {
+            "name": athlete.name,
+            "email": athlete.email,
+            "birth_date": athlete.birth_date
+        }
+        return await self._insert('athlete', data)
+
+    @invalidates('athlete')
+    @invalidates('athlete', cache='media_key_cache')
+    async def update_athlete(self, athlete_id: int, athlete_update: AthleteUpdate):
+        """Updates an athlete"""
+        data = {}
+        if athlete_update.name is not None:
+            data["name"] = athlete_update.name
+        if athlete_update.photo_path is not None:
+            data["photo_path"] = athlete_update.photo_path
+
+        if not data:
+            return await self._query('athlete', '*', [('id', 'eq', athlete_id)])
+
+        return await self._update('athlete', data, [('id', 'eq', athlete_id)])
+
+    @invalidates('athlete')
+    @invalidates('athlete', cache='media_key_cache')
+    async def delete_athlete(self, athlete_id: int, deleted_by: str = None):
+        """Deletes an athlete"""
+        return await self.soft_delete('athlete', [athlete_id], deleted_by)
+
+    @coalesced
+    async def get_all_coaches(self, params: ListParams = None):
+        """Returns all coaches"""
+        return await self._page('coach', select_columns(params, 'name', CoachSummary), params=params, sort='name')
+
+    @coalesced
+    async def get_coach_by_id(self, coach_id: int):
+        """Returns a coach by ID"""
+        return await self._query('coach', projection(CoachSummary), [('id', 'eq', coach_id)])
+
+    @invalidates('coach', cache='media_key_cache')
+    async def create_coach(self, coach: CoachCreate):
+        """Creates a new coach"""
+        data = {
+            "name": coach.name,
+            "id_level": coach.id_level,
+            "photo_path": coach.photo_path
+        }
+        return await self._insert('coach', data)
+
+    @invalidates('coach', cache='media_key_cache')
+    async def update_coach(self, coach_id: int, coach_update: CoachUpdate):
+        """Updates a coach"""
+        data = {}
+        if coach_update.name is not None:
+            data["name"] = coach_update.name
+        if coach_update.id_level is not None:
+            data["id_level"] = coach_update.id_level
+        if coach_update.photo_path is not None:
+            data["photo_path"] = coach_update.photo_path
+
+        if not data:
+            return await self._query('coach', '*', [('id', 'eq', coach_id)])
+
+        return await self._update('coach', data, [('id', 'eq', coach_id)])
+
+    @invalidates('coach', cache='media_key_cache')
+    async def delete_coach(self, coach_id: int, deleted_by: str = None):
+        """Deletes a coach"""
+        return await self.soft_delete('coach', [coach_id], deleted_by)
+
+    @coalesced
+    async def get_teams_by_coach_id(self, coach_id: int, params: ListParams = None):
+        """Returns all teams of the coach"""
+        return await self._page('team', select_columns(params, 'name', TeamSummary), [('id_coach', 'eq', coach_id)], params, 'name')
+
+    @coalesced
+    async def get_all_enrollments(self, params: ListParams = None):
+        """Returns all enrollments"""
+        return await self._page('enrollment', select_columns(params, model=EnrollmentSummary), params=params)
+
+    @coalesced
+    async def get_enrollment_by_id(self, enrollment_id: int):
+        """Returns an enrollment by ID"""
+        return await self._query('enrollment', projection(EnrollmentSummary), [('id', 'eq', enrollment_id)])
+
+    @cached('team:{team_id}', 'enrollment', 'athlete')
+    @coalesced
+    async def get_enrollments_by_team_id(self, team_id: int, params: ListParams = None):
+        """Returns all enrollments of a team"""
+        return await self._page('enrollment', select_columns(params, model=EnrollmentWithAthlete), [('id_team', 'eq', team_id)], params)
+
+    @coalesced
+    async def get_enrollments_by_athlete_id(self, athlete_id: int, params: ListParams = None):
+        """Returns all enrollments of an athlete"""
+        return await self._page('enrollment', select_columns(params, model=EnrollmentWithTeam), [('id_athlete', 'eq', athlete_id)], params)
+
+    @invalidates('team:{enrollment.id_team}')
+    async def create_enrollment(self, enrollment: EnrollmentCreate):
+        """Creates a new enrollment"""
+        data = {
+            "id_team": enrollment.id_team,
+            "id_athlete": enrollment.id_athlete
+        }
+        return await self._insert('enrollment', data)
+
+    @invalidates('enrollment')
+    async def update_enrollment(self, enrollment_id: int, enrollment_update: EnrollmentUpdate):
+        """Updates an enrollment"""
+        data = {}
+        if enrollment_update.id_team is not None:
+            data["id_team"] = enrollment_update.id_team
+        if enrollment_update.id_athlete is not None:
+            data["id_athlete"] = enrollment_update.id_athlete
+
+        if not data:
+            return await self._query('enrollment', '*', [('id', 'eq', enrollment_id)])
+
+        return await self._update('enrollment', data, [('id', 'eq', enrollment_id)])
+
+    @invalidates('enrollment')
+    async def delete_enrollment(self, enrollment_id: int, deleted_by: str = None):
+        """Deletes an enrollment"""
+        return await self.soft_delete('enrollment', [enrollment_id], deleted_by)
+
+    async def get_live_enrollments(self, team_ids: List[int], athlete_ids: List[int]):
+        """Returns the live enrollments of any of the teams with any of the athletes (uncached, to check a write)"""
+        return await self._query('enrollment', 'id, id_team, id_athlete', [('id_team', 'in', team_ids), ('id_athlete', 'in', athlete_ids)])
+
+    @invalidates('enrollment')
+    async def create_enrollments(self, enrollments: List[EnrollmentCreate]):
+        """Creates several enrollments in a single multi-row insert"""
+        data = [
+            {
+                "id_team": enrollment.id_team,
+                "id_athlete": enrollment.id_athlete
+            }
+            for enrollment in enrollments
+        ]
+        return await self._insert('enrollment', data)
+
+    @invalidates('enrollment')
+    async def update_enrollments(self, enrollments: List[EnrollmentUpdate]):
+        """Updates several live enrollments in a single statement (see migrations/003_bulk_updates.sql)"""
+        data = [
+            {
+                "id": enrollment.id,
+                "id_team": enrollment.id_team,
+                "id_athlete": enrollment.id_athlete,
+                "updated_at": enrollment.updated_at,
+                "updated_by": enrollment.updated_by
+            }
+            for enrollment in enrollments
+        ]
+        return await self._rpc('update_enrollments', data)
+
+    @invalidates('enrollment')
+    async def delete_enrollments(self, enrollment_ids: List[int], deleted_by: str = None):
+        """Soft-deletes several enrollments in a single statement"""
+        return await self.soft_delete('enrollment', enrollment_ids, deleted_by)
+
+    @coalesced
+    async def get_all_exercises(self, params: ListParams = None):
+        """Returns all exercises"""
+        return await self._page('exercise', select_columns(params, 'name', ExerciseSummary), params=params, sort='name')
+
+    @coalesced
+    async def get_exercise_by_id(self, exercise_id: int):
+        """Returns an exercise by ID"""
+        return await self._query('exercise', projection(ExerciseSummary), [('id', 'eq', exercise_id)])
+
+    @coalesced
+    async def get_exercises_by_team_id(self, team_id: int, params: ListParams = None):
+        """Returns all exercises of a team"""
+        return await self._page('exercise', select_columns(params, 'name', ExerciseSummary), [('id_team', 'eq', team_id)], params, 'name')
+
+    @coalesced
+    async def get_exercises_by_athlete_id(self, athlete_id: int, params: ListParams = None):
+        """Returns all exercises of an athlete"""
+        return await self._page('exercise', select_columns(params, 'name', ExerciseSummary), [('id_athlete', 'eq', athlete_id)], params, 'name')
+
+    @invalidates('exercise', cache='media_key_cache')
+    async def create_exercise(self, exercise: ExerciseCreate):
+        """Creates a new exercise"""
+        data = {
+            "id_type": exercise.id_type,
+            "id_sport": exercise.id_sport,
+            "name": exercise.name,
+            "reps": exercise.reps,
+            "sets": exercise.sets,
+            "description": exercise.description,
+            "video_path": exercise.video_path,
+            "photo_path": exercise.photo_path,
+            "created_by": exercise.created_by,
+            "created_at": exercise.created_at
+        }
+        return await self._insert('exercise', data)
+
+    @invalidates('exercise', cache='media_key_cache')
+    async def update_exercise(self, exercise_id: int, exercise_update: ExerciseUpdate):
+        """Updates an exercise"""
+        data = {}
+        if exercise_update.id_type is not None:
+            data["id_type"] = exercise_update.id_type
+        if exercise_update.id_sport is not None:
+            data["id_sport"] = exercise_update.id_sport
+        if exercise_update.name is not None:
+            data["name"] = exercise_update.name
+        if exercise_update.reps is not None:
+            data["reps"] = exercise_update.reps
+        if exercise_update.sets is not None:
+            data["sets"] = exercise_update.sets
+        if exercise_update.description is not None:
+            data["description"] = exercise_update.description
+        if exercise_update.video_path is not None:
+            data["video_path"] = exercise_update.video_path
+        if exercise_update.photo_path is not None:
+            data["photo_path"] = exercise_update.photo_path
+
+        if not data:
+            return await self._query('exercise', '*', [('id', 'eq', exercise_id)])
+
+        return await self._update('exercise', data, [('id', 'eq', exercise_id)])
+
+    @invalidates('exercise', cache='media_key_cache')
+    async def delete_exercise(self, exercise_id: int, deleted_by: str = None):
+        """Deletes an exercise"""
+        return await self.soft_delete('exercise', [exercise_id], deleted_by)
+
+    @cached('type_exercise', ttl=Env.REFERENCE_CACHE_TTL)
+    @coalesced
+    async def get_all_type_exercises(self, params: ListParams = None):
+        """Returns all exercise types"""
+        return await self._page('type_exercise', select_columns(params, 'name', TypeExerciseSummary), params=params, sort='name')
+
+    @cached('type_exercise:{type_id}', ttl=Env.REFERENCE_CACHE_TTL)
+    @coalesced
+    async def get_type_exercise_by_id(self, type_id: int):
+        """Returns an exercise type by ID"""
+        return await self._query('type_exercise', projection(TypeExerciseSummary), [('id', 'eq', type_id)])
+
+    @cached('sport', ttl=Env.REFERENCE_CACHE_TTL)
+    @coalesced
+    async def get_all_sports(self, params: ListParams = None):
+        """Returns all sports"""
+        return await self._page('sport', select_columns(params, 'name', SportSummary), params=params, sort='name')
+
+    @cached('sport:{sport_id}', ttl=Env.REFERENCE_CACHE_TTL)
+    @coalesced
+    async def get_sport_by_id(self, sport_id: int):
+        """Returns a sport by ID"""
+        return await self._query('sport', projection(SportSummary), [('id', 'eq', sport_id)])
+
+    @invalidates('sport')
+    @invalidates('sport', cache='media_key_cache')
+    async def create_sport(self, sport: SportCreate):
+        """Creates a new sport"""
+        data = {
+            "name": sport.name,
+            "description": sport.description,
+            "photo_path": sport.photo_path
+        }
+        return await self._insert('sport', data)
+
+    @invalidates('sport', 'sport:{sport_id}')
+    @invalidates('sport', cache='media_key_cache')
+    async def update_sport(self, sport_id: int, sport_update: SportUpdate):
+        """Updates a sport"""
+        data = {}
+        if sport_update.name is not None:
+            data["name"] = sport_update.name
+        if sport_update.description is not None:
+            data["description"] = sport_update.description
+        if sport_update.photo_path is not None:
+            data["photo_path"] = sport_update.photo_path
+
+        if not data:
+            return await self._query('sport', '*', [('id', 'eq', sport_id)])
+
+        return await self._update('sport', data, [('id', 'eq', sport_id)])
+
+    @invalidates('sport', 'sport:{sport_id}')
+    @invalidates('sport', cache='media_key_cache')
+    async def delete_sport(self, sport_id: int, deleted_by: str = None):
+        """Deletes a sport"""
+        return await self.soft_delete('sport', [sport_id], deleted_by)
+
+    @cached('team')
+    @coalesced
+    async def get_all_teams(self, params: ListParams = None):
+        """Returns all teams"""
+        return await self._page('team', select_columns(params, 'name', TeamSummary), params=params, sort='name')
+
+    @cached('team:{team_id}')
+    @coalesced
+    async def get_team_by_id(self, team_id: int):
+        """Returns a team by ID"""
+        return await self._query('team', projection(TeamSummary), [('id', 'eq', team_id)])
+
+    @coalesced
+    async def get_teams_with_details(self):
+        """Returns all teams with their coach, sport and enrolled athletes embedded in a single query"""
+        return await self._query(
+            'team',
+            f"{projection(TeamSummary)}, coach({projection(CoachSummary)}), sport({projection(SportSummary)}), "
+            f"enrollment(id, athlete({projection(AthleteSummary)}))",
+            order=('name',),
+            embed_filters={
+                'coach': [('deleted_at', 'is', None)],
+                'sport': [('deleted_at', 'is', None)],
+                'enrollment': [('deleted_at', 'is', None)]
+            }
+        )
+
+    @cached('team:{team_id}', 'enrollment', 'athlete')
+    @coalesced
+    async def get_athletes_by_team_id(self, team_id: int, params: ListParams = None):
+        """Returns all athletes enrolled in a team"""
+        select = f"id, athlete({select_columns(params, model=AthleteSummary)})"
+        return await self._page('enrollment', select, [('id_team', 'eq', team_id)], params)
+
+    @coalesced
+    async def get_athlete_ids_by_team_id(self, team_id: int):
+        """Returns the IDs of the athletes enrolled in a team"""
+        return await self._query('enrollment', 'id_athlete', [('id_team', 'eq', team_id)])
+
+    @invalidates('team')
+    @invalidates('team', cache='media_key_cache')
+    async def create_team(self, team: TeamCreate):
+        """Creates a new team"""
+        data = {
+            "id_coach": team.id_coach,
+            "id_sport": team.id_sport,
+            "name": team.name,
+            "photo_path": team.photo_path
+        }
+        return await self._insert('team', data)
+
+    @invalidates('team', 'team:{team_id}')
+    @invalidates('team', cache='media_key_cache')
+    async def update_team(self, team_id: int, team_update: TeamUpdate):
+        """Updates a team"""
+        data = {}
+        if team_update.id_coach is not None:
+            data["id_coach"] = team_update.id_coach
+        if team_update.id_sport is not None:
+            data["id_sport"] = team_update.id_sport
+        if team_update.name is not None:
+            data["name"] = team_update.name
+        if team_update.photo_path is not None:
+            data["photo_path"] = team_update.photo_path
+
+        if not data:
+            return await self._query('team', '*', [('id', 'eq', team_id)])
+
+        return await self._update('team', data, [('id', 'eq', team_id)])
+
+    @invalidates('team', 'team:{team_id}')
+    @invalidates('team', cache='media_key_cache')
+    async def delete_team(self, team_id: int, deleted_by: str = None):
+        """Deletes a team"""
+        return await self.soft_delete('team', [team_id], deleted_by)
+
+    @coalesced
+    async def get_all_routines(self, params: ListParams = None):
+        """Returns all routines"""
+        return await self._page('routine', select_columns(params, 'name', RoutineSummary), params=params, sort='name')
+
+    @coalesced
+    async def get_routine_by_id(self, routine_id: int):
+        """Returns a routine by ID"""
+        return await self._query('routine', projection(RoutineSummary), [('id', 'eq', routine_id)])
+
+    @coalesced
+    async def get_routines_by_athlete_id(self, athlete_id: int, params: ListParams = None):
+        """Returns all routines of an athlete"""
+        return await self._page('routine', select_columns(params, 'name', RoutineSummary), [('id_athlete', 'eq', athlete_id)], params, 'name')
+
+    @coalesced
+    async def get_schedule_by_athlete_id(self, athlete_id: int, start_date: str, end_date: str):
+        """Returns the routines of an athlete with their weekly slots, exercises and the excluded dates inside a date range"""
+        return await self._query(
+            'routine',
+            'id, name, routine_has_exercice(id, id_exercise, days_of_week, start_hour, end_hour, '
+            'exercise(id, name), routine_exercise_excluded_dates(excluded_date))',
+            [('id_athlete', 'eq', athlete_id)],
+            embed_filters={
+                'routine_has_exercice': [('deleted_at', 'is', None)],
+                'routine_has_exercice.routine_exercise_excluded_dates': [
+                    ('excluded_date', 'gte', start_date), ('excluded_date', 'lte', end_date)
+                ]
+            }
+        )
+
+    @coalesced
+    async def get_routine_exercises_by_athlete_id(self, athlete_id: int):
+        """Returns the weekly slots of every routine of an athlete"""
+        return await self._query(
+            'routine_has_exercice',
+            'id, id_routine, days_of_week, start_hour, end_hour, routine!inner(id_athlete)',
+            [('routine.id_athlete', 'eq', athlete_id)]
+        )
+
+    @coalesced
+    async def get_routine_exercises_by_athlete_ids(self, athlete_ids: List[int], days_of_week: str):
+        """Returns the slots of several athletes on one weekday in a single request"""
+        return await self._query(
+            'routine_has_exercice',
+            'start_hour, end_hour, routine!inner(id_athlete)',
+            [('routine.id_athlete', 'in', athlete_ids), ('days_of_week', 'eq', days_of_week)]
+        )
+
+    @coalesced
+    async def get_exercises_by_routine_id(self, routine_id: int, params: ListParams = None):
+        """Returns all exercises in a routine with their schedule"""
+        select = select_columns(params, model=RoutineExerciseWithExercise)
+        return await self._page('routine_has_exercice', select, [('id_routine', 'eq', routine_id)], params, 'start_hour')
+
+    async def create_routine(self, routine: RoutineCreate):
+        """Creates a new routine"""
+        data = {
+            "id_athlete": routine.id_athlete,
+            "name": routine.name,
+            "created_at": routine.created_at,
+            "created_by": routine.created_by
+        }
+        return await self._insert('routine', data)
+
+    async def update_routine(self, routine_id: int, routine_update: RoutineUpdate):
+        """Updates a routine"""
+        data = {}
+        if routine_update.name is not None:
+            data["name"] = routine_update.name
+            data["updated_by"] = routine_update.updated_by
+
+        if not data:
+            return await self._query('routine', '*', [('id', 'eq', routine_id)])
+
+        return await self._update('routine', data, [('id', 'eq', routine_id)])
+
+    async def delete_routine(self, routine_id: int, deleted_by: str = None):
+        """Deletes a routine"""
+        return await self.soft_delete('routine', [routine_id], deleted_by)
+
+    async def add_exercise_to_routine(self, routine_exercise: RoutineHasExerciseCreate):
+        """Adds an exercise to a routine"""
+        data = {
+            "id_routine": routine_exercise.id_routine,
+            "id_exercise": routine_exercise.id_exercise,
+            "days_of_week": routine_exercise.days_of_week,
+            "start_hour": routine_exercise.start_hour,
+            "end_hour": routine_exercise.end_hour,
+            "created_at": routine_exercise.created_at,
+            "created_by": routine_exercise.created_by
+        }
+        return await self._insert('routine_has_exercice', data)
+
+    async def remove_exercise_from_routine(self, routine_exercise_id: int, deleted_by: str = None):
+        """Removes an exercise from a routine"""
+        return await self.soft_delete('routine_has_exercice', [routine_exercise_id], deleted_by)
+
+    async def add_exercises_to_routine(self, routine_exercises: List[RoutineHasExerciseCreate]):
+        """Adds several exercises to routines in a single multi-row insert"""
+        data = [
+            {
+                "id_routine": routine_exercise.id_routine,
+                "id_exercise": routine_exercise.id_exercise,
+                "days_of_week": routine_exercise.days_of_week,
+                "start_hour": routine_exercise.start_hour,
+                "end_hour": routine_exercise.end_hour,
+                "created_at": routine_exercise.created_at,
+                "created_by": routine_exercise.created_by
+            }
+            for routine_exercise in routine_exercises
+        ]
+        return await self._insert('routine_has_exercice', data)
+
+    async def update_routine_exercises(self, routine_exercises: List[RoutineHasExerciseUpdate]):
+        """Updates several live routine exercises in a single statement (see migrations/003_bulk_updates.sql)"""
+        data = [
+            {
+                "id": routine_exercise.id,
+                "id_routine": routine_exercise.id_routine,
+                "id_exercise": routine_exercise.id_exercise,
+                "days_of_week": routine_exercise.days_of_week,
+                "start_hour": routine_exercise.start_hour,
+                "end_hour": routine_exercise.end_hour,
+                "updated_at": routine_exercise.updated_at,
+                "updated_by": routine_exercise.updated_by
+            }
+            for routine_exercise in routine_exercises
+        ]
+        return await self._rpc('update_routine_exercises', data)
+
+    async def remove_exercises_from_routine(self, routine_exercise_ids: List[int], deleted_by: str = None):
+        """Soft-deletes several routine exercises in a single statement"""
+        return await self.soft_delete('routine_has_exercice', routine_exercise_ids, deleted_by)
+
+    async def add_excluded_date(self, excluded_date: ExcludedDateCreate):
+        """Adds an excluded date to a routine exercise"""
+        data = {
+            "id_routine_has_exercise": excluded_date.id_routine_has_exercise,
+            "excluded_date": excluded_date.excluded_date,
+            "reason": excluded_date.reason
+        }
+        return await self._insert('routine_exercise_excluded_dates', data)
+
+    @coalesced
+    async def get_excluded_dates(self, routine_exercise_id: int, params: ListParams = None):
+        """Returns all excluded dates for a routine exercise"""
+        select = select_columns(params, 'excluded_date', ExcludedDateSummary)
+        return await self._page('routine_exercise_excluded_dates', select, [('id_routine_has_exercise', 'eq', routine_exercise_id)], params, 'excluded_date')
+
+    async def delete_excluded_date(self, excluded_date_id: int):
+        """Deletes an excluded date"""
+        return await self._delete('routine_exercise_excluded_dates', [('id', 'eq', excluded_date_id)])
+
+    async def add_excluded_dates(self, excluded_dates: List[ExcludedDateCreate]):
+        """Adds several excluded dates in a single multi-row insert"""
+        data = [
+            {
+                "id_routine_has_exercise": excluded_date.id_routine_has_exercise,
+                "excluded_date": excluded_date.excluded_date,
+                "reason": excluded_date.reason
+            }
+            for excluded_date in excluded_dates
+        ]
+        return await self._insert('routine_exercise_excluded_dates', data)
+
+    async def delete_excluded_dates(self, excluded_date_ids: List[int]):
+        """Deletes several excluded dates in a single statement"""
+        return await self._delete('routine_exercise_excluded_dates', [('id', 'in', excluded_date_ids)])
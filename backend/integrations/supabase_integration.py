@@ -1,6 +1,14 @@
-import os
-from dotenv import load_dotenv
-from supabase import create_client
+import logging
+import httpx
+from supabase import acreate_client, AsyncClient, AsyncClientOptions
+from typing import List
+from configs.env import Env
+from utils.cache import TTLCache, cached, create_cache_backend, invalidates
+from utils.metrics import on_request, on_response
+from utils.single_flight import SingleFlight, coalesced
+from utils.soft_delete import cascade_tables
+from utils.pagination import ListParams, paginate, select_columns
+from utils.projection import projection
 from models.athlete_models import *
 from models.coach_models import *
 from models.enrollment_models import *
@@ -9,54 +17,152 @@ from models.sport_models import *
 from models.team_models import *
 from models.routine_models import *
 
+logger = logging.getLogger(__name__)
+
 class SupabaseIntegration:
-    def __init__(self):
-        # Load environment variables from .env (if present)
-        load_dotenv()
+    def __init__(self, client: AsyncClient, http_client: httpx.AsyncClient = None):
+        self.client = client
+        self.http_client = http_client
+        # Cached Supabase reads, tagged so writes can invalidate them (see utils.cache)
+        self.read_cache = create_cache_backend()
+        # Entity -> S3 key lookups done before every photo/video download
+        self.media_key_cache = TTLCache(Env.MEDIA_KEY_CACHE_SIZE, Env.MEDIA_KEY_CACHE_TTL)
+        # Identical reads in flight at the same time share one Supabase call
+        self.single_flight = SingleFlight() if Env.SUPABASE_SINGLE_FLIGHT else None
+
+    @classmethod
+    async def connect(cls):
+        """Creates the process-wide Supabase client on top of a bounded HTTP connection pool"""
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=Env.SUPABASE_POOL_SIZE,
+                max_keepalive_connections=Env.SUPABASE_POOL_KEEPALIVE,
+                keepalive_expiry=Env.SUPABASE_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(
+                Env.SUPABASE_READ_TIMEOUT,
+                connect=Env.SUPABASE_CONNECT_TIMEOUT,
+                pool=Env.SUPABASE_POOL_TIMEOUT
+            ),
+            # Time every Supabase round trip as the "db" span of the current request
+            event_hooks={'request': [on_request], 'response': [on_response]}
+        )
         try:
-            self.client = create_client(
-                os.getenv('SUPABASE_URL'),
-                os.getenv('SUPABASE_KEY')
+            client = await acreate_client(
+                Env.SUPABASE_URL,
+                Env.SUPABASE_KEY,
+                options=AsyncClientOptions(httpx_client=http_client)
             )
-        except Exception as e:
-            print("Error creating Supabase client:", e)
-            raise e
+        except Exception:
+            await http_client.aclose()
+            logger.exception("Error creating Supabase client")
+            raise
+        return cls(client, http_client)
+
+    async def close(self):
+        """Releases the pooled HTTP connections and the read cache"""
+        await self.read_cache.close()
+        if self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
 
     def get_client(self):
         return self.client
     
-    def get_all_athletes(self):
+    @coalesced
+    async def get_media_path(self, table: str, entity_id: int, column: str = 'photo_path'):
+        """Returns the S3 key stored in a photo/video column of a row, or None"""
+        key = (table, column, entity_id)
+        hit, path = self.media_key_cache.get(key)
+        if hit:
+            return path
+        result = await self.client.table(table).select(column).is_('deleted_at', 'null').eq('id', entity_id).execute()
+        path = result.data[0].get(column) if result.data else None
+        self.media_key_cache.set(key, path)
+        return path
+
+    async def exists(self, table: str, entity_id: int):
+        """Returns whether a live row with this ID exists"""
+        result = await self.client.table(table).select('id').is_('deleted_at', 'null').eq('id', entity_id).limit(1).execute()
+        return bool(result.data)
+
+    @coalesced
+    async def get_media_paths(self, table: str, entity_ids: List[int], column: str = 'photo_path'):
+        """Returns {id: S3 key} for several rows, querying only the IDs missing from the key cache"""
+        paths = {}
+        missing = []
+        for entity_id in entity_ids:
+            hit, path = self.media_key_cache.get((table, column, entity_id))
+            if hit:
+                paths[entity_id] = path
+            else:
+                missing.append(entity_id)
+        if missing:
+            result = await self.client.table(table).select(f'id, {column}').is_('deleted_at', 'null').in_('id', missing).execute()
+            found = {row['id']: row.get(column) for row in result.data}
+            for entity_id in missing:
+                paths[entity_id] = found.get(entity_id)
+                self.media_key_cache.set((table, column, entity_id), paths[entity_id])
+        return paths
+
+    async def set_media_path(self, table: str, entity_id: int, column: str, path: str):
+        """Records the S3 key of an uploaded photo/video on a row"""
+        result = await self.client.table(table).update({column: path}).is_('deleted_at', 'null').eq('id', entity_id).execute()
+        self.media_key_cache.invalidate(table)
+        await self.read_cache.invalidate(table, f"{table}:{entity_id}")
+        return result
+
+    async def soft_delete(self, table: str, ids: List[int], deleted_by: str = None, column: str = 'id'):
+        """Marks live rows as deleted, along with the rows they own, in one transaction (see utils.soft_delete.CASCADE)"""
+        result = await self.client.rpc(
+            'soft_delete_cascade', {'target': table, 'ids': ids, 'deleted_by': deleted_by, 'key': column}
+        ).execute()
+        if result.data:
+            await self.read_cache.invalidate(*cascade_tables(table))
+        return result
+
+    async def get_purge_candidates(self, table: str, cutoff: str, after_id: int, limit: int):
+        """Returns the IDs of rows soft-deleted before cutoff, in ID order"""
+        result = await self.client.table(table).select('id').lt('deleted_at', cutoff).gt('id', after_id).order('id').limit(limit).execute()
+        return [row['id'] for row in result.data]
+
+    async def purge(self, table: str, ids: List[int]):
+        """Hard-deletes rows, with the excluded dates of purged routine exercises"""
+        if table == 'routine_has_exercice':
+            await self.client.table('routine_exercise_excluded_dates').delete().in_('id_routine_has_exercise', ids).execute()
+        result = await self.client.table(table).delete().in_('id', ids).execute()
+        return len(result.data)
+
+    @coalesced
+    async def get_all_athletes(self, params: ListParams = None):
         """Returns all athletes"""
-        return self.client.table('athlete').select('*').order('name').execute()
+        query = self.client.table('athlete').select(select_columns(params, 'name', AthleteSummary)).is_('deleted_at', 'null')
+        return await paginate(query, params, 'name')
 
-    def get_athlete_by_id(self, athlete_id: int):
+    @coalesced
+    async def get_athlete_by_id(self, athlete_id: int):
         """Returns an athlete by ID"""
-        return self.client.table('athlete').select('*').eq('id', athlete_id).execute()
+        return await self.client.table('athlete').select(projection(AthleteSummary)).is_('deleted_at', 'null').eq('id', athlete_id).execute()
     
-    def get_athlete_photo_path_by_id(self, athlete_id: int):
-        """Returns athlete photo bytes by ID"""
-        athlete = self.client.table('athlete').select('photo_path').eq('id', athlete_id).execute()
-        if not athlete.data or not athlete.data[0].get('photo_path'):
-            return None, None
-        
-        photo_path = athlete.data[0]['photo_path']
-        
-        return photo_path
-    
-    def get_teams_by_athlete_id(self, athlete_id: int):
+    @coalesced
+    async def get_teams_by_athlete_id(self, athlete_id: int, params: ListParams = None):
         """Returns all teams of the athlete"""
-        return self.client.table('enrollment').select('team(*)').eq('id_athlete', athlete_id).execute()
+        query = self.client.table('enrollment').select(f"id, team({select_columns(params, model=TeamSummary)})").is_('deleted_at', 'null').eq('id_athlete', athlete_id)
+        return await paginate(query, params)
 
-    def create_athlete(self, athlete: AthleteCreate):
+    @invalidates('athlete', cache='media_key_cache')
+    async def create_athlete(self, athlete: AthleteCreate):
         """Creates a new athlete"""
         data = {
             "name": athlete.name,
             "email": athlete.email,
             "birth_date": athlete.birth_date
         }
-        return self.client.table('athlete').insert(data).execute()
+        return await self.client.table('athlete').insert(data).execute()
     
-    def update_athlete(self, athlete_id: int, athlete_update: AthleteUpdate):
+    @invalidates('athlete')
+    @invalidates('athlete', cache='media_key_cache')
+    async def update_athlete(self, athlete_id: int, athlete_update: AthleteUpdate):
         """Updates an athlete"""
         data = {}
         if athlete_update.name is not None:
@@ -65,40 +171,39 @@ class SupabaseIntegration:
             data["photo_path"] = athlete_update.photo_path
         
         if not data:
-            return self.client.table('athlete').select('*').eq('id', athlete_id).execute()
+            return await self.client.table('athlete').select('*').is_('deleted_at', 'null').eq('id', athlete_id).execute()
         
-        return self.client.table('athlete').update(data).eq('id', athlete_id).execute()
+        return await self.client.table('athlete').update(data).is_('deleted_at', 'null').eq('id', athlete_id).execute()
     
-    def delete_athlete(self, athlete_id: int):
+    @invalidates('athlete')
+    @invalidates('athlete', cache='media_key_cache')
+    async def delete_athlete(self, athlete_id: int, deleted_by: str = None):
         """Deletes an athlete"""
-        return self.client.table('athlete').delete().eq('id', athlete_id).execute()
+        return await self.soft_delete('athlete', [athlete_id], deleted_by)
 
-    def get_all_coaches(self):
+    @coalesced
+    async def get_all_coaches(self, params: ListParams = None):
         """Returns all coaches"""
-        return self.client.table('coach').select('*').order('name').execute()
+        query = self.client.table('coach').select(select_columns(params, 'name', CoachSummary)).is_('deleted_at', 'null')
+        return await paginate(query, params, 'name')
     
-    def get_coach_by_id(self, coach_id: int):
+    @coalesced
+    async def get_coach_by_id(self, coach_id: int):
         """Returns a coach by ID"""
-        return self.client.table('coach').select('*').eq('id', coach_id).execute()
+        return await self.client.table('coach').select(projection(CoachSummary)).is_('deleted_at', 'null').eq('id', coach_id).execute()
     
-    def get_coach_photo_path_by_id(self, coach_id: int):
-        """Returns coach photo path by ID"""
-        coach = self.client.table('coach').select('photo_path').eq('id', coach_id).execute()
-        if not coach.data or not coach.data[0].get('photo_path'):
-            return None
-        
-        return coach.data[0]['photo_path']
-
-    def create_coach(self, coach: CoachCreate):
+    @invalidates('coach', cache='media_key_cache')
+    async def create_coach(self, coach: CoachCreate):
         """Creates a new coach"""
         data = {
             "name": coach.name,
             "id_level": coach.id_level,
             "photo_path": coach.photo_path
         }
-        return self.client.table('coach').insert(data).execute()
+        return await self.client.table('coach').insert(data).execute()
 
-    def update_coach(self, coach_id: int, coach_update: CoachUpdate):
+    @invalidates('coach', cache='media_key_cache')
+    async def update_coach(self, coach_id: int, coach_update: CoachUpdate):
         """Updates a coach"""
         data = {}
         if coach_update.name is not None:
@@ -109,43 +214,56 @@ class SupabaseIntegration:
             data["photo_path"] = coach_update.photo_path
         
         if not data:
-            return self.client.table('coach').select('*').eq('id', coach_id).execute()
+            return await self.client.table('coach').select('*').is_('deleted_at', 'null').eq('id', coach_id).execute()
         
-        return self.client.table('coach').update(data).eq('id', coach_id).execute()
+        return await self.client.table('coach').update(data).is_('deleted_at', 'null').eq('id', coach_id).execute()
     
-    def delete_coach(self, coach_id: int):
+    @invalidates('coach', cache='media_key_cache')
+    async def delete_coach(self, coach_id: int, deleted_by: str = None):
         """Deletes a coach"""
-        return self.client.table('coach').delete().eq('id', coach_id).execute()
+        return await self.soft_delete('coach', [coach_id], deleted_by)
     
-    def get_teams_by_coach_id(self, coach_id: int):
+    @coalesced
+    async def get_teams_by_coach_id(self, coach_id: int, params: ListParams = None):
         """Returns all teams of the coach"""
-        return self.client.table('team').select('*').eq('id_coach', coach_id).order('name').execute()
+        query = self.client.table('team').select(select_columns(params, 'name', TeamSummary)).is_('deleted_at', 'null').eq('id_coach', coach_id)
+        return await paginate(query, params, 'name')
 
-    def get_all_enrollments(self):
+    @coalesced
+    async def get_all_enrollments(self, params: ListParams = None):
         """Returns all enrollments"""
-        return self.client.table('enrollment').select('*').execute()
+        query = self.client.table('enrollment').select(select_columns(params, model=EnrollmentSummary)).is_('deleted_at', 'null')
+        return await paginate(query, params)
     
-    def get_enrollment_by_id(self, enrollment_id: int):
+    @coalesced
+    async def get_enrollment_by_id(self, enrollment_id: int):
         """Returns an enrollment by ID"""
-        return self.client.table('enrollment').select('*').eq('id', enrollment_id).execute()
+        return await self.client.table('enrollment').select(projection(EnrollmentSummary)).is_('deleted_at', 'null').eq('id', enrollment_id).execute()
     
-    def get_enrollments_by_team_id(self, team_id: int):
+    @cached('team:{team_id}', 'enrollment', 'athlete')
+    @coalesced
+    async def get_enrollments_by_team_id(self, team_id: int, params: ListParams = None):
         """Returns all enrollments of a team"""
-        return self.client.table('enrollment').select('*, athlete(*)').eq('id_team', team_id).execute()
+        query = self.client.table('enrollment').select(select_columns(params, model=EnrollmentWithAthlete)).is_('deleted_at', 'null').eq('id_team', team_id)
+        return await paginate(query, params)
     
-    def get_enrollments_by_athlete_id(self, athlete_id: int):
+    @coalesced
+    async def get_enrollments_by_athlete_id(self, athlete_id: int, params: ListParams = None):
         """Returns all enrollments of an athlete"""
-        return self.client.table('enrollment').select('*, team(*)').eq('id_athlete', athlete_id).execute()
+        query = self.client.table('enrollment').select(select_columns(params, model=EnrollmentWithTeam)).is_('deleted_at', 'null').eq('id_athlete', athlete_id)
+        return await paginate(query, params)
 
-    def create_enrollment(self, enrollment: EnrollmentCreate):
+    @invalidates('team:{enrollment.id_team}')
+    async def create_enrollment(self, enrollment: EnrollmentCreate):
         """Creates a new enrollment"""
         data = {
             "id_team": enrollment.id_team,
             "id_athlete": enrollment.id_athlete
         }
-        return self.client.table('enrollment').insert(data).execute()
+        return await self.client.table('enrollment').insert(data).execute()
     
-    def update_enrollment(self, enrollment_id: int, enrollment_update: EnrollmentUpdate):
+    @invalidates('enrollment')
+    async def update_enrollment(self, enrollment_id: int, enrollment_update: EnrollmentUpdate):
         """Updates an enrollment"""
         data = {}
         if enrollment_update.id_team is not None:
@@ -154,47 +272,76 @@ class SupabaseIntegration:
             data["id_athlete"] = enrollment_update.id_athlete
         
         if not data:
-            return self.client.table('enrollment').select('*').eq('id', enrollment_id).execute()
+            return await self.client.table('enrollment').select('*').is_('deleted_at', 'null').eq('id', enrollment_id).execute()
         
-        return self.client.table('enrollment').update(data).eq('id', enrollment_id).execute()
+        return await self.client.table('enrollment').update(data).is_('deleted_at', 'null').eq('id', enrollment_id).execute()
     
-    def delete_enrollment(self, enrollment_id: int):
+    @invalidates('enrollment')
+    async def delete_enrollment(self, enrollment_id: int, deleted_by: str = None):
         """Deletes an enrollment"""
-        return self.client.table('enrollment').delete().eq('id', enrollment_id).execute()
+        return await self.soft_delete('enrollment', [enrollment_id], deleted_by)
     
-    def get_all_exercises(self):
+    async def get_live_enrollments(self, team_ids: List[int], athlete_ids: List[int]):
+        """Returns the live enrollments of any of the teams with any of the athletes (uncached, to check a write)"""
+        return await self.client.table('enrollment').select('id, id_team, id_athlete').is_('deleted_at', 'null').in_('id_team', team_ids).in_('id_athlete', athlete_ids).execute()
+
+    @invalidates('enrollment')
+    async def create_enrollments(self, enrollments: List[EnrollmentCreate]):
+        """Creates several enrollments in a single multi-row insert"""
+        data = [
+            {
+                "id_team": enrollment.id_team,
+                "id_athlete": enrollment.id_athlete
+            }
+            for enrollment in enrollments
+        ]
+        return await self.client.table('enrollment').insert(data).execute()
+    
+    @invalidates('enrollment')
+    async def update_enrollments(self, enrollments: List[EnrollmentUpdate]):
+        """Updates several live enrollments in a single statement (see migrations/003_bulk_updates.sql)"""
+        data = [
+            {
+                "id": enrollment.id,
+                "id_team": enrollment.id_team,
+                "id_athlete": enrollment.id_athlete,
+                "updated_at": enrollment.updated_at,
+                "updated_by": enrollment.updated_by
+            }
+            for enrollment in enrollments
+        ]
+        return await self.client.rpc('update_enrollments', {'items': data}).execute()
+    
+    @invalidates('enrollment')
+    async def delete_enrollments(self, enrollment_ids: List[int], deleted_by: str = None):
+        """Soft-deletes several enrollments in a single statement"""
+        return await self.soft_delete('enrollment', enrollment_ids, deleted_by)
+    
+    @coalesced
+    async def get_all_exercises(self, params: ListParams = None):
         """Returns all exercises"""
-        return self.client.table('exercise').select('*').order('name').execute()
+        query = self.client.table('exercise').select(select_columns(params, 'name', ExerciseSummary)).is_('deleted_at', 'null')
+        return await paginate(query, params, 'name')
     
-    def get_exercise_by_id(self, exercise_id: int):
+    @coalesced
+    async def get_exercise_by_id(self, exercise_id: int):
         """Returns an exercise by ID"""
-        return self.client.table('exercise').select('*').eq('id', exercise_id).execute()
+        return await self.client.table('exercise').select(projection(ExerciseSummary)).is_('deleted_at', 'null').eq('id', exercise_id).execute()
     
-    def get_exercises_by_team_id(self, team_id: int):
+    @coalesced
+    async def get_exercises_by_team_id(self, team_id: int, params: ListParams = None):
         """Returns all exercises of a team"""
-        return self.client.table('exercise').select('*').eq('id_team', team_id).order('name').execute()
+        query = self.client.table('exercise').select(select_columns(params, 'name', ExerciseSummary)).is_('deleted_at', 'null').eq('id_team', team_id)
+        return await paginate(query, params, 'name')
     
-    def get_exercises_by_athlete_id(self, athlete_id: int):
+    @coalesced
+    async def get_exercises_by_athlete_id(self, athlete_id: int, params: ListParams = None):
         """Returns all exercises of an athlete"""
-        return self.client.table('exercise').select('*').eq('id_athlete', athlete_id).order('name').execute()
-    
-    def get_exercise_photo_path_by_id(self, exercise_id: int):
-        """Returns exercise photo path by ID"""
-        exercise = self.client.table('exercise').select('photo_path').eq('id', exercise_id).execute()
-        if not exercise.data or not exercise.data[0].get('photo_path'):
-            return None
-        
-        return exercise.data[0]['photo_path']
+        query = self.client.table('exercise').select(select_columns(params, 'name', ExerciseSummary)).is_('deleted_at', 'null').eq('id_athlete', athlete_id)
+        return await paginate(query, params, 'name')
     
-    def get_exercise_video_path_by_id(self, exercise_id: int):
-        """Returns exercise video path by ID"""
-        exercise = self.client.table('exercise').select('video_path').eq('id', exercise_id).execute()
-        if not exercise.data or not exercise.data[0].get('video_path'):
-            return None
-        
-        return exercise.data[0]['video_path']
-
-    def create_exercise(self, exercise: ExerciseCreate):
+    @invalidates('exercise', cache='media_key_cache')
+    async def create_exercise(self, exercise: ExerciseCreate):
         """Creates a new exercise"""
         data = {
             "id_type": exercise.id_type,
@@ -208,9 +355,10 @@ class SupabaseIntegration:
             "created_by": exercise.created_by,
             "created_at": exercise.created_at
         }
-        return self.client.table('exercise').insert(data).execute()
+        return await self.client.table('exercise').insert(data).execute()
     
-    def update_exercise(self, exercise_id: int, exercise_update: ExerciseUpdate):
+    @invalidates('exercise', cache='media_key_cache')
+    async def update_exercise(self, exercise_id: int, exercise_update: ExerciseUpdate):
         """Updates an exercise"""
         data = {}
         if exercise_update.id_type is not None:
@@ -231,48 +379,55 @@ class SupabaseIntegration:
             data["photo_path"] = exercise_update.photo_path
 
         if not data:
-            return self.client.table('exercise').select('*').eq('id', exercise_id).execute()
+            return await self.client.table('exercise').select('*').is_('deleted_at', 'null').eq('id', exercise_id).execute()
         
-        return self.client.table('exercise').update(data).eq('id', exercise_id).execute()
+        return await self.client.table('exercise').update(data).is_('deleted_at', 'null').eq('id', exercise_id).execute()
     
-    def delete_exercise(self, exercise_id: int):
+    @invalidates('exercise', cache='media_key_cache')
+    async def delete_exercise(self, exercise_id: int, deleted_by: str = None):
         """Deletes an exercise"""
-        return self.client.table('exercise').delete().eq('id', exercise_id).execute()
+        return await self.soft_delete('exercise', [exercise_id], deleted_by)
 
-    def get_all_type_exercises(self):
+    @cached('type_exercise', ttl=Env.REFERENCE_CACHE_TTL)
+    @coalesced
+    async def get_all_type_exercises(self, params: ListParams = None):
         """Returns all exercise types"""
-        return self.client.table('type_exercise').select('*').order('name').execute()
+        query = self.client.table('type_exercise').select(select_columns(params, 'name', TypeExerciseSummary)).is_('deleted_at', 'null')
+        return await paginate(query, params, 'name')
     
-    def get_type_exercise_by_id(self, type_id: int):
+    @cached('type_exercise:{type_id}', ttl=Env.REFERENCE_CACHE_TTL)
+    @coalesced
+    async def get_type_exercise_by_id(self, type_id: int):
         """Returns an exercise type by ID"""
-        return self.client.table('type_exercise').select('*').eq('id', type_id).execute()
+        return await self.client.table('type_exercise').select(projection(TypeExerciseSummary)).is_('deleted_at', 'null').eq('id', type_id).execute()
 
-    def get_all_sports(self):
+    @cached('sport', ttl=Env.REFERENCE_CACHE_TTL)
+    @coalesced
+    async def get_all_sports(self, params: ListParams = None):
         """Returns all sports"""
-        return self.client.table('sport').select('*').order('name').execute()
+        query = self.client.table('sport').select(select_columns(params, 'name', SportSummary)).is_('deleted_at', 'null')
+        return await paginate(query, params, 'name')
     
-    def get_sport_by_id(self, sport_id: int):
+    @cached('sport:{sport_id}', ttl=Env.REFERENCE_CACHE_TTL)
+    @coalesced
+    async def get_sport_by_id(self, sport_id: int):
         """Returns a sport by ID"""
-        return self.client.table('sport').select('*').eq('id', sport_id).execute()
+        return await self.client.table('sport').select(projection(SportSummary)).is_('deleted_at', 'null').eq('id', sport_id).execute()
     
-    def get_sport_photo_path_by_id(self, sport_id: int):
-        """Returns sport photo path by ID"""
-        sport = self.client.table('sport').select('photo_path').eq('id', sport_id).execute()
-        if not sport.data or not sport.data[0].get('photo_path'):
-            return None
-        
-        return sport.data[0]['photo_path']
-
-    def create_sport(self, sport: SportCreate):
+    @invalidates('sport')
+    @invalidates('sport', cache='media_key_cache')
+    async def create_sport(self, sport: SportCreate):
         """Creates a new sport"""
         data = {
             "name": sport.name,
             "description": sport.description,
             "photo_path": sport.photo_path
         }
-        return self.client.table('sport').insert(data).execute()
+        return await self.client.table('sport').insert(data).execute()
     
-    def update_sport(self, sport_id: int, sport_update: SportUpdate):
+    @invalidates('sport', 'sport:{sport_id}')
+    @invalidates('sport', cache='media_key_cache')
+    async def update_sport(self, sport_id: int, sport_update: SportUpdate):
         """Updates a sport"""
         data = {}
         if sport_update.name is not None:
@@ -283,35 +438,52 @@ class SupabaseIntegration:
             data["photo_path"] = sport_update.photo_path
 
         if not data:
-            return self.client.table('sport').select('*').eq('id', sport_id).execute()
+            return await self.client.table('sport').select('*').is_('deleted_at', 'null').eq('id', sport_id).execute()
         
-        return self.client.table('sport').update(data).eq('id', sport_id).execute()
+        return await self.client.table('sport').update(data).is_('deleted_at', 'null').eq('id', sport_id).execute()
     
-    def delete_sport(self, sport_id: int):
+    @invalidates('sport', 'sport:{sport_id}')
+    @invalidates('sport', cache='media_key_cache')
+    async def delete_sport(self, sport_id: int, deleted_by: str = None):
         """Deletes a sport"""
-        return self.client.table('sport').delete().eq('id', sport_id).execute()
+        return await self.soft_delete('sport', [sport_id], deleted_by)
 
-    def get_all_teams(self):
+    @cached('team')
+    @coalesced
+    async def get_all_teams(self, params: ListParams = None):
         """Returns all teams"""
-        return self.client.table('team').select('*').order('name').execute()
+        query = self.client.table('team').select(select_columns(params, 'name', TeamSummary)).is_('deleted_at', 'null')
+        return await paginate(query, params, 'name')
     
-    def get_team_by_id(self, team_id: int):
+    @cached('team:{team_id}')
+    @coalesced
+    async def get_team_by_id(self, team_id: int):
         """Returns a team by ID"""
-        return self.client.table('team').select('*').eq('id', team_id).execute()
-    
-    def get_team_photo_path_by_id(self, team_id: int):
-        """Returns team photo path by ID"""
-        team = self.client.table('team').select('photo_path').eq('id', team_id).execute()
-        if not team.data or not team.data[0].get('photo_path'):
-            return None
-        
-        return team.data[0]['photo_path']
-    
-    def get_athletes_by_team_id(self, team_id: int):
+        return await self.client.table('team').select(projection(TeamSummary)).is_('deleted_at', 'null').eq('id', team_id).execute()
+    
+    @coalesced
+    async def get_teams_with_details(self):
+        """Returns all teams with their coach, sport and enrolled athletes embedded in a single query"""
+        return await self.client.table('team').select(
+            f"{projection(TeamSummary)}, coach({projection(CoachSummary)}), sport({projection(SportSummary)}), "
+            f"enrollment(id, athlete({projection(AthleteSummary)}))"
+        ).is_('deleted_at', 'null').is_('coach.deleted_at', 'null').is_('sport.deleted_at', 'null').is_('enrollment.deleted_at', 'null').order('name').execute()
+    
+    @cached('team:{team_id}', 'enrollment', 'athlete')
+    @coalesced
+    async def get_athletes_by_team_id(self, team_id: int, params: ListParams = None):
         """Returns all athletes enrolled in a team"""
-        return self.client.table('enrollment').select('athlete(*)').eq('id_team', team_id).execute()
+        query = self.client.table('enrollment').select(f"id, athlete({select_columns(params, model=AthleteSummary)})").is_('deleted_at', 'null').eq('id_team', team_id)
+        return await paginate(query, params)
 
-    def create_team(self, team: TeamCreate):
+    @coalesced
+    async def get_athlete_ids_by_team_id(self, team_id: int):
+        """Returns the IDs of the athletes enrolled in a team"""
+        return await self.client.table('enrollment').select('id_athlete').is_('deleted_at', 'null').eq('id_team', team_id).execute()
+
+    @invalidates('team')
+    @invalidates('team', cache='media_key_cache')
+    async def create_team(self, team: TeamCreate):
         """Creates a new team"""
         data = {
             "id_coach": team.id_coach,
@@ -319,9 +491,11 @@ class SupabaseIntegration:
             "name": team.name,
             "photo_path": team.photo_path
         }
-        return self.client.table('team').insert(data).execute()
+        return await self.client.table('team').insert(data).execute()
     
-    def update_team(self, team_id: int, team_update: TeamUpdate):
+    @invalidates('team', 'team:{team_id}')
+    @invalidates('team', cache='media_key_cache')
+    async def update_team(self, team_id: int, team_update: TeamUpdate):
         """Updates a team"""
         data = {}
         if team_update.id_coach is not None:
@@ -334,31 +508,66 @@ class SupabaseIntegration:
             data["photo_path"] = team_update.photo_path
 
         if not data:
-            return self.client.table('team').select('*').eq('id', team_id).execute()
+            return await self.client.table('team').select('*').is_('deleted_at', 'null').eq('id', team_id).execute()
         
-        return self.client.table('team').update(data).eq('id', team_id).execute()
+        return await self.client.table('team').update(data).is_('deleted_at', 'null').eq('id', team_id).execute()
     
-    def delete_team(self, team_id: int):
+    @invalidates('team', 'team:{team_id}')
+    @invalidates('team', cache='media_key_cache')
+    async def delete_team(self, team_id: int, deleted_by: str = None):
         """Deletes a team"""
-        return self.client.table('team').delete().eq('id', team_id).execute()
+        return await self.soft_delete('team', [team_id], deleted_by)
     
-    def get_all_routines(self):
+    @coalesced
+    async def get_all_routines(self, params: ListParams = None):
         """Returns all routines"""
-        return self.client.table('routine').select('*').order('name').execute()
+        query = self.client.table('routine').select(select_columns(params, 'name', RoutineSummary)).is_('deleted_at', 'null')
+        return await paginate(query, params, 'name')
     
-    def get_routine_by_id(self, routine_id: int):
+    @coalesced
+    async def get_routine_by_id(self, routine_id: int):
         """Returns a routine by ID"""
-        return self.client.table('routine').select('*').eq('id', routine_id).execute()
+        return await self.client.table('routine').select(projection(RoutineSummary)).is_('deleted_at', 'null').eq('id', routine_id).execute()
     
-    def get_routines_by_athlete_id(self, athlete_id: int):
+    @coalesced
+    async def get_routines_by_athlete_id(self, athlete_id: int, params: ListParams = None):
         """Returns all routines of an athlete"""
-        return self.client.table('routine').select('*').eq('id_athlete', athlete_id).order('name').execute()
-    
-    def get_exercises_by_routine_id(self, routine_id: int):
+        query = self.client.table('routine').select(select_columns(params, 'name', RoutineSummary)).is_('deleted_at', 'null').eq('id_athlete', athlete_id)
+        return await paginate(query, params, 'name')
+    
+    @coalesced
+    async def get_schedule_by_athlete_id(self, athlete_id: int, start_date: str, end_date: str):
+        """Returns the routines of an athlete with their weekly slots, exercises and the excluded dates inside a date range"""
+        return await self.client.table('routine').select(
+            'id, name, routine_has_exercice(id, id_exercise, days_of_week, start_hour, end_hour, '
+            'exercise(id, name), routine_exercise_excluded_dates(excluded_date))'
+        ).is_('deleted_at', 'null').is_('routine_has_exercice.deleted_at', 'null').eq('id_athlete', athlete_id).gte(
+            'routine_has_exercice.routine_exercise_excluded_dates.excluded_date', start_date
+        ).lte(
+            'routine_has_exercice.routine_exercise_excluded_dates.excluded_date', end_date
+        ).execute()
+    
+    @coalesced
+    async def get_routine_exercises_by_athlete_id(self, athlete_id: int):
+        """Returns the weekly slots of every routine of an athlete"""
+        return await self.client.table('routine_has_exercice').select(
+            'id, id_routine, days_of_week, start_hour, end_hour, routine!inner(id_athlete)'
+        ).is_('deleted_at', 'null').eq('routine.id_athlete', athlete_id).execute()
+    
+    @coalesced
+    async def get_routine_exercises_by_athlete_ids(self, athlete_ids: List[int], days_of_week: str):
+        """Returns the slots of several athletes on one weekday in a single request"""
+        return await self.client.table('routine_has_exercice').select(
+            'start_hour, end_hour, routine!inner(id_athlete)'
+        ).is_('deleted_at', 'null').in_('routine.id_athlete', athlete_ids).eq('days_of_week', days_of_week).execute()
+    
+    @coalesced
+    async def get_exercises_by_routine_id(self, routine_id: int, params: ListParams = None):
         """Returns all exercises in a routine with their schedule"""
-        return self.client.table('routine_has_exercice').select('*, exercise(*)').eq('id_routine', routine_id).order('start_hour').execute()
+        query = self.client.table('routine_has_exercice').select(select_columns(params, model=RoutineExerciseWithExercise)).is_('deleted_at', 'null').eq('id_routine', routine_id)
+        return await paginate(query, params, 'start_hour')
     
-    def create_routine(self, routine: RoutineCreate):
+    async def create_routine(self, routine: RoutineCreate):
         """Creates a new routine"""
         data = {
             "id_athlete": routine.id_athlete,
@@ -366,9 +575,9 @@ class SupabaseIntegration:
             "created_at": routine.created_at,
             "created_by": routine.created_by
         }
-        return self.client.table('routine').insert(data).execute()
+        return await self.client.table('routine').insert(data).execute()
     
-    def update_routine(self, routine_id: int, routine_update: RoutineUpdate):
+    async def update_routine(self, routine_id: int, routine_update: RoutineUpdate):
         """Updates a routine"""
         data = {}
         if routine_update.name is not None:
@@ -376,15 +585,15 @@ class SupabaseIntegration:
             data["updated_by"] = routine_update.updated_by
 
         if not data:
-            return self.client.table('routine').select('*').eq('id', routine_id).execute()
+            return await self.client.table('routine').select('*').is_('deleted_at', 'null').eq('id', routine_id).execute()
         
-        return self.client.table('routine').update(data).eq('id', routine_id).execute()
+        return await self.client.table('routine').update(data).is_('deleted_at', 'null').eq('id', routine_id).execute()
     
-    def delete_routine(self, routine_id: int):
+    async def delete_routine(self, routine_id: int, deleted_by: str = None):
         """Deletes a routine"""
-        return self.client.table('routine').delete().eq('id', routine_id).execute()
+        return await self.soft_delete('routine', [routine_id], deleted_by)
     
-    def add_exercise_to_routine(self, routine_exercise: RoutineHasExerciseCreate):
+    async def add_exercise_to_routine(self, routine_exercise: RoutineHasExerciseCreate):
         """Adds an exercise to a routine"""
         data = {
             "id_routine": routine_exercise.id_routine,
@@ -395,25 +604,80 @@ class SupabaseIntegration:
             "created_at": routine_exercise.created_at,
             "created_by": routine_exercise.created_by
         }
-        return self.client.table('routine_has_exercice').insert(data).execute()
+        return await self.client.table('routine_has_exercice').insert(data).execute()
     
-    def remove_exercise_from_routine(self, routine_exercise_id: int):
+    async def remove_exercise_from_routine(self, routine_exercise_id: int, deleted_by: str = None):
         """Removes an exercise from a routine"""
-        return self.client.table('routine_has_exercice').delete().eq('id', routine_exercise_id).execute()
-    
-    def add_excluded_date(self, excluded_date: ExcludedDateCreate):
+        return await self.soft_delete('routine_has_exercice', [routine_exercise_id], deleted_by)
+    
+    async def add_exercises_to_routine(self, routine_exercises: List[RoutineHasExerciseCreate]):
+        """Adds several exercises to routines in a single multi-row insert"""
+        data = [
+            {
+                "id_routine": routine_exercise.id_routine,
+                "id_exercise": routine_exercise.id_exercise,
+                "days_of_week": routine_exercise.days_of_week,
+                "start_hour": routine_exercise.start_hour,
+                "end_hour": routine_exercise.end_hour,
+                "created_at": routine_exercise.created_at,
+                "created_by": routine_exercise.created_by
+            }
+            for routine_exercise in routine_exercises
+        ]
+        return await self.client.table('routine_has_exercice').insert(data).execute()
+    
+    async def update_routine_exercises(self, routine_exercises: List[RoutineHasExerciseUpdate]):
+        """Updates several live routine exercises in a single statement (see migrations/003_bulk_updates.sql)"""
+        data = [
+            {
+                "id": routine_exercise.id,
+                "id_routine": routine_exercise.id_routine,
+                "id_exercise": routine_exercise.id_exercise,
+                "days_of_week": routine_exercise.days_of_week,
+                "start_hour": routine_exercise.start_hour,
+                "end_hour": routine_exercise.end_hour,
+                "updated_at": routine_exercise.updated_at,
+                "updated_by": routine_exercise.updated_by
+            }
+            for routine_exercise in routine_exercises
+        ]
+        return await self.client.rpc('update_routine_exercises', {'items': data}).execute()
+    
+    async def remove_exercises_from_routine(self, routine_exercise_ids: List[int], deleted_by: str = None):
+        """Soft-deletes several routine exercises in a single statement"""
+        return await self.soft_delete('routine_has_exercice', routine_exercise_ids, deleted_by)
+    
+    async def add_excluded_date(self, excluded_date: ExcludedDateCreate):
         """Adds an excluded date to a routine exercise"""
         data = {
             "id_routine_has_exercise": excluded_date.id_routine_has_exercise,
-            "excluded_date": excluded_date.excluded_date.isoformat(),
+            "excluded_date": excluded_date.excluded_date,
             "reason": excluded_date.reason
         }
-        return self.client.table('routine_exercise_excluded_dates').insert(data).execute()
+        return await self.client.table('routine_exercise_excluded_dates').insert(data).execute()
     
-    def get_excluded_dates(self, routine_exercise_id: int):
+    @coalesced
+    async def get_excluded_dates(self, routine_exercise_id: int, params: ListParams = None):
         """Returns all excluded dates for a routine exercise"""
-        return self.client.table('routine_exercise_excluded_dates').select('*').eq('id_routine_has_exercise', routine_exercise_id).order('excluded_date').execute()
+        query = self.client.table('routine_exercise_excluded_dates').select(select_columns(params, 'excluded_date', ExcludedDateSummary)).eq('id_routine_has_exercise', routine_exercise_id)
+        return await paginate(query, params, 'excluded_date')
     
-    def delete_excluded_date(self, excluded_date_id: int):
+    async def delete_excluded_date(self, excluded_date_id: int):
         """Deletes an excluded date"""
-        return self.client.table('routine_exercise_excluded_dates').delete().eq('id', excluded_date_id).execute()
\ No newline at end of file
+        return await self.client.table('routine_exercise_excluded_dates').delete().eq('id', excluded_date_id).execute()
+    
+    async def add_excluded_dates(self, excluded_dates: List[ExcludedDateCreate]):
+        """Adds several excluded dates in a single multi-row insert"""
+        data = [
+            {
+                "id_routine_has_exercise": excluded_date.id_routine_has_exercise,
+                "excluded_date": excluded_date.excluded_date,
+                "reason": excluded_date.reason
+            }
+            for excluded_date in excluded_dates
+        ]
+        return await self.client.table('routine_exercise_excluded_dates').insert(data).execute()
+    
+    async def delete_excluded_dates(self, excluded_date_ids: List[int]):
+        """Deletes several excluded dates in a single statement"""
+        return await self.client.table('routine_exercise_excluded_dates').delete().in_('id', excluded_date_ids).execute()
\ No newline at end of file
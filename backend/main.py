@@ -1,4 +1,5 @@
 import uvicorn
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, APIRouter
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List
@@ -16,8 +17,47 @@ from routes.exercise_routes import api_exercises
 from routes.enrollment_routes import api_enrollments
 from routes.routine_routes import api_routines
 from routes.type_exercise_routes import api_type_exercises
+from routes.dashboard_routes import api_dashboard
+from routes.monitoring_routes import api_monitoring, api_metrics
+from routes.media_routes import api_media
+from integrations.supabase_integration import SupabaseIntegration
+from integrations.postgres_integration import PostgresIntegration
+from configs.env import Env
+from utils.intervals import ScheduleIndex
+from utils.change_feed import create_change_feed
+from utils.soft_delete import create_purge_job
+from utils.http_cache import HTTPCacheMiddleware
+from utils.thumbnails import shutdown_pool
+from utils.s3 import AsyncS3Client
+from utils.metrics import MetricsMiddleware, TimedJSONResponse
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One Supabase client (and HTTP connection pool) per worker process, or a
+    # Postgres connection pool with DATABASE_BACKEND=postgres
+    integration = PostgresIntegration if Env.DATABASE_BACKEND == "postgres" else SupabaseIntegration
+    app.state.supabase_integration = await integration.connect()
+    app.state.schedule_index = ScheduleIndex(Env.SCHEDULE_INDEX_TTL, Env.SCHEDULE_INDEX_SIZE)
+    # Invalidates this worker's caches when other workers write
+    app.state.change_feed = create_change_feed(app.state.supabase_integration, app.state.schedule_index)
+    if app.state.change_feed:
+        await app.state.change_feed.start()
+    # Hard-deletes old tombstones of soft-deleted rows
+    app.state.purge_job = create_purge_job(app.state.supabase_integration)
+    if app.state.purge_job:
+        await app.state.purge_job.start()
+    try:
+        yield
+    finally:
+        if app.state.purge_job:
+            await app.state.purge_job.stop()
+        if app.state.change_feed:
+            await app.state.change_feed.stop()
+        await app.state.supabase_integration.close()
+        shutdown_pool()
+        AsyncS3Client.close()
+
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
 api = APIRouter(prefix="/api", tags=["API"])
 
 # Attention: Adjust the origins list to match your frontend's URL
@@ -33,8 +73,19 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
+app.add_middleware(
+    HTTPCacheMiddleware,
+    json_max_age=Env.HTTP_CACHE_JSON_MAX_AGE,
+    media_max_age=Env.HTTP_CACHE_MEDIA_MAX_AGE,
+    max_staleness=max(Env.READ_CACHE_TTL, Env.REFERENCE_CACHE_TTL),
+)
+
+# Outermost, so the timings cover every other middleware
+app.add_middleware(MetricsMiddleware, server_timing=Env.SERVER_TIMING)
+
 # Include routers
 api.include_router(api_athletes)
 api.include_router(api_teams)
@@ -44,8 +95,12 @@ api.include_router(api_exercises)
 api.include_router(api_enrollments)
 api.include_router(api_routines)
 api.include_router(api_type_exercises)
+api.include_router(api_dashboard)
+api.include_router(api_monitoring)
+api.include_router(api_media)
 
 app.include_router(api)
+app.include_router(api_metrics)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8080)
\ No newline at end of file
@@ -0,0 +1,134 @@
+"""Applies the versioned SQL migrations of public/architecture/migrations
+
+Files are named <version>_<name>.sql and applied in version order, each in
+its own transaction (unless it starts with "-- migrate: no-transaction", for
+CREATE INDEX CONCURRENTLY). Applied versions are recorded with a checksum in
+schema_migrations, and editing an applied file is refused.
+
+Usage (from backend/):
+    python migrate.py                 # apply pending migrations to DATABASE_URL
+    python migrate.py --status        # list applied and pending migrations
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from configs.env import Env
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'public', 'architecture', 'migrations')
+FILE_PATTERN = re.compile(r'^(\d+)_([a-z0-9_]+)\.sql$')
+NO_TRANSACTION = '-- migrate: no-transaction'
+
+class MigrationError(Exception):
+    pass
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, encoding='utf-8') as file:
+            self.sql = file.read()
+        self.checksum = hashlib.sha256(self.sql.encode()).hexdigest()
+        self.transactional = not self.sql.lstrip().startswith(NO_TRANSACTION)
+
+def load_migrations(directory=MIGRATIONS_DIR):
+    """Returns the migrations of a directory in version order"""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = FILE_PATTERN.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    versions = [migration.version for migration in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError(f"Duplicate migration versions in {directory}")
+    return sorted(migrations, key=lambda migration: migration.version)
+
+def _applied(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            checksum TEXT NOT NULL,
+            applied_at TIMESTAMP(0) WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc')
+        )
+    """)
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return dict(cursor.fetchall())
+
+def pending(applied, migrations):
+    """Returns the migrations not applied yet, refusing applied files that were edited"""
+    for migration in migrations:
+        checksum = applied.get(migration.version)
+        if checksum is not None and checksum != migration.checksum:
+            raise MigrationError(f"Migration {migration.version:03d}_{migration.name} was edited after being applied")
+    return [migration for migration in migrations if migration.version not in applied]
+
+def migrate(dsn, directory=MIGRATIONS_DIR, log=print):
+    """Applies the pending migrations and returns them"""
+    import psycopg2
+
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection, connection.cursor() as cursor:
+            # Held until the connection closes, so concurrent runs (e.g. several
+            # containers starting at once) apply each migration only once
+            cursor.execute("SELECT pg_advisory_lock(hashtext('schema_migrations'))")
+            to_apply = pending(_applied(cursor), load_migrations(directory))
+        for migration in to_apply:
+            log(f"Applying {migration.version:03d}_{migration.name}")
+            record = (migration.version, migration.name, migration.checksum)
+            if migration.transactional:
+                with connection, connection.cursor() as cursor:
+                    cursor.execute(migration.sql)
+                    cursor.execute("INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)", record)
+            else:
+                connection.autocommit = True
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute(migration.sql)
+                        cursor.execute("INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)", record)
+                finally:
+                    connection.autocommit = False
+        return to_apply
+    finally:
+        connection.close()
+
+def status(dsn, directory=MIGRATIONS_DIR):
+    """Returns (migration, applied) pairs"""
+    import psycopg2
+
+    connection = psycopg2.connect(dsn)
+    try:
+        with connection, connection.cursor() as cursor:
+            applied = _applied(cursor)
+    finally:
+        connection.close()
+    migrations = load_migrations(directory)
+    pending(applied, migrations)
+    return [(migration, migration.version in applied) for migration in migrations]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dsn', default=Env.DATABASE_URL, help="Postgres connection string (default: DATABASE_URL)")
+    parser.add_argument('--status', action='store_true', help="List migrations instead of applying them")
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("Set DATABASE_URL or pass --dsn")
+    try:
+        if args.status:
+            for migration, applied in status(args.dsn):
+                print(f"{'applied' if applied else 'pending'}  {migration.version:03d}_{migration.name}")
+        else:
+            applied = migrate(args.dsn)
+            print(f"Applied {len(applied)} migration(s)")
+    except MigrationError as e:
+        sys.exit(str(e))
+
+if __name__ == '__main__':
+    main()
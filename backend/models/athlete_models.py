@@ -13,4 +13,10 @@ class AthleteUpdate(AthleteBase, Update):
     pass
 
 class Athlete(AthleteBase, Response):
-    pass
\ No newline at end of file
+    pass
+
+class AthleteSummary(BaseModel):
+    """Columns returned by athlete reads (audit columns left out)"""
+    id: int
+    name: Optional[str] = None
+    photo_path: Optional[str] = None
@@ -14,4 +14,11 @@ class CoachUpdate(CoachBase, Update):
     pass
 
 class Coach(CoachBase, Response):
-    pass
\ No newline at end of file
+    pass
+
+class CoachSummary(BaseModel):
+    """Columns returned by coach reads (audit columns left out)"""
+    id: int
+    id_level: Optional[int] = None
+    name: Optional[str] = None
+    photo_path: Optional[str] = None
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List
 
 class Create(BaseModel):
     created_at: Optional[str] = None
@@ -15,6 +15,10 @@ class Delete(BaseModel):
     deleted_at: Optional[str] = None
     deleted_by: Optional[str] = None
 
+class BulkDelete(BaseModel):
+    ids: List[int]
+    deleted_by: Optional[str] = None
+
 class Response(BaseModel):
     id: int
     created_at: str
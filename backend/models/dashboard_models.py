@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from models.athlete_models import AthleteSummary
+from models.coach_models import CoachSummary
+from models.sport_models import SportSummary
+from models.team_models import TeamSummary
+
+class DashboardTeam(TeamSummary):
+    coach: Optional[CoachSummary] = None
+    sport: Optional[SportSummary] = None
+    athletes: List[AthleteSummary] = []
+
+class Dashboard(BaseModel):
+    teams: List[DashboardTeam]
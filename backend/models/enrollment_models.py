@@ -1,5 +1,8 @@
 from pydantic import BaseModel
+from typing import Optional
 from models.crud_models import Create, Update, Response
+from models.athlete_models import AthleteSummary
+from models.team_models import TeamSummary
 
 class EnrollmentBase(BaseModel):
     id: int
@@ -13,4 +16,16 @@ class EnrollmentUpdate(EnrollmentBase, Update):
     pass
 
 class Enrollment(EnrollmentBase, Response):
-    pass
\ No newline at end of file
+    pass
+
+class EnrollmentSummary(BaseModel):
+    """Columns returned by enrollment reads (audit columns left out)"""
+    id: int
+    id_team: Optional[int] = None
+    id_athlete: Optional[int] = None
+
+class EnrollmentWithAthlete(EnrollmentSummary):
+    athlete: Optional[AthleteSummary] = None
+
+class EnrollmentWithTeam(EnrollmentSummary):
+    team: Optional[TeamSummary] = None
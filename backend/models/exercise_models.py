@@ -19,4 +19,16 @@ class ExerciseUpdate(ExerciseBase, Update):
     pass
 
 class Exercise(ExerciseBase, Response):
-    pass
\ No newline at end of file
+    pass
+
+class ExerciseSummary(BaseModel):
+    """Columns returned by exercise reads (audit columns left out)"""
+    id: int
+    id_type: Optional[int] = None
+    id_sport: Optional[int] = None
+    name: Optional[str] = None
+    reps: Optional[int] = None
+    sets: Optional[int] = None
+    description: Optional[str] = None
+    video_path: Optional[str] = None
+    photo_path: Optional[str] = None
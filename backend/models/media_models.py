@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Optional, List, Literal
+
+class UploadRequest(BaseModel):
+    entity: Literal['athlete', 'coach', 'team', 'sport', 'exercise']
+    entity_id: int
+    kind: Literal['photo', 'video'] = 'photo'
+    filename: str
+    content_type: str
+    size: int
+
+class UploadPart(BaseModel):
+    part_number: int
+    etag: str
+
+class UploadComplete(BaseModel):
+    entity: Literal['athlete', 'coach', 'team', 'sport', 'exercise']
+    entity_id: int
+    kind: Literal['photo', 'video'] = 'photo'
+    key: str
+    upload_id: Optional[str] = None
+    parts: Optional[List[UploadPart]] = None
+
+class UploadAbort(BaseModel):
+    entity: Literal['athlete', 'coach', 'team', 'sport', 'exercise']
+    entity_id: int
+    kind: Literal['photo', 'video'] = 'photo'
+    key: str
+    upload_id: str
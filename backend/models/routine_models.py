@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from typing import Optional, List
 from models.crud_models import Create, Update, Response
+from models.exercise_models import ExerciseSummary
 
 class RoutineBase(BaseModel):
     name: str
@@ -37,6 +38,9 @@ class RoutineHasExerciseBase(BaseModel):
 class RoutineHasExerciseCreate(RoutineHasExerciseBase, Create):
     pass
 
+class RoutineHasExerciseUpdate(RoutineHasExerciseBase, Update):
+    pass
+
 class RoutineHasExercise(RoutineHasExerciseBase, Response):
     pass
 
@@ -52,4 +56,33 @@ class ExcludedDateDelete(BaseModel):
     id: int
 
 class ExcludedDate(ExcludedDateBase):
-    id: int
\ No newline at end of file
+    id: int
+
+class RoutineSummary(BaseModel):
+    """Columns returned by routine reads (created_at is shown in the routine list)"""
+    id: int
+    id_athlete: Optional[int] = None
+    name: Optional[str] = None
+    created_at: Optional[str] = None
+
+class TypeExerciseSummary(BaseModel):
+    id: int
+    name: Optional[str] = None
+
+class RoutineExerciseSummary(BaseModel):
+    """Weekly slot of an exercise in a routine"""
+    id: int
+    id_routine: Optional[int] = None
+    id_exercise: Optional[int] = None
+    days_of_week: Optional[str] = None
+    start_hour: Optional[str] = None
+    end_hour: Optional[str] = None
+
+class RoutineExerciseWithExercise(RoutineExerciseSummary):
+    exercise: Optional[ExerciseSummary] = None
+
+class ExcludedDateSummary(BaseModel):
+    id: int
+    id_routine_has_exercise: Optional[int] = None
+    excluded_date: Optional[str] = None
+    reason: Optional[str] = None
@@ -14,4 +14,11 @@ class SportUpdate(SportBase, Update):
     pass
 
 class Sport(SportBase, Response):
-    pass
\ No newline at end of file
+    pass
+
+class SportSummary(BaseModel):
+    """Columns returned by sport reads (audit columns left out)"""
+    id: int
+    name: Optional[str] = None
+    description: Optional[str] = None
+    photo_path: Optional[str] = None
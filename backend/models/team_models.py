@@ -15,4 +15,12 @@ class TeamUpdate(TeamBase, Update):
     pass
 
 class Team(TeamBase, Response):
-    pass
\ No newline at end of file
+    pass
+
+class TeamSummary(BaseModel):
+    """Columns returned by team reads (audit columns left out)"""
+    id: int
+    id_coach: Optional[int] = None
+    id_sport: Optional[int] = None
+    name: Optional[str] = None
+    photo_path: Optional[str] = None
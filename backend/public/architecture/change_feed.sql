@@ -0,0 +1,40 @@
+-- Sends every row change of the cached tables on the "cache_invalidation"
+-- channel, so each API worker can drop its stale cache entries
+-- (CHANGE_FEED=postgres). Long text columns are left out to stay well under
+-- the 8000 byte NOTIFY payload limit.
+CREATE OR REPLACE FUNCTION notify_cache_invalidation() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('cache_invalidation', json_build_object(
+        'table', TG_TABLE_NAME,
+        'type', TG_OP,
+        'record', CASE WHEN TG_OP = 'DELETE' THEN NULL ELSE to_jsonb(NEW) - 'description' END,
+        'old_record', CASE WHEN TG_OP = 'INSERT' THEN NULL ELSE to_jsonb(OLD) - 'description' END
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    cached_table TEXT;
+BEGIN
+    FOREACH cached_table IN ARRAY ARRAY[
+        'athlete', 'coach', 'team', 'sport', 'exercise', 'type_exercise',
+        'enrollment', 'routine', 'routine_has_exercice'
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS cache_invalidation ON %I', cached_table);
+        EXECUTE format(
+            'CREATE TRIGGER cache_invalidation AFTER INSERT OR UPDATE OR DELETE ON %I '
+            'FOR EACH ROW EXECUTE FUNCTION notify_cache_invalidation()',
+            cached_table
+        );
+    END LOOP;
+END;
+$$;
+
+-- With CHANGE_FEED=realtime instead, publish the same tables to Supabase
+-- Realtime; REPLICA IDENTITY FULL makes old rows carry their foreign keys:
+-- ALTER PUBLICATION supabase_realtime ADD TABLE athlete, coach, team, sport, exercise,
+--     type_exercise, enrollment, routine, routine_has_exercice;
+-- ALTER TABLE routine REPLICA IDENTITY FULL;
+-- ALTER TABLE routine_has_exercice REPLICA IDENTITY FULL;
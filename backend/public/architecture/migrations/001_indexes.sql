@@ -0,0 +1,54 @@
+-- Indexes for the access patterns of the integrations, one per purpose.
+--
+-- Soft delete: the API sets deleted_at/deleted_by instead of deleting rows and
+-- every read filters on "deleted_at IS NULL". Lists ordered by name only read
+-- live rows, so their indexes are partial and stay small however many
+-- tombstones accumulate.
+--
+-- Foreign keys: Postgres does not index them itself, and the purge job's hard
+-- deletes check every referencing row, tombstones included, so these are not
+-- partial. Each one also carries the columns its live lists are ordered or
+-- filtered by, instead of a second partial index on the same key; tombstones
+-- only last SOFT_DELETE_RETENTION_DAYS, so filtering them out costs little.
+--
+-- The tombstone indexes serve the purge job (SOFT_DELETE_PURGE_INTERVAL).
+-- On a busy database run each statement with CREATE INDEX CONCURRENTLY instead.
+
+-- Lists ordered by name
+CREATE INDEX IF NOT EXISTS athlete_live_name_idx ON "athlete" ("name", "id") WHERE "deleted_at" IS NULL;
+CREATE INDEX IF NOT EXISTS coach_live_name_idx ON "coach" ("name", "id") WHERE "deleted_at" IS NULL;
+CREATE INDEX IF NOT EXISTS team_live_name_idx ON "team" ("name", "id") WHERE "deleted_at" IS NULL;
+CREATE INDEX IF NOT EXISTS sport_live_name_idx ON "sport" ("name", "id") WHERE "deleted_at" IS NULL;
+CREATE INDEX IF NOT EXISTS type_exercise_live_name_idx ON "type_exercise" ("name", "id") WHERE "deleted_at" IS NULL;
+CREATE INDEX IF NOT EXISTS exercise_live_name_idx ON "exercise" ("name", "id") WHERE "deleted_at" IS NULL;
+CREATE INDEX IF NOT EXISTS routine_live_name_idx ON "routine" ("name", "id") WHERE "deleted_at" IS NULL;
+
+-- Foreign keys, with the lists, cascades and lookups by parent
+CREATE INDEX IF NOT EXISTS team_id_coach_idx ON "team" ("id_coach", "name", "id");
+CREATE INDEX IF NOT EXISTS team_id_sport_idx ON "team" ("id_sport");
+CREATE INDEX IF NOT EXISTS routine_id_athlete_idx ON "routine" ("id_athlete", "name", "id");
+CREATE INDEX IF NOT EXISTS enrollment_id_team_idx ON "enrollment" ("id_team", "id") INCLUDE ("id_athlete");
+CREATE INDEX IF NOT EXISTS enrollment_id_athlete_idx ON "enrollment" ("id_athlete", "id");
+-- Slots of a routine, and of several athletes' routines on one weekday
+-- (free-window search of a team, overlap trigger of migration 004)
+CREATE INDEX IF NOT EXISTS routine_has_exercice_id_routine_idx
+    ON "routine_has_exercice" ("id_routine", "days_of_week", "start_hour", "id") INCLUDE ("end_hour");
+CREATE INDEX IF NOT EXISTS routine_has_exercice_id_exercise_idx ON "routine_has_exercice" ("id_exercise");
+-- Excluded dates have no deleted_at and are removed with their routine
+-- exercise; listed in keyset order (excluded_date, id)
+CREATE INDEX IF NOT EXISTS routine_exercise_excluded_dates_slot_idx
+    ON "routine_exercise_excluded_dates" ("id_routine_has_exercise", "excluded_date", "id");
+CREATE INDEX IF NOT EXISTS exercise_id_sport_idx ON "exercise" ("id_sport");
+CREATE INDEX IF NOT EXISTS exercise_id_type_idx ON "exercise" ("id_type");
+CREATE INDEX IF NOT EXISTS coach_id_level_idx ON "coach" ("id_level");
+
+-- Tombstones, scanned by the purge job
+CREATE INDEX IF NOT EXISTS athlete_deleted_idx ON "athlete" ("deleted_at", "id") WHERE "deleted_at" IS NOT NULL;
+CREATE INDEX IF NOT EXISTS coach_deleted_idx ON "coach" ("deleted_at", "id") WHERE "deleted_at" IS NOT NULL;
+CREATE INDEX IF NOT EXISTS team_deleted_idx ON "team" ("deleted_at", "id") WHERE "deleted_at" IS NOT NULL;
+CREATE INDEX IF NOT EXISTS sport_deleted_idx ON "sport" ("deleted_at", "id") WHERE "deleted_at" IS NOT NULL;
+CREATE INDEX IF NOT EXISTS type_exercise_deleted_idx ON "type_exercise" ("deleted_at", "id") WHERE "deleted_at" IS NOT NULL;
+CREATE INDEX IF NOT EXISTS exercise_deleted_idx ON "exercise" ("deleted_at", "id") WHERE "deleted_at" IS NOT NULL;
+CREATE INDEX IF NOT EXISTS routine_deleted_idx ON "routine" ("deleted_at", "id") WHERE "deleted_at" IS NOT NULL;
+CREATE INDEX IF NOT EXISTS enrollment_deleted_idx ON "enrollment" ("deleted_at", "id") WHERE "deleted_at" IS NOT NULL;
+CREATE INDEX IF NOT EXISTS routine_has_exercice_deleted_idx ON "routine_has_exercice" ("deleted_at", "id") WHERE "deleted_at" IS NOT NULL;
@@ -0,0 +1,4 @@
+-- One live enrollment per team/athlete pair (a repeated POST /enrollments
+-- answers 409). Kept apart from 001 since it fails if live duplicates already
+-- exist; soft-delete them first.
+CREATE UNIQUE INDEX IF NOT EXISTS enrollment_live_team_athlete_key ON "enrollment" ("id_team", "id_athlete") WHERE "deleted_at" IS NULL;
@@ -0,0 +1,29 @@
+-- Bulk updates of PUT /enrollments/bulk and PUT /routines/exercises/bulk.
+-- A plain UPDATE joined to the JSON items: ids that are unknown or
+-- soft-deleted match no row (and are reported as 404) instead of being
+-- inserted, and the NOT NULL audit columns of the existing rows are kept.
+
+CREATE OR REPLACE FUNCTION update_enrollments(items json) RETURNS SETOF "enrollment" LANGUAGE sql AS $$
+    UPDATE "enrollment" t SET
+        "id_team" = j."id_team",
+        "id_athlete" = j."id_athlete",
+        "updated_at" = coalesce(j."updated_at", now() AT TIME ZONE 'utc'),
+        "updated_by" = j."updated_by"
+    FROM json_populate_recordset(NULL::"enrollment", items) j
+    WHERE t."id" = j."id" AND t."deleted_at" IS NULL
+    RETURNING t.*
+$$;
+
+CREATE OR REPLACE FUNCTION update_routine_exercises(items json) RETURNS SETOF "routine_has_exercice" LANGUAGE sql AS $$
+    UPDATE "routine_has_exercice" t SET
+        "id_routine" = j."id_routine",
+        "id_exercise" = j."id_exercise",
+        "days_of_week" = j."days_of_week",
+        "start_hour" = j."start_hour",
+        "end_hour" = j."end_hour",
+        "updated_at" = coalesce(j."updated_at", now() AT TIME ZONE 'utc'),
+        "updated_by" = j."updated_by"
+    FROM json_populate_recordset(NULL::"routine_has_exercice", items) j
+    WHERE t."id" = j."id" AND t."deleted_at" IS NULL
+    RETURNING t.*
+$$;
@@ -0,0 +1,41 @@
+-- Live routine exercise slots of one athlete may not overlap on the same weekday.
+-- The API checks a per-worker index first for per-item results, but only the
+-- database sees every worker's writes, so the invariant is enforced here.
+-- An exclusion constraint cannot reach the athlete through routine, so a
+-- trigger re-checks under a transaction-level advisory lock per athlete:
+-- concurrent writes for the same athlete are serialized across all workers
+-- and each check sees the slots committed before it. Overlaps are raised as
+-- exclusion_violation (23P01) with the overlapped slot IDs as detail.
+
+CREATE OR REPLACE FUNCTION check_routine_slot_overlap() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    athlete_id INTEGER;
+    overlapped TEXT;
+BEGIN
+    SELECT "id_athlete" INTO athlete_id FROM "routine" WHERE "id" = NEW."id_routine";
+    IF athlete_id IS NULL THEN
+        RETURN NEW;
+    END IF;
+    PERFORM pg_advisory_xact_lock(hashtext('routine_schedule'), athlete_id);
+    SELECT string_agg(s."id"::text, ',' ORDER BY s."id") INTO overlapped
+    FROM "routine_has_exercice" s JOIN "routine" r ON r."id" = s."id_routine"
+    WHERE r."id_athlete" = athlete_id
+      AND r."deleted_at" IS NULL
+      AND s."deleted_at" IS NULL
+      AND s."id" <> NEW."id"
+      AND s."days_of_week" = NEW."days_of_week"
+      AND s."start_hour" < NEW."end_hour"
+      AND s."end_hour" > NEW."start_hour";
+    IF overlapped IS NOT NULL THEN
+        RAISE EXCEPTION 'Schedule overlaps routine exercises %', overlapped
+            USING ERRCODE = 'exclusion_violation', DETAIL = overlapped;
+    END IF;
+    RETURN NEW;
+END
+$$;
+
+DROP TRIGGER IF EXISTS routine_has_exercice_no_overlap ON "routine_has_exercice";
+CREATE TRIGGER routine_has_exercice_no_overlap
+    BEFORE INSERT OR UPDATE OF "id_routine", "days_of_week", "start_hour", "end_hour", "deleted_at" ON "routine_has_exercice"
+    FOR EACH ROW WHEN (NEW."deleted_at" IS NULL)
+    EXECUTE FUNCTION check_routine_slot_overlap();
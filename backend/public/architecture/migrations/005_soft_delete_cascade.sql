@@ -0,0 +1,39 @@
+-- Soft deletes with their cascade in a single call, hence a single
+-- transaction: a failure halfway no longer leaves a deleted athlete with
+-- live enrollments or routines. Marks the live rows of target whose key is
+-- in ids, then recursively the rows they own, and returns the target rows
+-- as JSON. The parent -> child pairs mirror CASCADE in utils/soft_delete.py,
+-- which the API uses to invalidate its caches.
+
+CREATE OR REPLACE FUNCTION soft_delete_cascade(target text, ids integer[], deleted_by text, key text DEFAULT 'id') RETURNS json LANGUAGE plpgsql AS $$
+DECLARE
+    deleted json;
+    deleted_ids integer[];
+    child record;
+BEGIN
+    IF target NOT IN ('athlete', 'coach', 'team', 'sport', 'exercise', 'type_exercise', 'enrollment', 'routine', 'routine_has_exercice') THEN
+        RAISE EXCEPTION 'Table % has no soft delete', target USING ERRCODE = 'invalid_parameter_value';
+    END IF;
+    EXECUTE format(
+        'WITH d AS (UPDATE %I SET "deleted_at" = date_trunc(''second'', now() AT TIME ZONE ''utc''), "deleted_by" = $2 '
+        'WHERE %I = ANY($1) AND "deleted_at" IS NULL RETURNING *) '
+        'SELECT coalesce(json_agg(d), ''[]''::json), coalesce(array_agg(d."id"), ''{}'') FROM d',
+        target, key
+    ) INTO deleted, deleted_ids USING ids, deleted_by;
+    IF cardinality(deleted_ids) > 0 THEN
+        FOR child IN
+            SELECT * FROM (VALUES
+                ('athlete', 'enrollment', 'id_athlete'),
+                ('athlete', 'routine', 'id_athlete'),
+                ('team', 'enrollment', 'id_team'),
+                ('routine', 'routine_has_exercice', 'id_routine'),
+                ('exercise', 'routine_has_exercice', 'id_exercise')
+            ) c(parent, child_table, foreign_key)
+            WHERE c.parent = target
+        LOOP
+            PERFORM soft_delete_cascade(child.child_table, deleted_ids, deleted_by, child.foreign_key);
+        END LOOP;
+    END IF;
+    RETURN deleted;
+END
+$$;
@@ -1,26 +1,34 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from models.athlete_models import AthleteBase, AthleteCreate, AthleteUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from datetime import date
+from configs.env import Env
+from models.athlete_models import AthleteBase, AthleteCreate, AthleteUpdate, AthleteSummary
+from models.enrollment_models import EnrollmentWithTeam
 from controllers.athlete_controller import AthleteController
+from routes.dependencies import get_athlete_controller
+from utils.pagination import ListParams, page_model, page_response
+from utils.thumbnails import ImageVariant, get_image_variant
+from utils.media import MediaRequest, serve_media
+from utils.metrics import TimedRoute
 
-api_athletes = APIRouter(prefix="/athletes", tags=["Athletes"])
+api_athletes = APIRouter(prefix="/athletes", tags=["Athletes"], route_class=TimedRoute)
 
-@api_athletes.get("/")
-def get_all_athletes():
+@api_athletes.get("/", response_model=page_model(AthleteSummary), response_model_exclude_unset=True)
+async def get_all_athletes(response: Response, params: ListParams = Depends(), controller: AthleteController = Depends(get_athlete_controller)):
     """Return all athletes"""
     try:
-        controller = AthleteController()
-        result = controller.get_all_athletes()
-        return result.data
+        result = await controller.get_all_athletes(params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_athletes.get("/{athlete_id}")
-def get_athlete(athlete_id: int):
+@api_athletes.get("/{athlete_id}", response_model=AthleteSummary, response_model_exclude_unset=True)
+async def get_athlete(athlete_id: int, controller: AthleteController = Depends(get_athlete_controller)):
     """Returns an athlete by ID"""
     try:
-        controller = AthleteController()
-        result = controller.get_athlete_by_id(athlete_id)
+        result = await controller.get_athlete_by_id(athlete_id)
         if not result.data:
             raise HTTPException(status_code=404, detail="Athlete not found")
         return result.data[0] if result.data else None
@@ -30,35 +38,29 @@ def get_athlete(athlete_id: int):
         raise HTTPException(status_code=500, detail=str(e))
     
 @api_athletes.get("/{athlete_id}/photo")
-def get_athlete_photo(athlete_id: int):
+async def get_athlete_photo(athlete_id: int, media: MediaRequest = Depends(), variant: Optional[ImageVariant] = Depends(get_image_variant), controller: AthleteController = Depends(get_athlete_controller)):
     """Returns the photo of an athlete by ID"""
-    try:
-        controller = AthleteController()
-        file_bytes, content_type = controller.get_athlete_photo(athlete_id)
-        if not file_bytes:
-            raise HTTPException(status_code=404, detail="Photo not found")
-        return Response(content=file_bytes, media_type=content_type)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await serve_media(
+        lambda: controller.get_athlete_photo_url(athlete_id),
+        lambda: controller.get_athlete_photo(athlete_id, *media.headers, variant),
+        "Photo not found",
+        variant
+    )
 
 @api_athletes.post("/", status_code=201)
-def create_athlete(athlete: AthleteCreate):
+async def create_athlete(athlete: AthleteCreate, controller: AthleteController = Depends(get_athlete_controller)):
     """Creates a new athlete"""
     try:
-        controller = AthleteController()
-        result = controller.create_athlete(athlete)
+        result = await controller.create_athlete(athlete)
         return result.data[0] if result.data else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_athletes.put("/{athlete_id}")
-def update_athlete(athlete_id: int, athlete: AthleteUpdate):
+async def update_athlete(athlete_id: int, athlete: AthleteUpdate, controller: AthleteController = Depends(get_athlete_controller)):
     """Updates an athlete"""
     try:
-        controller = AthleteController()
-        result = controller.update_athlete(athlete_id, athlete)
+        result = await controller.update_athlete(athlete_id, athlete)
         if not result.data:
             raise HTTPException(status_code=404, detail="Athlete not found")
         return result.data[0] if result.data else None
@@ -68,21 +70,49 @@ def update_athlete(athlete_id: int, athlete: AthleteUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_athletes.delete("/{athlete_id}", status_code=204)
-def delete_athlete(athlete_id: int):
+async def delete_athlete(athlete_id: int, deleted_by: Optional[str] = Query(None, description="User recorded as deleted_by"), controller: AthleteController = Depends(get_athlete_controller)):
     """Deletes an athlete"""
     try:
-        controller = AthleteController()
-        controller.delete_athlete(athlete_id)
+        await controller.delete_athlete(athlete_id, deleted_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_athletes.get("/{athlete_id}/teams")
-def get_teams_by_athlete(athlete_id: int):
+@api_athletes.get("/{athlete_id}/teams", response_model=page_model(EnrollmentWithTeam), response_model_exclude_unset=True)
+async def get_teams_by_athlete(athlete_id: int, response: Response, params: ListParams = Depends(), controller: AthleteController = Depends(get_athlete_controller)):
     """Returns all teams of the athlete"""
     try:
-        controller = AthleteController()
-        result = controller.get_teams_by_athlete(athlete_id)
-        return result.data
+        result = await controller.get_teams_by_athlete_id(athlete_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_athletes.get("/{athlete_id}/calendar")
+async def get_athlete_calendar(athlete_id: int, start: date = Query(..., alias="from"), end: date = Query(..., alias="to"), controller: AthleteController = Depends(get_athlete_controller)):
+    """Returns the exercise occurrences of an athlete between two dates, excluded dates removed"""
+    try:
+        if end < start:
+            raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+        if (end - start).days >= Env.CALENDAR_MAX_DAYS:
+            raise HTTPException(status_code=400, detail=f"Date range must not exceed {Env.CALENDAR_MAX_DAYS} days")
+        occurrences = await controller.get_athlete_calendar(athlete_id, start, end)
+        return {
+            "athlete_id": athlete_id,
+            "from": start.isoformat(),
+            "to": end.isoformat(),
+            "occurrences": occurrences
+        }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_athletes.get("/{athlete_id}/conflicts")
+async def get_athlete_conflicts(athlete_id: int, controller: AthleteController = Depends(get_athlete_controller)):
+    """Returns the overlapping routine slots of an athlete"""
+    try:
+        conflicts = await controller.get_athlete_conflicts(athlete_id)
+        return {"athlete_id": athlete_id, "conflicts": conflicts}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
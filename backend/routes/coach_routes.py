@@ -1,26 +1,32 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from models.coach_models import CoachBase, CoachCreate, CoachUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from models.coach_models import CoachBase, CoachCreate, CoachUpdate, CoachSummary
+from models.team_models import TeamSummary
 from controllers.coach_controller import CoachController
+from routes.dependencies import get_coach_controller
+from utils.pagination import ListParams, page_model, page_response
+from utils.thumbnails import ImageVariant, get_image_variant
+from utils.media import MediaRequest, serve_media
+from utils.metrics import TimedRoute
 
-api_coaches = APIRouter(prefix="/coaches", tags=["Coaches"])
+api_coaches = APIRouter(prefix="/coaches", tags=["Coaches"], route_class=TimedRoute)
 
-@api_coaches.get("/")
-def get_all_coaches():
+@api_coaches.get("/", response_model=page_model(CoachSummary), response_model_exclude_unset=True)
+async def get_all_coaches(response: Response, params: ListParams = Depends(), controller: CoachController = Depends(get_coach_controller)):
     """Return all coaches"""
     try:
-        controller = CoachController()
-        result = controller.get_all_coaches()
-        return result.data
+        result = await controller.get_all_coaches(params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_coaches.get("/{coach_id}")
-def get_coach(coach_id: int):
+@api_coaches.get("/{coach_id}", response_model=CoachSummary, response_model_exclude_unset=True)
+async def get_coach(coach_id: int, controller: CoachController = Depends(get_coach_controller)):
     """Returns a coach by ID"""
     try:
-        controller = CoachController()
-        result = controller.get_coach_by_id(coach_id)
+        result = await controller.get_coach_by_id(coach_id)
         if not result.data:
             raise HTTPException(status_code=404, detail="Coach not found")
         return result.data[0] if result.data else None
@@ -30,35 +36,29 @@ def get_coach(coach_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_coaches.get("/{coach_id}/photo")
-def get_coach_photo(coach_id: int):
+async def get_coach_photo(coach_id: int, media: MediaRequest = Depends(), variant: Optional[ImageVariant] = Depends(get_image_variant), controller: CoachController = Depends(get_coach_controller)):
     """Returns the photo of a coach by ID"""
-    try:
-        controller = CoachController()
-        file_bytes, content_type = controller.get_coach_photo(coach_id)
-        if not file_bytes:
-            raise HTTPException(status_code=404, detail="Photo not found")
-        return Response(content=file_bytes, media_type=content_type)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await serve_media(
+        lambda: controller.get_coach_photo_url(coach_id),
+        lambda: controller.get_coach_photo(coach_id, *media.headers, variant),
+        "Photo not found",
+        variant
+    )
 
 @api_coaches.post("/", status_code=201)
-def create_coach(coach: CoachCreate):
+async def create_coach(coach: CoachCreate, controller: CoachController = Depends(get_coach_controller)):
     """Creates a new coach"""
     try:
-        controller = CoachController()
-        result = controller.create_coach(coach)
+        result = await controller.create_coach(coach)
         return result.data[0] if result.data else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_coaches.put("/{coach_id}")
-def update_coach(coach_id: int, coach: CoachUpdate):
+async def update_coach(coach_id: int, coach: CoachUpdate, controller: CoachController = Depends(get_coach_controller)):
     """Updates a coach"""
     try:
-        controller = CoachController()
-        result = controller.update_coach(coach_id, coach)
+        result = await controller.update_coach(coach_id, coach)
         if not result.data:
             raise HTTPException(status_code=404, detail="Coach not found")
         return result.data[0] if result.data else None
@@ -68,20 +68,20 @@ def update_coach(coach_id: int, coach: CoachUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_coaches.delete("/{coach_id}", status_code=204)
-def delete_coach(coach_id: int):
+async def delete_coach(coach_id: int, deleted_by: Optional[str] = Query(None, description="User recorded as deleted_by"), controller: CoachController = Depends(get_coach_controller)):
     """Deletes a coach"""
     try:
-        controller = CoachController()
-        controller.delete_coach(coach_id)
+        await controller.delete_coach(coach_id, deleted_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_coaches.get("/{coach_id}/teams")
-def get_teams_by_coach(coach_id: int):
+@api_coaches.get("/{coach_id}/teams", response_model=page_model(TeamSummary), response_model_exclude_unset=True)
+async def get_teams_by_coach(coach_id: int, response: Response, params: ListParams = Depends(), controller: CoachController = Depends(get_coach_controller)):
     """Returns all teams of the coach"""
     try:
-        controller = CoachController()
-        result = controller.get_teams_by_coach_id(coach_id)
-        return result.data
+        result = await controller.get_teams_by_coach_id(coach_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Depends, HTTPException
+from controllers.dashboard_controller import DashboardController
+from models.dashboard_models import Dashboard
+from routes.dependencies import get_dashboard_controller
+from utils.metrics import TimedRoute
+
+api_dashboard = APIRouter(prefix="/dashboard", tags=["Dashboard"], route_class=TimedRoute)
+
+@api_dashboard.get("/", response_model=Dashboard)
+async def get_dashboard(controller: DashboardController = Depends(get_dashboard_controller)):
+    """Returns every team with its coach, sport and athletes in one response"""
+    try:
+        teams = await controller.get_teams()
+        return {"teams": teams}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
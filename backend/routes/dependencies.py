@@ -0,0 +1,60 @@
+from fastapi import Depends, Request
+from integrations.supabase_integration import SupabaseIntegration
+from controllers.athlete_controller import AthleteController
+from controllers.coach_controller import CoachController
+from controllers.dashboard_controller import DashboardController
+from controllers.enrollment_controller import EnrollmentController
+from controllers.exercise_controller import ExerciseController
+from controllers.media_controller import MediaController
+from controllers.routine_controller import RoutineController
+from controllers.sport_controller import SportController
+from controllers.team_controller import TeamController
+from controllers.type_exercise_controller import TypeExerciseController
+from utils.intervals import ScheduleIndex
+
+async def get_supabase_integration(request: Request) -> SupabaseIntegration:
+    """Returns the shared Supabase integration created at application startup"""
+    return request.app.state.supabase_integration
+
+async def get_schedule_index(request: Request) -> ScheduleIndex:
+    """Returns the process-wide index of athlete schedule slots"""
+    return request.app.state.schedule_index
+
+async def get_athlete_controller(
+    supabase_integration: SupabaseIntegration = Depends(get_supabase_integration),
+    schedule_index: ScheduleIndex = Depends(get_schedule_index)
+):
+    return AthleteController(supabase_integration, schedule_index)
+
+async def get_coach_controller(supabase_integration: SupabaseIntegration = Depends(get_supabase_integration)):
+    return CoachController(supabase_integration)
+
+async def get_dashboard_controller(supabase_integration: SupabaseIntegration = Depends(get_supabase_integration)):
+    return DashboardController(supabase_integration)
+
+async def get_enrollment_controller(supabase_integration: SupabaseIntegration = Depends(get_supabase_integration)):
+    return EnrollmentController(supabase_integration)
+
+async def get_exercise_controller(
+    supabase_integration: SupabaseIntegration = Depends(get_supabase_integration),
+    schedule_index: ScheduleIndex = Depends(get_schedule_index)
+):
+    return ExerciseController(supabase_integration, schedule_index)
+
+async def get_media_controller(supabase_integration: SupabaseIntegration = Depends(get_supabase_integration)):
+    return MediaController(supabase_integration)
+
+async def get_routine_controller(
+    supabase_integration: SupabaseIntegration = Depends(get_supabase_integration),
+    schedule_index: ScheduleIndex = Depends(get_schedule_index)
+):
+    return RoutineController(supabase_integration, schedule_index)
+
+async def get_sport_controller(supabase_integration: SupabaseIntegration = Depends(get_supabase_integration)):
+    return SportController(supabase_integration)
+
+async def get_team_controller(supabase_integration: SupabaseIntegration = Depends(get_supabase_integration)):
+    return TeamController(supabase_integration)
+
+async def get_type_exercise_controller(supabase_integration: SupabaseIntegration = Depends(get_supabase_integration)):
+    return TypeExerciseController(supabase_integration)
@@ -1,25 +1,80 @@
-from fastapi import APIRouter, HTTPException
-from models.enrollment_models import EnrollmentBase, EnrollmentCreate, EnrollmentUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from postgrest.exceptions import APIError
+from models.crud_models import BulkDelete
+from models.enrollment_models import EnrollmentBase, EnrollmentCreate, EnrollmentUpdate, EnrollmentSummary, EnrollmentWithAthlete, EnrollmentWithTeam
 from controllers.enrollment_controller import EnrollmentController
+from routes.dependencies import get_enrollment_controller
+from utils.pagination import ListParams, page_model, page_response
+from utils.bulk import check_batch_size
+from utils.metrics import TimedRoute
 
-api_enrollments = APIRouter(prefix="/enrollments", tags=["Enrollments"])
+api_enrollments = APIRouter(prefix="/enrollments", tags=["Enrollments"], route_class=TimedRoute)
 
-@api_enrollments.get("/")
-def get_all_enrollments():
+# Postgres error raised by the enrollment_live_team_athlete_key index
+UNIQUE_VIOLATION = '23505'
+
+@api_enrollments.get("/", response_model=page_model(EnrollmentSummary), response_model_exclude_unset=True)
+async def get_all_enrollments(response: Response, params: ListParams = Depends(), controller: EnrollmentController = Depends(get_enrollment_controller)):
     """Return all enrollments"""
     try:
-        controller = EnrollmentController()
-        result = controller.get_all_enrollments()
-        return result.data
+        result = await controller.get_all_enrollments(params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_enrollments.post("/bulk")
+async def create_enrollments(enrollments: List[EnrollmentCreate], controller: EnrollmentController = Depends(get_enrollment_controller)):
+    """Creates several enrollments in a single insert; pairs already enrolled are reported as 409"""
+    try:
+        check_batch_size(enrollments)
+        results = await controller.create_enrollments(enrollments)
+        return {"results": results}
+    except HTTPException:
+        raise
+    except APIError as e:
+        # A pair enrolled by a concurrent request since the check
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=409, detail="An athlete would be enrolled twice in the same team")
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_enrollments.put("/bulk")
+async def update_enrollments(enrollments: List[EnrollmentUpdate], controller: EnrollmentController = Depends(get_enrollment_controller)):
+    """Updates several live enrollments in a single statement; unknown or deleted IDs are reported as 404"""
+    try:
+        check_batch_size(enrollments)
+        results = await controller.update_enrollments(enrollments)
+        return {"results": results}
+    except HTTPException:
+        raise
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=409, detail="An athlete would be enrolled twice in the same team")
+        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_enrollments.post("/bulk-delete")
+async def delete_enrollments(payload: BulkDelete, controller: EnrollmentController = Depends(get_enrollment_controller)):
+    """Deletes several enrollments in a single statement"""
+    try:
+        check_batch_size(payload.ids)
+        results = await controller.delete_enrollments(payload.ids, payload.deleted_by)
+        return {"results": results}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_enrollments.get("/{enrollment_id}")
-def get_enrollment(enrollment_id: int):
+@api_enrollments.get("/{enrollment_id}", response_model=EnrollmentSummary, response_model_exclude_unset=True)
+async def get_enrollment(enrollment_id: int, controller: EnrollmentController = Depends(get_enrollment_controller)):
     """Returns an enrollment by ID"""
     try:
-        controller = EnrollmentController()
-        result = controller.get_enrollment_by_id(enrollment_id)
+        result = await controller.get_enrollment_by_id(enrollment_id)
         if not result.data:
             raise HTTPException(status_code=404, detail="Enrollment not found")
         return result.data[0] if result.data else None
@@ -28,42 +83,46 @@ def get_enrollment(enrollment_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_enrollments.get("/team/{team_id}")
-def get_enrollments_by_team(team_id: int):
+@api_enrollments.get("/team/{team_id}", response_model=page_model(EnrollmentWithAthlete), response_model_exclude_unset=True)
+async def get_enrollments_by_team(team_id: int, response: Response, params: ListParams = Depends(), controller: EnrollmentController = Depends(get_enrollment_controller)):
     """Returns all enrollments of a team"""
     try:
-        controller = EnrollmentController()
-        result = controller.get_enrollments_by_team(team_id)
-        return result.data
+        result = await controller.get_enrollments_by_team(team_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_enrollments.get("/athlete/{athlete_id}")
-def get_enrollments_by_athlete(athlete_id: int):
+@api_enrollments.get("/athlete/{athlete_id}", response_model=page_model(EnrollmentWithTeam), response_model_exclude_unset=True)
+async def get_enrollments_by_athlete(athlete_id: int, response: Response, params: ListParams = Depends(), controller: EnrollmentController = Depends(get_enrollment_controller)):
     """Returns all enrollments of an athlete"""
     try:
-        controller = EnrollmentController()
-        result = controller.get_enrollments_by_athlete(athlete_id)
-        return result.data
+        result = await controller.get_enrollments_by_athlete(athlete_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_enrollments.post("/", status_code=201)
-def create_enrollment(enrollment: EnrollmentCreate):
+async def create_enrollment(enrollment: EnrollmentCreate, controller: EnrollmentController = Depends(get_enrollment_controller)):
     """Creates a new enrollment"""
     try:
-        controller = EnrollmentController()
-        result = controller.create_enrollment(enrollment)
+        result = await controller.create_enrollment(enrollment)
         return result.data[0] if result.data else None
+    except APIError as e:
+        if e.code == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=409, detail="Athlete already enrolled in this team")
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_enrollments.put("/{enrollment_id}")
-def update_enrollment(enrollment_id: int, enrollment: EnrollmentUpdate):
+async def update_enrollment(enrollment_id: int, enrollment: EnrollmentUpdate, controller: EnrollmentController = Depends(get_enrollment_controller)):
     """Updates an enrollment"""
     try:
-        controller = EnrollmentController()
-        result = controller.update_enrollment(enrollment_id, enrollment)
+        result = await controller.update_enrollment(enrollment_id, enrollment)
         if not result.data:
             raise HTTPException(status_code=404, detail="Enrollment not found")
         return result.data[0] if result.data else None
@@ -73,10 +132,9 @@ def update_enrollment(enrollment_id: int, enrollment: EnrollmentUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_enrollments.delete("/{enrollment_id}", status_code=204)
-def delete_enrollment(enrollment_id: int):
+async def delete_enrollment(enrollment_id: int, deleted_by: Optional[str] = Query(None, description="User recorded as deleted_by"), controller: EnrollmentController = Depends(get_enrollment_controller)):
     """Deletes an enrollment"""
     try:
-        controller = EnrollmentController()
-        controller.delete_enrollment(enrollment_id)
+        await controller.delete_enrollment(enrollment_id, deleted_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,27 +1,32 @@
-from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import Response
-from models.exercise_models import ExerciseBase, ExerciseCreate, ExerciseUpdate
+from fastapi import APIRouter, Depends, HTTPException, Response, Query
+from typing import List, Optional
+from models.exercise_models import ExerciseBase, ExerciseCreate, ExerciseUpdate, ExerciseSummary
 from controllers.exercise_controller import ExerciseController
+from routes.dependencies import get_exercise_controller
+from utils.pagination import ListParams, page_model, page_response
+from utils.thumbnails import ImageVariant, get_image_variant
+from utils.media import MediaRequest, serve_media
 from datetime import datetime
+from utils.metrics import TimedRoute
 
-api_exercises = APIRouter(prefix="/exercises", tags=["Exercises"])
+api_exercises = APIRouter(prefix="/exercises", tags=["Exercises"], route_class=TimedRoute)
 
-@api_exercises.get("/")
-def get_all_exercises():
+@api_exercises.get("/", response_model=page_model(ExerciseSummary), response_model_exclude_unset=True)
+async def get_all_exercises(response: Response, params: ListParams = Depends(), controller: ExerciseController = Depends(get_exercise_controller)):
     """Return all exercises"""
     try:
-        controller = ExerciseController()
-        result = controller.get_all_exercises()
-        return result.data
+        result = await controller.get_all_exercises(params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_exercises.get("/{exercise_id}")
-def get_exercise(exercise_id: int):
+@api_exercises.get("/{exercise_id}", response_model=ExerciseSummary, response_model_exclude_unset=True)
+async def get_exercise(exercise_id: int, controller: ExerciseController = Depends(get_exercise_controller)):
     """Returns an exercise by ID"""
     try:
-        controller = ExerciseController()
-        result = controller.get_exercise_by_id(exercise_id)
+        result = await controller.get_exercise_by_id(exercise_id)
         if not result.data:
             raise HTTPException(status_code=404, detail="Exercise not found")
         return result.data[0] if result.data else None
@@ -30,72 +35,63 @@ def get_exercise(exercise_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_exercises.get("/team/{team_id}")
-def get_exercises_by_team(team_id: int):
+@api_exercises.get("/team/{team_id}", response_model=page_model(ExerciseSummary), response_model_exclude_unset=True)
+async def get_exercises_by_team(team_id: int, response: Response, params: ListParams = Depends(), controller: ExerciseController = Depends(get_exercise_controller)):
     """Returns all exercises of a team"""
     try:
-        controller = ExerciseController()
-        result = controller.get_exercises_by_team(team_id)
-        return result.data
+        result = await controller.get_exercises_by_team(team_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_exercises.get("/athlete/{athlete_id}")
-def get_exercises_by_athlete(athlete_id: int):
+@api_exercises.get("/athlete/{athlete_id}", response_model=page_model(ExerciseSummary), response_model_exclude_unset=True)
+async def get_exercises_by_athlete(athlete_id: int, response: Response, params: ListParams = Depends(), controller: ExerciseController = Depends(get_exercise_controller)):
     """Returns all exercises of an athlete"""
     try:
-        controller = ExerciseController()
-        result = controller.get_exercises_by_athlete(athlete_id)
-        return result.data
+        result = await controller.get_exercises_by_athlete(athlete_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_exercises.get("/{exercise_id}/photo")
-def get_exercise_photo(exercise_id: int):
+async def get_exercise_photo(exercise_id: int, media: MediaRequest = Depends(), variant: Optional[ImageVariant] = Depends(get_image_variant), controller: ExerciseController = Depends(get_exercise_controller)):
     """Returns the photo of an exercise by ID"""
-    try:
-        controller = ExerciseController()
-        file_bytes, content_type = controller.get_exercise_photo(exercise_id)
-        if not file_bytes:
-            raise HTTPException(status_code=404, detail="Photo not found")
-        return Response(content=file_bytes, media_type=content_type)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await serve_media(
+        lambda: controller.get_exercise_photo_url(exercise_id),
+        lambda: controller.get_exercise_photo(exercise_id, *media.headers, variant),
+        "Photo not found",
+        variant
+    )
 
 @api_exercises.get("/{exercise_id}/video")
-def get_exercise_video(exercise_id: int):
+async def get_exercise_video(exercise_id: int, media: MediaRequest = Depends(), controller: ExerciseController = Depends(get_exercise_controller)):
     """Returns the video of an exercise by ID"""
-    try:
-        controller = ExerciseController()
-        file_bytes, content_type = controller.get_exercise_video(exercise_id)
-        if not file_bytes:
-            raise HTTPException(status_code=404, detail="Video not found")
-        return Response(content=file_bytes, media_type=content_type)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await serve_media(
+        lambda: controller.get_exercise_video_url(exercise_id),
+        lambda: controller.get_exercise_video(exercise_id, *media.headers),
+        "Video not found"
+    )
 
 @api_exercises.post("/", status_code=201)
-def create_exercise(exercise: ExerciseCreate, user: str = Query(...)):
+async def create_exercise(exercise: ExerciseCreate, user: str = Query(...), controller: ExerciseController = Depends(get_exercise_controller)):
     """Creates a new exercise"""
     try:
-        controller = ExerciseController()
         exercise.created_at = datetime.now().isoformat()
         exercise.created_by = user
-        result = controller.create_exercise(exercise)
+        result = await controller.create_exercise(exercise)
         return result.data[0] if result.data else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_exercises.put("/{exercise_id}")
-def update_exercise(exercise_id: int, exercise: ExerciseUpdate):
+async def update_exercise(exercise_id: int, exercise: ExerciseUpdate, controller: ExerciseController = Depends(get_exercise_controller)):
     """Updates an exercise"""
     try:
-        controller = ExerciseController()
-        result = controller.update_exercise(exercise_id, exercise)
+        result = await controller.update_exercise(exercise_id, exercise)
         if not result.data:
             raise HTTPException(status_code=404, detail="Exercise not found")
         return result.data[0] if result.data else None
@@ -105,10 +101,9 @@ def update_exercise(exercise_id: int, exercise: ExerciseUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_exercises.delete("/{exercise_id}", status_code=204)
-def delete_exercise(exercise_id: int):
+async def delete_exercise(exercise_id: int, deleted_by: Optional[str] = Query(None, description="User recorded as deleted_by"), controller: ExerciseController = Depends(get_exercise_controller)):
     """Deletes an exercise"""
     try:
-        controller = ExerciseController()
-        controller.delete_exercise(exercise_id)
+        await controller.delete_exercise(exercise_id, deleted_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,121 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+from configs.env import Env
+from controllers.media_controller import MediaController, max_upload_size
+from models.media_models import UploadRequest, UploadComplete, UploadAbort
+from routes.dependencies import get_media_controller
+from utils.s3 import ObjectTooLargeError
+from utils.thumbnails import ImageVariant, get_image_variant
+from utils.metrics import TimedRoute
+
+api_media = APIRouter(prefix="/media", tags=["Media"], route_class=TimedRoute)
+
+def parse_ids(name: str, value: Optional[str]):
+    """Parses a comma-separated list of IDs from a query parameter"""
+    if not value:
+        return []
+    try:
+        return list(dict.fromkeys(int(item) for item in value.split(',') if item.strip()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"'{name}' must be a comma-separated list of IDs")
+
+def check_kind(entity: str, kind: str):
+    """Rejects files of a kind the entity has no column for"""
+    if kind == 'video' and entity != 'exercise':
+        raise HTTPException(status_code=400, detail="Only exercises have videos")
+
+def check_key(entity: str, entity_id: int, key: str):
+    """Rejects S3 keys that were not issued for uploads to this entity"""
+    if not key.startswith(f"{entity}/{entity_id}/"):
+        raise HTTPException(status_code=400, detail="Key does not belong to this entity")
+
+@api_media.get("/photos")
+async def get_photos(
+    athletes: Optional[str] = Query(None, description="Comma-separated athlete IDs"),
+    coaches: Optional[str] = Query(None, description="Comma-separated coach IDs"),
+    teams: Optional[str] = Query(None, description="Comma-separated team IDs"),
+    sports: Optional[str] = Query(None, description="Comma-separated sport IDs"),
+    exercises: Optional[str] = Query(None, description="Comma-separated exercise IDs"),
+    variant: Optional[ImageVariant] = Depends(get_image_variant),
+    controller: MediaController = Depends(get_media_controller)
+):
+    """Returns presigned URLs for the photos of many athletes, coaches, teams, sports and exercises in one response"""
+    try:
+        requested = {
+            'athletes': ('athlete', athletes),
+            'coaches': ('coach', coaches),
+            'teams': ('team', teams),
+            'sports': ('sport', sports),
+            'exercises': ('exercise', exercises)
+        }
+        ids_by_table = {}
+        for name, (table, value) in requested.items():
+            ids = parse_ids(name, value)
+            if ids:
+                ids_by_table[table] = ids
+        total = sum(len(ids) for ids in ids_by_table.values())
+        if not total:
+            raise HTTPException(status_code=400, detail="No IDs requested")
+        if total > Env.MEDIA_BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=413, detail=f"At most {Env.MEDIA_BATCH_MAX_ITEMS} photos per request")
+
+        photos = await controller.get_photos(ids_by_table, variant)
+        return {name: photos[table] for name, (table, _) in requested.items() if table in photos}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_media.post("/uploads", status_code=201)
+async def create_upload(upload: UploadRequest, controller: MediaController = Depends(get_media_controller)):
+    """Returns a presigned POST form, or presigned part URLs for large videos, to upload a photo or video straight to S3"""
+    try:
+        check_kind(upload.entity, upload.kind)
+        if not upload.content_type.startswith(f"{'image' if upload.kind == 'photo' else 'video'}/"):
+            raise HTTPException(status_code=400, detail=f"Invalid content type for a {upload.kind}")
+        max_size = max_upload_size(upload.kind)
+        if not 0 < upload.size <= max_size:
+            raise HTTPException(status_code=413, detail=f"A {upload.kind} must be at most {max_size} bytes")
+        result = await controller.create_upload(upload)
+        if result is False:
+            raise HTTPException(status_code=404, detail=f"{upload.entity.capitalize()} not found")
+        if not result:
+            raise HTTPException(status_code=502, detail="Could not start the upload")
+        return result
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_media.post("/uploads/complete")
+async def complete_upload(upload: UploadComplete, controller: MediaController = Depends(get_media_controller)):
+    """Finishes an upload and records the uploaded file on its athlete, coach, team, sport or exercise"""
+    try:
+        check_kind(upload.entity, upload.kind)
+        check_key(upload.entity, upload.entity_id, upload.key)
+        if upload.upload_id and not upload.parts:
+            raise HTTPException(status_code=400, detail="Multipart uploads need their parts")
+        result = await controller.complete_upload(upload)
+        if result is None:
+            raise HTTPException(status_code=409, detail="Upload not found or incomplete")
+        if not result.data:
+            raise HTTPException(status_code=404, detail=f"{upload.entity.capitalize()} not found")
+        return result.data[0]
+    except ObjectTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_media.post("/uploads/abort", status_code=204)
+async def abort_upload(upload: UploadAbort, controller: MediaController = Depends(get_media_controller)):
+    """Cancels a multipart upload and discards its parts"""
+    try:
+        check_key(upload.entity, upload.entity_id, upload.key)
+        if await controller.abort_upload(upload) is False:
+            raise HTTPException(status_code=404, detail=f"{upload.entity.capitalize()} not found")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
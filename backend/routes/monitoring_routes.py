@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+from integrations.supabase_integration import SupabaseIntegration
+from routes.dependencies import get_supabase_integration
+from utils.metrics import TimedRoute, render_metrics
+
+api_monitoring = APIRouter(prefix="/monitoring", tags=["Monitoring"], route_class=TimedRoute)
+# Served at the root, where Prometheus scrapes by default
+api_metrics = APIRouter(tags=["Monitoring"], route_class=TimedRoute)
+
+@api_monitoring.get("/cache")
+async def get_cache_stats(request: Request, supabase_integration: SupabaseIntegration = Depends(get_supabase_integration)):
+    """Returns hit/miss counters of the in-process caches, coalesced Supabase reads and change feed activity"""
+    try:
+        change_feed = getattr(request.app.state, 'change_feed', None)
+        return {
+            "read": supabase_integration.read_cache.stats(),
+            "media_keys": supabase_integration.media_key_cache.stats(),
+            "single_flight": supabase_integration.single_flight.stats() if supabase_integration.single_flight else None,
+            "change_feed": change_feed.invalidator.stats() if change_feed else None
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_monitoring.get("/purge")
+async def get_purge_stats(request: Request):
+    """Returns the activity of the soft-delete purge job, or null when it is disabled"""
+    purge_job = getattr(request.app.state, 'purge_job', None)
+    return purge_job.stats() if purge_job else None
+
+@api_metrics.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Returns request latency histograms in the Prometheus text format"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -1,26 +1,33 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, Query
 from datetime import datetime
-from models.routine_models import RoutineCreate, RoutineUpdate, RoutineHasExerciseCreate, ExcludedDateCreate
+from typing import List, Optional
+from models.crud_models import BulkDelete
+from models.routine_models import RoutineCreate, RoutineUpdate, RoutineHasExerciseCreate, RoutineHasExerciseUpdate, ExcludedDateCreate, RoutineSummary, RoutineExerciseWithExercise, ExcludedDateSummary
 from controllers.routine_controller import RoutineController
+from routes.dependencies import get_routine_controller
+from utils.pagination import ListParams, page_model, page_response
+from utils.bulk import check_batch_size
+from utils.intervals import ScheduleConflictError
+from utils.metrics import TimedRoute
 
-api_routines = APIRouter(prefix="/routines", tags=["Routines"])
+api_routines = APIRouter(prefix="/routines", tags=["Routines"], route_class=TimedRoute)
 
-@api_routines.get("/")
-def get_all_routines():
+@api_routines.get("/", response_model=page_model(RoutineSummary), response_model_exclude_unset=True)
+async def get_all_routines(response: Response, params: ListParams = Depends(), controller: RoutineController = Depends(get_routine_controller)):
     """Return all routines"""
     try:
-        controller = RoutineController()
-        result = controller.get_all_routines()
-        return result.data
+        result = await controller.get_all_routines(params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_routines.get("/{routine_id}")
-def get_routine(routine_id: int):
+@api_routines.get("/{routine_id}", response_model=RoutineSummary, response_model_exclude_unset=True)
+async def get_routine(routine_id: int, controller: RoutineController = Depends(get_routine_controller)):
     """Returns a routine by ID"""
     try:
-        controller = RoutineController()
-        result = controller.get_routine_by_id(routine_id)
+        result = await controller.get_routine_by_id(routine_id)
         if not result.data:
             raise HTTPException(status_code=404, detail="Routine not found")
         return result.data[0] if result.data else None
@@ -29,44 +36,44 @@ def get_routine(routine_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_routines.get("/athlete/{athlete_id}")
-def get_routines_by_athlete(athlete_id: int):
+@api_routines.get("/athlete/{athlete_id}", response_model=page_model(RoutineSummary), response_model_exclude_unset=True)
+async def get_routines_by_athlete(athlete_id: int, response: Response, params: ListParams = Depends(), controller: RoutineController = Depends(get_routine_controller)):
     """Returns all routines of an athlete"""
     try:
-        controller = RoutineController()
-        result = controller.get_routines_by_athlete(athlete_id)
-        return result.data
+        result = await controller.get_routines_by_athlete(athlete_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_routines.get("/{routine_id}/exercises")
-def get_exercises_by_routine(routine_id: int):
+@api_routines.get("/{routine_id}/exercises", response_model=page_model(RoutineExerciseWithExercise), response_model_exclude_unset=True)
+async def get_exercises_by_routine(routine_id: int, response: Response, params: ListParams = Depends(), controller: RoutineController = Depends(get_routine_controller)):
     """Returns all exercises in a routine with their schedule"""
     try:
-        controller = RoutineController()
-        result = controller.get_exercises_by_routine(routine_id)
-        return result.data
+        result = await controller.get_exercises_by_routine(routine_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_routines.post("/", status_code=201)
-def create_routine(routine: RoutineCreate, user: str):
+async def create_routine(routine: RoutineCreate, user: str, controller: RoutineController = Depends(get_routine_controller)):
     """Creates a new routine"""
     try:
-        controller = RoutineController()
         routine.created_at = datetime.now().isoformat()
         routine.created_by = user
-        result = controller.create_routine(routine)
+        result = await controller.create_routine(routine)
         return result.data[0] if result.data else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_routines.put("/{routine_id}")
-def update_routine(routine_id: int, routine: RoutineUpdate):
+async def update_routine(routine_id: int, routine: RoutineUpdate, controller: RoutineController = Depends(get_routine_controller)):
     """Updates a routine"""
     try:
-        controller = RoutineController()
-        result = controller.update_routine(routine_id, routine)
+        result = await controller.update_routine(routine_id, routine)
         if not result.data:
             raise HTTPException(status_code=404, detail="Routine not found")
         return result.data[0] if result.data else None
@@ -76,60 +83,131 @@ def update_routine(routine_id: int, routine: RoutineUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_routines.delete("/{routine_id}", status_code=204)
-def delete_routine(routine_id: int):
+async def delete_routine(routine_id: int, deleted_by: Optional[str] = Query(None, description="User recorded as deleted_by"), controller: RoutineController = Depends(get_routine_controller)):
     """Deletes a routine"""
     try:
-        controller = RoutineController()
-        controller.delete_routine(routine_id)
+        await controller.delete_routine(routine_id, deleted_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_routines.post("/{routine_id}/exercises", status_code=201)
-def add_exercise_to_routine(routine_exercise: RoutineHasExerciseCreate, user: str = Query(...)):
+async def add_exercise_to_routine(routine_exercise: RoutineHasExerciseCreate, user: str = Query(...), controller: RoutineController = Depends(get_routine_controller)):
     """Adds an exercise to a routine"""
     try:
         routine_exercise.created_at = datetime.now().isoformat()
         routine_exercise.created_by = user
-        controller = RoutineController()
-        result = controller.add_exercise_to_routine(routine_exercise)
+        result = await controller.add_exercise_to_routine(routine_exercise)
         return result.data[0] if result.data else None
+    except ScheduleConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "routine_exercise_ids": e.routine_exercise_ids})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_routines.post("/{routine_id}/exercises/bulk")
+async def add_exercises_to_routine(routine_id: int, routine_exercises: List[RoutineHasExerciseCreate], user: str = Query(...), controller: RoutineController = Depends(get_routine_controller)):
+    """Adds several exercises to a routine in a single insert"""
+    try:
+        check_batch_size(routine_exercises)
+        created_at = datetime.now().isoformat()
+        for routine_exercise in routine_exercises:
+            routine_exercise.id_routine = routine_id
+            routine_exercise.created_at = created_at
+            routine_exercise.created_by = user
+        results = await controller.add_exercises_to_routine(routine_exercises)
+        return {"results": results}
+    except ScheduleConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "routine_exercise_ids": e.routine_exercise_ids})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_routines.put("/exercises/bulk")
+async def update_routine_exercises(routine_exercises: List[RoutineHasExerciseUpdate], user: str = Query(...), controller: RoutineController = Depends(get_routine_controller)):
+    """Updates several live routine exercises in a single statement; unknown or deleted IDs are reported as 404 and overlapping slots as 409"""
+    try:
+        check_batch_size(routine_exercises)
+        updated_at = datetime.now().isoformat()
+        for routine_exercise in routine_exercises:
+            routine_exercise.updated_at = updated_at
+            routine_exercise.updated_by = user
+        results = await controller.update_routine_exercises(routine_exercises)
+        return {"results": results}
+    except ScheduleConflictError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "routine_exercise_ids": e.routine_exercise_ids})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_routines.post("/exercises/bulk-delete")
+async def remove_exercises_from_routine(payload: BulkDelete, controller: RoutineController = Depends(get_routine_controller)):
+    """Removes several exercises from routines in a single statement"""
+    try:
+        check_batch_size(payload.ids)
+        results = await controller.remove_exercises_from_routine(payload.ids, payload.deleted_by)
+        return {"results": results}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_routines.delete("/exercises/{routine_exercise_id}", status_code=204)
-def remove_exercise_from_routine(routine_exercise_id: int):
+async def remove_exercise_from_routine(routine_exercise_id: int, deleted_by: Optional[str] = Query(None, description="User recorded as deleted_by"), controller: RoutineController = Depends(get_routine_controller)):
     """Removes an exercise from a routine"""
     try:
-        controller = RoutineController()
-        controller.remove_exercise_from_routine(routine_exercise_id)
+        await controller.remove_exercise_from_routine(routine_exercise_id, deleted_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_routines.get("/exercises/{routine_exercise_id}/excluded-dates")
-def get_excluded_dates(routine_exercise_id: int):
+@api_routines.get("/exercises/{routine_exercise_id}/excluded-dates", response_model=page_model(ExcludedDateSummary), response_model_exclude_unset=True)
+async def get_excluded_dates(routine_exercise_id: int, response: Response, params: ListParams = Depends(), controller: RoutineController = Depends(get_routine_controller)):
     """Returns all excluded dates for a routine exercise"""
     try:
-        controller = RoutineController()
-        result = controller.get_excluded_dates(routine_exercise_id)
-        return result.data
+        result = await controller.get_excluded_dates(routine_exercise_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_routines.post("/exercises/{routine_exercise_id}/excluded-dates", status_code=201)
-def add_excluded_date(excluded_date: ExcludedDateCreate):
+async def add_excluded_date(excluded_date: ExcludedDateCreate, controller: RoutineController = Depends(get_routine_controller)):
     """Adds an excluded date to a routine exercise"""
     try:
-        controller = RoutineController()
-        result = controller.add_excluded_date(excluded_date)
+        result = await controller.add_excluded_date(excluded_date)
         return result.data[0] if result.data else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_routines.delete("/excluded-dates/{excluded_date_id}", status_code=204)
-def delete_excluded_date(excluded_date_id: int):
+async def delete_excluded_date(excluded_date_id: int, controller: RoutineController = Depends(get_routine_controller)):
     """Deletes an excluded date"""
     try:
-        controller = RoutineController()
-        controller.delete_excluded_date(excluded_date_id)
+        await controller.delete_excluded_date(excluded_date_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_routines.post("/excluded-dates/bulk")
+async def add_excluded_dates(excluded_dates: List[ExcludedDateCreate], controller: RoutineController = Depends(get_routine_controller)):
+    """Adds several excluded dates in a single insert"""
+    try:
+        check_batch_size(excluded_dates)
+        results = await controller.add_excluded_dates(excluded_dates)
+        return {"results": results}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_routines.post("/excluded-dates/bulk-delete")
+async def delete_excluded_dates(payload: BulkDelete, controller: RoutineController = Depends(get_routine_controller)):
+    """Deletes several excluded dates in a single statement"""
+    try:
+        check_batch_size(payload.ids)
+        results = await controller.delete_excluded_dates(payload.ids)
+        return {"results": results}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
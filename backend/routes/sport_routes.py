@@ -1,26 +1,31 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from models.sport_models import SportBase, SportCreate, SportUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from models.sport_models import SportBase, SportCreate, SportUpdate, SportSummary
 from controllers.sport_controller import SportController
+from routes.dependencies import get_sport_controller
+from utils.pagination import ListParams, page_model, page_response
+from utils.thumbnails import ImageVariant, get_image_variant
+from utils.media import MediaRequest, serve_media
+from utils.metrics import TimedRoute
 
-api_sports = APIRouter(prefix="/sports", tags=["Sports"])
+api_sports = APIRouter(prefix="/sports", tags=["Sports"], route_class=TimedRoute)
 
-@api_sports.get("/")
-def get_all_sports():
+@api_sports.get("/", response_model=page_model(SportSummary), response_model_exclude_unset=True)
+async def get_all_sports(response: Response, params: ListParams = Depends(), controller: SportController = Depends(get_sport_controller)):
     """Return all sports"""
     try:
-        controller = SportController()
-        result = controller.get_all_sports()
-        return result.data
+        result = await controller.get_all_sports(params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_sports.get("/{sport_id}")
-def get_sport(sport_id: int):
+@api_sports.get("/{sport_id}", response_model=SportSummary, response_model_exclude_unset=True)
+async def get_sport(sport_id: int, controller: SportController = Depends(get_sport_controller)):
     """Returns a sport by ID"""
     try:
-        controller = SportController()
-        result = controller.get_sport_by_id(sport_id)
+        result = await controller.get_sport_by_id(sport_id)
         if not result.data:
             raise HTTPException(status_code=404, detail="Sport not found")
         return result.data[0] if result.data else None
@@ -30,35 +35,29 @@ def get_sport(sport_id: int):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_sports.get("/{sport_id}/photo")
-def get_sport_photo(sport_id: int):
+async def get_sport_photo(sport_id: int, media: MediaRequest = Depends(), variant: Optional[ImageVariant] = Depends(get_image_variant), controller: SportController = Depends(get_sport_controller)):
     """Returns the photo of a sport by ID"""
-    try:
-        controller = SportController()
-        file_bytes, content_type = controller.get_sport_photo(sport_id)
-        if not file_bytes:
-            raise HTTPException(status_code=404, detail="Photo not found")
-        return Response(content=file_bytes, media_type=content_type)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await serve_media(
+        lambda: controller.get_sport_photo_url(sport_id),
+        lambda: controller.get_sport_photo(sport_id, *media.headers, variant),
+        "Photo not found",
+        variant
+    )
 
 @api_sports.post("/", status_code=201)
-def create_sport(sport: SportCreate):
+async def create_sport(sport: SportCreate, controller: SportController = Depends(get_sport_controller)):
     """Creates a new sport"""
     try:
-        controller = SportController()
-        result = controller.create_sport(sport)
+        result = await controller.create_sport(sport)
         return result.data[0] if result.data else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_sports.put("/{sport_id}")
-def update_sport(sport_id: int, sport: SportUpdate):
+async def update_sport(sport_id: int, sport: SportUpdate, controller: SportController = Depends(get_sport_controller)):
     """Updates a sport"""
     try:
-        controller = SportController()
-        result = controller.update_sport(sport_id, sport)
+        result = await controller.update_sport(sport_id, sport)
         if not result.data:
             raise HTTPException(status_code=404, detail="Sport not found")
         return result.data[0] if result.data else None
@@ -68,10 +67,9 @@ def update_sport(sport_id: int, sport: SportUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_sports.delete("/{sport_id}", status_code=204)
-def delete_sport(sport_id: int):
+async def delete_sport(sport_id: int, deleted_by: Optional[str] = Query(None, description="User recorded as deleted_by"), controller: SportController = Depends(get_sport_controller)):
     """Deletes a sport"""
     try:
-        controller = SportController()
-        controller.delete_sport(sport_id)
+        await controller.delete_sport(sport_id, deleted_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -1,26 +1,34 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
-from models.team_models import TeamBase, TeamCreate, TeamUpdate
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from typing import List, Optional
+from models.team_models import TeamBase, TeamCreate, TeamUpdate, TeamSummary
+from models.enrollment_models import EnrollmentWithAthlete
 from controllers.team_controller import TeamController
+from routes.dependencies import get_team_controller
+from utils.pagination import ListParams, page_model, page_response
+from utils.thumbnails import ImageVariant, get_image_variant
+from utils.media import MediaRequest, serve_media
+from utils.schedule import WEEKDAYS
+from utils.intervals import MINUTES_PER_DAY, to_minutes
+from utils.metrics import TimedRoute
 
-api_teams = APIRouter(prefix="/teams", tags=["Teams"])
+api_teams = APIRouter(prefix="/teams", tags=["Teams"], route_class=TimedRoute)
 
-@api_teams.get("/")
-def get_all_teams():
+@api_teams.get("/", response_model=page_model(TeamSummary), response_model_exclude_unset=True)
+async def get_all_teams(response: Response, params: ListParams = Depends(), controller: TeamController = Depends(get_team_controller)):
     """Return all teams"""
     try:
-        controller = TeamController()
-        result = controller.get_all_teams()
-        return result.data
+        result = await controller.get_all_teams(params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_teams.get("/{team_id}")
-def get_team(team_id: int):
+@api_teams.get("/{team_id}", response_model=TeamSummary, response_model_exclude_unset=True)
+async def get_team(team_id: int, controller: TeamController = Depends(get_team_controller)):
     """Returns a team by ID"""
     try:
-        controller = TeamController()
-        result = controller.get_team_by_id(team_id)
+        result = await controller.get_team_by_id(team_id)
         if not result.data:
             raise HTTPException(status_code=404, detail="Team not found")
         return result.data[0] if result.data else None
@@ -29,46 +37,41 @@ def get_team(team_id: int):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_teams.get("/coach/{coach_id}")
-def get_teams_by_coach(coach_id: int):
+@api_teams.get("/coach/{coach_id}", response_model=page_model(TeamSummary), response_model_exclude_unset=True)
+async def get_teams_by_coach(coach_id: int, response: Response, params: ListParams = Depends(), controller: TeamController = Depends(get_team_controller)):
     """Returns all teams of a coach"""
     try:
-        controller = TeamController()
-        result = controller.get_teams_by_coach(coach_id)
-        return result.data
+        result = await controller.get_teams_by_coach(coach_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_teams.get("/{team_id}/photo")
-def get_team_photo(team_id: int):
+async def get_team_photo(team_id: int, media: MediaRequest = Depends(), variant: Optional[ImageVariant] = Depends(get_image_variant), controller: TeamController = Depends(get_team_controller)):
     """Returns the photo of a team by ID"""
-    try:
-        controller = TeamController()
-        file_bytes, content_type = controller.get_team_photo(team_id)
-        if not file_bytes:
-            raise HTTPException(status_code=404, detail="Photo not found")
-        return Response(content=file_bytes, media_type=content_type)
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await serve_media(
+        lambda: controller.get_team_photo_url(team_id),
+        lambda: controller.get_team_photo(team_id, *media.headers, variant),
+        "Photo not found",
+        variant
+    )
 
 @api_teams.post("/", status_code=201)
-def create_team(team: TeamCreate):
+async def create_team(team: TeamCreate, controller: TeamController = Depends(get_team_controller)):
     """Creates a new team"""
     try:
-        controller = TeamController()
-        result = controller.create_team(team)
+        result = await controller.create_team(team)
         return result.data[0] if result.data else None
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_teams.put("/{team_id}")
-def update_team(team_id: int, team: TeamUpdate):
+async def update_team(team_id: int, team: TeamUpdate, controller: TeamController = Depends(get_team_controller)):
     """Updates a team"""
     try:
-        controller = TeamController()
-        result = controller.update_team(team_id, team)
+        result = await controller.update_team(team_id, team)
         if not result.data:
             raise HTTPException(status_code=404, detail="Team not found")
         return result.data[0] if result.data else None
@@ -78,20 +81,46 @@ def update_team(team_id: int, team: TeamUpdate):
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_teams.delete("/{team_id}", status_code=204)
-def delete_team(team_id: int):
+async def delete_team(team_id: int, deleted_by: Optional[str] = Query(None, description="User recorded as deleted_by"), controller: TeamController = Depends(get_team_controller)):
     """Deletes a team"""
     try:
-        controller = TeamController()
-        controller.delete_team(team_id)
+        await controller.delete_team(team_id, deleted_by)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_teams.get("/{team_id}/athletes")
-def get_athletes_by_team(team_id: int):
+@api_teams.get("/{team_id}/athletes", response_model=page_model(EnrollmentWithAthlete), response_model_exclude_unset=True)
+async def get_athletes_by_team(team_id: int, response: Response, params: ListParams = Depends(), controller: TeamController = Depends(get_team_controller)):
     """Returns all athletes of a team"""
     try:
-        controller = TeamController()
-        result = controller.get_athletes_by_team_id(team_id)
-        return result.data
+        result = await controller.get_athletes_by_team_id(team_id, params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@api_teams.get("/{team_id}/free-slots")
+async def get_team_free_slots(
+    team_id: int,
+    day: str = Query(..., description="Weekday, e.g. MONDAY"),
+    duration: int = Query(..., ge=1, le=MINUTES_PER_DAY, description="Minimum length of a window in minutes"),
+    start_hour: str = Query("00:00", alias="from"),
+    end_hour: str = Query("24:00", alias="to"),
+    controller: TeamController = Depends(get_team_controller)
+):
+    """Returns the windows of a weekday in which every athlete of a team is free"""
+    try:
+        day = day.upper()
+        if day not in WEEKDAYS:
+            raise HTTPException(status_code=400, detail=f"Invalid day, expected one of {', '.join(WEEKDAYS)}")
+        try:
+            start, end = to_minutes(start_hour), to_minutes(end_hour)
+        except (ValueError, IndexError):
+            raise HTTPException(status_code=400, detail="'from' and 'to' must be HH:MM")
+        if not 0 <= start < end <= MINUTES_PER_DAY:
+            raise HTTPException(status_code=400, detail="'from' must be before 'to' within the same day")
+        return await controller.get_team_free_slots(team_id, day, duration, start_hour, end_hour)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
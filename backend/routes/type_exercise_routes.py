@@ -1,24 +1,29 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
+from typing import List
+from models.routine_models import TypeExerciseSummary
 from controllers.type_exercise_controller import TypeExerciseController
+from routes.dependencies import get_type_exercise_controller
+from utils.pagination import ListParams, page_model, page_response
+from utils.metrics import TimedRoute
 
-api_type_exercises = APIRouter(prefix="/type-exercises", tags=["Type Exercises"])
+api_type_exercises = APIRouter(prefix="/type-exercises", tags=["Type Exercises"], route_class=TimedRoute)
 
-@api_type_exercises.get("/")
-def get_all_type_exercises():
+@api_type_exercises.get("/", response_model=page_model(TypeExerciseSummary), response_model_exclude_unset=True)
+async def get_all_type_exercises(response: Response, params: ListParams = Depends(), controller: TypeExerciseController = Depends(get_type_exercise_controller)):
     """Return all exercise types"""
     try:
-        controller = TypeExerciseController()
-        result = controller.get_all_type_exercises()
-        return result.data
+        result = await controller.get_all_type_exercises(params)
+        return page_response(response, result)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@api_type_exercises.get("/{type_id}")
-def get_type_exercise(type_id: int):
+@api_type_exercises.get("/{type_id}", response_model=TypeExerciseSummary, response_model_exclude_unset=True)
+async def get_type_exercise(type_id: int, controller: TypeExerciseController = Depends(get_type_exercise_controller)):
     """Returns an exercise type by ID"""
     try:
-        controller = TypeExerciseController()
-        result = controller.get_type_exercise_by_id(type_id)
+        result = await controller.get_type_exercise_by_id(type_id)
         if not result.data:
             raise HTTPException(status_code=404, detail="Exercise type not found")
         return result.data[0] if result.data else None
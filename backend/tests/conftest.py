@@ -0,0 +1,102 @@
+"""Shared fixtures: a seeded Postgres and both data access backends on top of it
+
+The integration tests run against the benchmark stand-ins
+(benchmarks/docker-compose.yml): Postgres on BENCH_DATABASE_URL and PostgREST
+on BENCH_SUPABASE_URL, both serving the same database. Tests needing one of
+them are skipped when it is unreachable. The database is truncated and
+reseeded once per run.
+"""
+import os
+from datetime import datetime
+import pytest
+from benchmarks.common import DATABASE_URL, SUPABASE_URL, bench_env
+
+# Env reads the environment when first imported, so point it at the stand-ins first
+for name, value in {**bench_env(), "DATABASE_URL": DATABASE_URL}.items():
+    os.environ.setdefault(name, value)
+
+DDL_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'public', 'architecture', 'ddl.sql')
+
+AUDIT = (datetime(2024, 1, 1), 'tests')
+
+# Athlete names repeat so keyset pagination has to break ties on id
+ATHLETES = ('Ana', 'Bruno', 'Ana', 'Carla', 'Bruno')
+
+@pytest.fixture
+def anyio_backend():
+    return 'asyncio'
+
+def _seed(cursor):
+    from benchmarks.seed import TABLES, insert
+
+    cursor.execute(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE")
+    insert(cursor, 'level', ('name', 'created_at', 'created_by'), [("Level 1", *AUDIT)])
+    insert(cursor, 'sport', ('name', 'created_at', 'created_by'), [("Rowing", *AUDIT), ("Judo", *AUDIT)])
+    insert(cursor, 'type_exercise', ('name', 'created_at', 'created_by'), [("Strength", *AUDIT)])
+    insert(cursor, 'coach', ('id_level', 'name', 'created_at', 'created_by'), [(1, "Coach 1", *AUDIT), (1, "Coach 2", *AUDIT)])
+    # Coach 2 is soft-deleted, so team 2 embeds no coach
+    cursor.execute("UPDATE coach SET deleted_at = %s, deleted_by = %s WHERE id = 2", AUDIT)
+    insert(cursor, 'team', ('id_coach', 'id_sport', 'name', 'created_at', 'created_by'),
+           [(1, 1, "Eights", *AUDIT), (2, 2, "Dojo", *AUDIT)])
+    insert(cursor, 'athlete', ('name', 'created_at', 'created_by'), [(name, *AUDIT) for name in ATHLETES])
+    insert(cursor, 'exercise', ('id_type', 'id_sport', 'name', 'reps', 'sets', 'created_at', 'created_by'),
+           [(1, 1, "Ergometer", 10, 3, *AUDIT), (1, 2, "Ukemi", 20, 2, *AUDIT)])
+    insert(cursor, 'enrollment', ('id_team', 'id_athlete', 'created_at', 'created_by'),
+           [(1, 1, *AUDIT), (1, 2, *AUDIT), (2, 1, *AUDIT), (2, 3, *AUDIT)])
+    insert(cursor, 'routine', ('id_athlete', 'name', 'created_at', 'created_by'), [(1, "Week A", *AUDIT)])
+    insert(cursor, 'routine_has_exercice',
+           ('id_routine', 'id_exercise', 'days_of_week', 'start_hour', 'end_hour', 'created_at', 'created_by'),
+           [(1, 2, 'MONDAY', '10:00', '11:00', *AUDIT), (1, 1, 'MONDAY', '08:00', '09:00', *AUDIT)])
+    insert(cursor, 'routine_exercise_excluded_dates', ('id_routine_has_exercise', 'excluded_date', 'reason'),
+           [(2, '2024-01-08', 'Regatta')])
+
+@pytest.fixture(scope='session')
+def database():
+    """Applies the schema and migrations to the test database and seeds it, or skips without a database"""
+    psycopg2 = pytest.importorskip('psycopg2')
+    try:
+        connection = psycopg2.connect(DATABASE_URL, connect_timeout=3)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"Postgres unavailable at {DATABASE_URL}: {e}")
+    try:
+        with connection, connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('public.athlete')")
+            if cursor.fetchone()[0] is None:
+                with open(DDL_PATH, encoding='utf-8') as file:
+                    cursor.execute(file.read())
+        from migrate import migrate
+
+        migrate(DATABASE_URL, log=lambda *args: None)
+        with connection, connection.cursor() as cursor:
+            _seed(cursor)
+    finally:
+        connection.close()
+    return DATABASE_URL
+
+async def _postgrest_available():
+    import httpx
+
+    try:
+        async with httpx.AsyncClient(timeout=3) as client:
+            await client.get(f"{SUPABASE_URL}/rest/v1/")
+    except httpx.HTTPError:
+        return False
+    return True
+
+@pytest.fixture(params=['postgres', 'postgrest'])
+async def integration(request, database):
+    """Each data access backend (DATABASE_BACKEND), connected to the seeded database"""
+    if request.param == 'postgres':
+        from integrations.postgres_integration import PostgresIntegration
+
+        integration = await PostgresIntegration.connect()
+    else:
+        if not await _postgrest_available():
+            pytest.skip(f"PostgREST unavailable at {SUPABASE_URL}")
+        from integrations.supabase_integration import SupabaseIntegration
+
+        integration = await SupabaseIntegration.connect()
+    try:
+        yield integration
+    finally:
+        await integration.close()
@@ -0,0 +1,173 @@
+import pytest
+from postgrest import APIResponse
+from utils import cache as cache_module
+from utils.cache import MemoryCacheBackend, RedisCacheBackend, TTLCache, cached, invalidates, pack, unpack
+from utils.pagination import Page
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+class TeamReads:
+    """Minimal integration with a tagged cached read and an invalidating write"""
+    def __init__(self, read_cache):
+        self.read_cache = read_cache
+        self.calls = 0
+        # Write made by another request while the next read queries
+        self.concurrent_write = None
+
+    @cached('team:{team_id}', 'enrollment')
+    async def get_team(self, team_id: int):
+        self.calls += 1
+        if self.concurrent_write:
+            write, self.concurrent_write = self.concurrent_write, None
+            await write()
+        return APIResponse(data=[{"id": team_id, "calls": self.calls}], count=None)
+
+    @cached('team:{team_id}', ttl=0)
+    async def get_team_uncached(self, team_id: int):
+        self.calls += 1
+        return APIResponse(data=[{"id": team_id, "calls": self.calls}], count=None)
+
+    @invalidates('team:{team_id}')
+    async def update_team(self, team_id: int):
+        return None
+
+    @invalidates('enrollment')
+    async def create_enrollment(self):
+        return None
+
+def test_tag_invalidation():
+    cache = TTLCache()
+    cache.set("a", 1, tags=("team:1",))
+    cache.set("b", 2, tags=("team:1", "enrollment"))
+    cache.set("c", 3, tags=("team:2",))
+    cache.invalidate("team:1")
+    assert cache.get("a") == (False, None)
+    assert cache.get("b") == (False, None)
+    assert cache.get("c") == (True, 3)
+    # The tag sets no longer reference the dropped keys
+    cache.invalidate("enrollment")
+    assert cache.stats()["invalidations"] == 2
+
+def test_table_keys_are_invalidated_by_table_name():
+    cache = TTLCache()
+    cache.set(("athlete", "photo_path", 1), "a.jpg")
+    cache.set(("coach", "photo_path", 1), "c.jpg")
+    cache.invalidate("athlete")
+    assert cache.get(("athlete", "photo_path", 1)) == (False, None)
+    assert cache.get(("coach", "photo_path", 1)) == (True, "c.jpg")
+
+def test_explicit_zero_ttl_expires_at_once(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    cache = TTLCache(ttl=10)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") == (False, None)
+
+def test_expiry_and_lru_eviction(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'monotonic', clock)
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=20)
+    assert cache.get("a") == (True, 1)
+    cache.set("c", 3)
+    # "b" was the least recently used
+    assert cache.get("b") == (False, None)
+    clock.now += 10
+    assert cache.get("a") == (False, None)
+    assert cache.get("c") == (False, None)
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.anyio
+async def test_memory_backend_version_bumps_on_invalidation():
+    backend = MemoryCacheBackend(16, 60)
+    token, modified = await backend.version()
+    await backend.invalidate()
+    bumped, bumped_modified = await backend.version()
+    assert bumped != token
+    assert bumped.split('.')[0] == token.split('.')[0]
+    assert bumped_modified >= modified
+    backend.clear()
+    assert (await backend.version())[0] != bumped
+
+def test_pack_round_trip():
+    page = unpack(pack(Page([{"id": 1}], "cursor", paginated=True)))
+    assert (page.data, page.next_cursor, page.paginated) == ([{"id": 1}], "cursor", True)
+    result = unpack(pack(APIResponse(data=[{"id": 1}], count=None)))
+    assert isinstance(result, APIResponse)
+    assert result.data == [{"id": 1}]
+
+@pytest.mark.anyio
+async def test_cached_reads_are_dropped_by_their_tags():
+    reads = TeamReads(MemoryCacheBackend(16, 60))
+    assert (await reads.get_team(1)).data[0]["calls"] == 1
+    assert (await reads.get_team(1)).data[0]["calls"] == 1
+    assert (await reads.get_team(2)).data[0]["calls"] == 2
+
+    await reads.update_team(1)
+    assert (await reads.get_team(1)).data[0]["calls"] == 3
+    assert (await reads.get_team(2)).data[0]["calls"] == 2
+
+    await reads.create_enrollment()
+    assert (await reads.get_team(2)).data[0]["calls"] == 4
+
+async def redis_backend():
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    backend = RedisCacheBackend('redis://localhost', 'tests', 60, 60)
+    backend.client = fakeredis.FakeAsyncRedis()
+    backend._invalidate = backend.client.register_script(cache_module.INVALIDATE_SCRIPT)
+    backend._set = backend.client.register_script(cache_module.SET_SCRIPT)
+    return backend
+
+@pytest.fixture(params=['memory', 'redis'])
+async def backend(request):
+    backend = MemoryCacheBackend(16, 60) if request.param == 'memory' else await redis_backend()
+    try:
+        yield backend
+    finally:
+        await backend.close()
+
+@pytest.mark.anyio
+async def test_read_overlapping_a_write_is_not_stored(backend):
+    reads = TeamReads(backend)
+    reads.concurrent_write = lambda: reads.update_team(1)
+    assert (await reads.get_team(1)).data[0]["calls"] == 1
+    # The result may predate the write, so the next read queries again
+    assert (await reads.get_team(1)).data[0]["calls"] == 2
+    assert (await reads.get_team(1)).data[0]["calls"] == 2
+
+@pytest.mark.anyio
+async def test_zero_ttl_reads_are_not_cached(backend):
+    reads = TeamReads(backend)
+    await reads.get_team_uncached(1)
+    assert (await reads.get_team_uncached(1)).data[0]["calls"] == 2
+
+@pytest.mark.anyio
+async def test_redis_backend_tag_invalidation_and_version():
+    backend = await redis_backend()
+    reads = TeamReads(backend)
+    try:
+        version = await backend.version()
+        assert version[0] == '0'
+
+        await reads.get_team(1)
+        await reads.get_team(2)
+        await reads.update_team(1)
+        assert (await reads.get_team(1)).data[0]["calls"] == 3
+        assert (await reads.get_team(2)).data[0]["calls"] == 2
+        assert backend.invalidations == 1
+
+        bumped = await backend.version()
+        assert bumped[0] == '1'
+        assert bumped[1] >= version[1]
+        # A version bump without tags
+        await backend.invalidate()
+        assert (await backend.version())[0] == '2'
+    finally:
+        await backend.close()
@@ -0,0 +1,124 @@
+from email.utils import formatdate
+from types import SimpleNamespace
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+from utils.cache import MemoryCacheBackend
+from utils.http_cache import HTTPCacheMiddleware, etag_matches, not_modified_since, shared_read_cache
+
+def make_client(cache, **options):
+    """App counting handler runs behind the middleware, with the given read cache (None: no data version)"""
+    app = FastAPI()
+    app.state.runs = 0
+
+    @app.get("/api/teams/{team_id}")
+    async def get_team(team_id: int):
+        app.state.runs += 1
+        return {"id": team_id}
+
+    @app.put("/api/teams/{team_id}")
+    async def update_team(team_id: int):
+        return {"id": team_id}
+
+    @app.get("/api/teams/{team_id}/photo")
+    async def get_photo(team_id: int):
+        return PlainTextResponse("jpeg")
+
+    @app.get("/api/monitoring/cache")
+    async def get_stats():
+        return {}
+
+    options.setdefault('get_cache', lambda scope: cache)
+    app.add_middleware(HTTPCacheMiddleware, **options)
+    return TestClient(app), app
+
+def test_etag_matches():
+    assert etag_matches('W/"a", "b"', '"b"')
+    assert etag_matches('"a"', 'W/"a"')
+    assert etag_matches('*', '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"a"')
+
+def test_not_modified_since():
+    assert not_modified_since(formatdate(1000, usegmt=True), 1000)
+    assert not not_modified_since(formatdate(999, usegmt=True), 1000)
+    assert not not_modified_since("yesterday", 1000)
+    assert not not_modified_since(None, 1000)
+
+def test_revalidation_is_answered_before_the_handler():
+    client, app = make_client(MemoryCacheBackend(16, 60))
+    response = client.get("/api/teams/1")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "no-cache"
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = client.get("/api/teams/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert app.state.runs == 1
+
+    response = client.get("/api/teams/1", headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert response.status_code == 304
+    assert app.state.runs == 1
+
+def test_if_none_match_takes_precedence():
+    client, app = make_client(MemoryCacheBackend(16, 60))
+    last_modified = client.get("/api/teams/1").headers["last-modified"]
+    response = client.get("/api/teams/1", headers={"If-None-Match": '"other"', "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+
+def test_validators_differ_per_url():
+    client, _ = make_client(MemoryCacheBackend(16, 60))
+    etag = client.get("/api/teams/1").headers["etag"]
+    assert client.get("/api/teams/2").headers["etag"] != etag
+    assert client.get("/api/teams/1?fields=id").headers["etag"] != etag
+    assert client.get("/api/teams/2", headers={"If-None-Match": etag}).status_code == 200
+
+@pytest.mark.parametrize('status', [200, 422])
+def test_writes_bump_the_version(status):
+    client, _ = make_client(MemoryCacheBackend(16, 60))
+    etag = client.get("/api/teams/1").headers["etag"]
+    client.put("/api/teams/1" if status == 200 else "/api/teams/not-a-number")
+    response = client.get("/api/teams/1", headers={"If-None-Match": etag})
+    # Failed writes change nothing, so cached validators stay valid
+    assert response.status_code == (200 if status == 200 else 304)
+
+def test_body_hash_without_a_data_version():
+    client, app = make_client(None)
+    response = client.get("/api/teams/1")
+    etag = response.headers["etag"]
+    assert not etag.startswith('W/')
+    assert "last-modified" not in response.headers
+
+    response = client.get("/api/teams/1", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    # The body has to be rendered to be hashed
+    assert app.state.runs == 2
+
+def test_cache_control():
+    client, _ = make_client(MemoryCacheBackend(16, 60), json_max_age=30, media_max_age=600)
+    assert client.get("/api/teams/1").headers["cache-control"] == "private, max-age=30"
+    assert client.get("/api/teams/1/photo").headers["cache-control"] == "no-cache"
+    assert client.get("/api/teams/1/photo?v=abc").headers["cache-control"] == "public, max-age=600, immutable"
+    response = client.get("/api/teams/1/photo")
+    assert "etag" not in response.headers
+
+    assert client.get("/api/monitoring/cache").headers["cache-control"] == "no-store"
+
+@pytest.mark.parametrize('change_feed', [None, object()])
+def test_per_worker_version_is_used_only_with_a_change_feed(change_feed):
+    client, app = make_client(None, get_cache=shared_read_cache)
+    app.state.supabase_integration = SimpleNamespace(read_cache=MemoryCacheBackend(16, 60))
+    app.state.change_feed = change_feed
+    etag = client.get("/api/teams/1").headers["etag"]
+    assert client.get("/api/teams/1", headers={"If-None-Match": etag}).status_code == 304
+    if change_feed is None:
+        # Other workers' writes would not change this worker's version: hash the body
+        assert not etag.startswith('W/')
+        assert app.state.runs == 2
+    else:
+        assert etag.startswith('W/')
+        assert app.state.runs == 1
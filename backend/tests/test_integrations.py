@@ -0,0 +1,129 @@
+"""Both data access backends must return the same shapes from the same seeded database (see conftest)"""
+import pytest
+from postgrest import APIResponse
+from postgrest.exceptions import APIError
+from models.athlete_models import AthleteSummary
+from models.enrollment_models import EnrollmentUpdate
+from models.routine_models import RoutineHasExerciseCreate
+from utils.intervals import EXCLUSION_VIOLATION, ScheduleConflictError
+from utils.pagination import ListParams, Page, decode_cursor, encode_cursor
+from utils.projection import columns
+
+pytestmark = pytest.mark.anyio
+
+UNIQUE_VIOLATION = '23505'
+
+def list_params(limit=None, cursor=None, fields=None):
+    return ListParams(limit=limit, cursor=cursor, fields=fields)
+
+async def test_read_by_id_is_an_api_response_with_the_model_columns(integration):
+    result = await integration.get_athlete_by_id(1)
+    assert isinstance(result, APIResponse)
+    assert result.data == [{"id": 1, "name": "Ana", "photo_path": None}]
+    assert list(result.data[0]) == columns(AthleteSummary)
+
+async def test_unknown_id_reads_empty(integration):
+    result = await integration.get_athlete_by_id(999)
+    assert result.data == []
+
+async def test_whole_list_is_an_unpaginated_page(integration):
+    page = await integration.get_all_athletes(None)
+    assert isinstance(page, Page)
+    assert not page.paginated
+    assert page.next_cursor is None
+    # Ordered by (name, id)
+    assert [row["id"] for row in page.data] == [1, 3, 2, 5, 4]
+
+async def test_keyset_pages_break_name_ties_on_id(integration):
+    seen = []
+    cursors = []
+    cursor = None
+    while True:
+        page = await integration.get_all_athletes(list_params(limit=2, cursor=cursor))
+        assert page.paginated
+        seen += [(row["name"], row["id"]) for row in page.data]
+        if page.next_cursor is None:
+            break
+        cursors.append(page.next_cursor)
+        cursor = page.next_cursor
+    assert seen == [("Ana", 1), ("Ana", 3), ("Bruno", 2), ("Bruno", 5), ("Carla", 4)]
+    assert cursors == [encode_cursor(["Ana", 3]), encode_cursor(["Bruno", 5])]
+    assert decode_cursor(cursors[0]) == ["Ana", 3]
+
+async def test_projection_keeps_the_keyset_columns(integration):
+    page = await integration.get_all_athletes(list_params(limit=1, fields="photo_path"))
+    assert page.data == [{"photo_path": None, "name": "Ana", "id": 1}]
+    assert page.next_cursor == encode_cursor(["Ana", 1])
+
+async def test_id_cursor_of_an_embedding_list(integration):
+    page = await integration.get_teams_by_athlete_id(1, list_params(limit=1))
+    assert page.data == [{"id": 1, "team": {"id": 1, "id_coach": 1, "id_sport": 1, "name": "Eights", "photo_path": None}}]
+    assert page.next_cursor == encode_cursor([1])
+
+    page = await integration.get_teams_by_athlete_id(1, list_params(cursor=page.next_cursor))
+    assert [row["team"]["id"] for row in page.data] == [2]
+    assert page.next_cursor is None
+
+async def test_embeds_of_team_details(integration):
+    result = await integration.get_teams_with_details()
+    teams = {team["name"]: team for team in result.data}
+    assert [team["name"] for team in result.data] == ["Dojo", "Eights"]
+
+    eights = teams["Eights"]
+    assert eights["coach"] == {"id": 1, "id_level": 1, "name": "Coach 1", "photo_path": None}
+    assert eights["sport"] == {"id": 1, "name": "Rowing", "description": None, "photo_path": None}
+    assert sorted(eights["enrollment"], key=lambda row: row["id"]) == [
+        {"id": 1, "athlete": {"id": 1, "name": "Ana", "photo_path": None}},
+        {"id": 2, "athlete": {"id": 2, "name": "Bruno", "photo_path": None}}
+    ]
+    # The coach of the Dojo is soft-deleted: the to-one embed is null
+    assert teams["Dojo"]["coach"] is None
+    assert teams["Dojo"]["sport"]["name"] == "Judo"
+
+async def test_nested_embeds_with_filters(integration):
+    result = await integration.get_schedule_by_athlete_id(1, "2024-01-01", "2024-01-31")
+    [routine] = result.data
+    slots = sorted(routine["routine_has_exercice"], key=lambda slot: slot["id"])
+    assert slots == [
+        {
+            "id": 1, "id_exercise": 2, "days_of_week": "MONDAY", "start_hour": "10:00:00", "end_hour": "11:00:00",
+            "exercise": {"id": 2, "name": "Ukemi"}, "routine_exercise_excluded_dates": []
+        },
+        {
+            "id": 2, "id_exercise": 1, "days_of_week": "MONDAY", "start_hour": "08:00:00", "end_hour": "09:00:00",
+            "exercise": {"id": 1, "name": "Ergometer"}, "routine_exercise_excluded_dates": [{"excluded_date": "2024-01-08"}]
+        }
+    ]
+
+    result = await integration.get_schedule_by_athlete_id(1, "2024-02-01", "2024-02-29")
+    assert all(slot["routine_exercise_excluded_dates"] == [] for slot in result.data[0]["routine_has_exercice"])
+
+async def test_time_sorted_page(integration):
+    page = await integration.get_exercises_by_routine_id(1, list_params(limit=1))
+    assert [row["id"] for row in page.data] == [2]
+    assert page.data[0]["exercise"]["name"] == "Ergometer"
+    assert page.next_cursor == encode_cursor(["08:00:00", 2])
+
+async def test_duplicate_live_enrollment_is_a_unique_violation(integration):
+    enrollment = EnrollmentUpdate(id=2, id_team=1, id_athlete=1, updated_at="2024-01-02T00:00:00", updated_by="tests")
+    with pytest.raises(APIError) as error:
+        await integration.update_enrollments([enrollment])
+    assert error.value.code == UNIQUE_VIOLATION
+    assert "(1, 1)" in error.value.details
+
+async def test_overlapping_slot_is_an_exclusion_violation(integration):
+    slot = RoutineHasExerciseCreate(
+        id_routine=1, id_exercise=1, days_of_week="MONDAY", start_hour="08:30", end_hour="10:30",
+        created_at="2024-01-02T00:00:00", created_by="tests"
+    )
+    with pytest.raises(APIError) as error:
+        await integration.add_exercise_to_routine(slot)
+    assert error.value.code == EXCLUSION_VIOLATION
+    assert error.value.details == "1,2"
+    assert ScheduleConflictError.from_api_error(error.value).routine_exercise_ids == [1, 2]
+
+async def test_live_enrollments_of_teams_and_athletes(integration):
+    result = await integration.get_live_enrollments([1, 2], [1, 3])
+    assert isinstance(result, APIResponse)
+    assert sorted((row["id_team"], row["id_athlete"]) for row in result.data) == [(1, 1), (2, 1), (2, 3)]
+    assert set(result.data[0]) == {"id", "id_team", "id_athlete"}
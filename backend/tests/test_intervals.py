@@ -0,0 +1,112 @@
+import pytest
+from postgrest.exceptions import APIError
+from utils.intervals import (
+    EXCLUSION_VIOLATION, IntervalIndex, ScheduleConflictError, ScheduleIndex, free_windows, minute_mask, to_hour, to_minutes
+)
+
+def slot(slot_id, days_of_week, start_hour, end_hour, id_routine=1):
+    return {"id": slot_id, "id_routine": id_routine, "days_of_week": days_of_week, "start_hour": start_hour, "end_hour": end_hour}
+
+class FakeIntegration:
+    """Serves routine slots per athlete and counts the loads"""
+    def __init__(self, slots):
+        self.slots = slots
+        self.loads = 0
+
+    async def get_routine_exercises_by_athlete_id(self, athlete_id):
+        self.loads += 1
+        return type('Result', (), {'data': self.slots.get(athlete_id, [])})
+
+def test_minutes():
+    assert to_minutes("08:30") == 510
+    assert to_minutes("08:30:59") == 510
+    assert to_hour(510) == "08:30"
+
+def test_free_windows():
+    busy = minute_mask(to_minutes("09:00"), to_minutes("10:00")) | minute_mask(to_minutes("10:30"), to_minutes("11:00"))
+    windows = free_windows(busy, to_minutes("08:00"), to_minutes("12:00"), 30)
+    assert [(to_hour(start), to_hour(end)) for start, end in windows] == [("08:00", "09:00"), ("10:00", "10:30"), ("11:00", "12:00")]
+    assert free_windows(busy, to_minutes("08:00"), to_minutes("12:00"), 45) == [(480, 540), (660, 720)]
+    assert minute_mask(10, 10) == 0
+
+def test_intervals_are_half_open():
+    index = IntervalIndex()
+    index.add(60, 120, "a")
+    index.add(120, 180, "b")
+    assert index.overlapping(0, 60) == []
+    assert index.overlapping(119, 121) == ["a", "b"]
+    assert index.overlapping(180, 240) == []
+
+def test_long_intervals_are_found_from_far_before():
+    index = IntervalIndex()
+    index.add(0, 600, "long")
+    for start in range(100, 500, 50):
+        index.add(start, start + 10, start)
+    assert index.overlapping(590, 595) == ["long"]
+    index.remove("long")
+    assert index.overlapping(590, 595) == []
+    assert len(index) == 8
+
+def test_clusters():
+    index = IntervalIndex()
+    for start, end, key in ((0, 30, 1), (20, 40, 2), (40, 50, 3), (45, 60, 4), (70, 80, 5)):
+        index.add(start, end, key)
+    assert [[key for _, _, key in group] for group in index.clusters()] == [[1, 2], [3, 4]]
+
+def test_conflict_from_the_trigger_error():
+    error = APIError({"message": "Schedule overlaps routine exercises 3,7", "code": EXCLUSION_VIOLATION, "details": "3,7", "hint": None})
+    assert ScheduleConflictError.from_api_error(error).routine_exercise_ids == [3, 7]
+    assert ScheduleConflictError.from_api_error(APIError({"code": EXCLUSION_VIOLATION})).routine_exercise_ids == []
+
+@pytest.mark.anyio
+async def test_schedule_index_loads_once_and_tracks_writes():
+    integration = FakeIntegration({1: [slot(10, "MONDAY", "08:00:00", "09:00:00")]})
+    index = ScheduleIndex()
+    await index.ensure_loaded(integration, 1)
+    await index.ensure_loaded(integration, 1)
+    assert integration.loads == 1
+    assert index.overlapping(1, "MONDAY", "08:30", "10:00") == [10]
+    assert index.overlapping(1, "TUESDAY", "08:30", "10:00") == []
+
+    index.add(1, slot(11, "MONDAY", "09:00", "10:00"))
+    assert index.overlapping(1, "MONDAY", "08:30", "10:00") == [10, 11]
+    index.remove(10)
+    assert index.overlapping(1, "MONDAY", "08:30", "10:00") == [11]
+
+    index.invalidate_slot(11)
+    await index.ensure_loaded(integration, 1)
+    assert integration.loads == 2
+
+@pytest.mark.anyio
+async def test_replace_moves_a_slot_to_another_athlete():
+    integration = FakeIntegration({1: [slot(10, "MONDAY", "08:00", "09:00", id_routine=1)], 2: []})
+    index = ScheduleIndex()
+    await index.ensure_loaded(integration, 1)
+    await index.ensure_loaded(integration, 2)
+    index.replace(slot(10, "FRIDAY", "08:00", "09:00", id_routine=2), 2)
+    assert index.overlapping(1, "MONDAY", "08:00", "09:00") == []
+    assert index.overlapping(2, "FRIDAY", "08:00", "09:00") == [10]
+    assert index.invalidate_routine(2)
+    assert not index.is_loaded(2)
+    assert not index.invalidate_routine(99)
+
+@pytest.mark.anyio
+async def test_least_recently_used_athletes_are_evicted():
+    integration = FakeIntegration({athlete_id: [slot(athlete_id, "MONDAY", "08:00", "09:00", id_routine=athlete_id)] for athlete_id in (1, 2, 3)})
+    index = ScheduleIndex(max_athletes=2)
+    await index.ensure_loaded(integration, 1)
+    await index.ensure_loaded(integration, 2)
+    assert index.is_loaded(1)
+    await index.ensure_loaded(integration, 3)
+    assert index.loaded_count() == 2
+    assert not index.is_loaded(2)
+    # Lookups of an evicted athlete go with it
+    assert not index.invalidate_routine(2)
+    assert index.invalidate_routine(1)
+
+def test_conflicts_report():
+    index = ScheduleIndex()
+    index.load(1, [slot(1, "MONDAY", "08:00", "09:00"), slot(2, "MONDAY", "08:30", "10:00"), slot(3, "TUESDAY", "08:00", "09:00")])
+    assert index.conflicts(1) == [
+        {"days_of_week": "MONDAY", "start_hour": "08:00", "end_hour": "10:00", "routine_exercise_ids": [1, 2]}
+    ]
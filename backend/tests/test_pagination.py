@@ -0,0 +1,107 @@
+import pytest
+from fastapi import HTTPException, Response
+from models.routine_models import RoutineExerciseWithExercise
+from utils.pagination import ListParams, Page, decode_cursor, encode_cursor, page_response, paginate, select_columns
+
+def list_params(limit=None, cursor=None, fields=None):
+    return ListParams(limit=limit, cursor=cursor, fields=fields)
+
+class RecordingQuery:
+    """Query builder double recording the PostgREST calls paginate makes"""
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args):
+            self.calls.append((name, *args))
+            return self
+        return call
+
+    async def execute(self):
+        limit = next((call[1] for call in self.calls if call[0] == 'limit'), None)
+        return Page(self.rows[:limit])
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(["O'Brien \"Jr\"", 42])
+    assert decode_cursor(cursor) == ["O'Brien \"Jr\"", 42]
+
+@pytest.mark.parametrize('cursor', ['not base64!', encode_cursor({"id": 1}), encode_cursor([]), encode_cursor(["a", "b"])])
+def test_invalid_cursor(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+    with pytest.raises(HTTPException) as error:
+        list_params(cursor=cursor)
+    assert error.value.status_code == 400
+
+def test_pagination_is_opt_in():
+    assert not list_params().paginated
+    assert list_params(limit=5).paginated
+    params = list_params(cursor=encode_cursor([3]))
+    assert params.paginated
+    assert params.cursor_values == [3]
+
+def test_params_cache_key():
+    assert list_params(limit=5, fields="name") == list_params(limit=5, fields="name")
+    assert len({list_params(limit=5), list_params(limit=5), list_params(limit=6)}) == 2
+
+def test_invalid_fields():
+    with pytest.raises(HTTPException) as error:
+        list_params(fields="name,id;drop")
+    assert error.value.status_code == 400
+
+def test_select_columns_keeps_keyset_columns():
+    assert select_columns(None) == '*'
+    assert select_columns(list_params(fields="photo_path"), 'name') == 'photo_path,name,id'
+    assert select_columns(list_params(fields="id,name"), 'name') == 'id,name'
+
+def test_select_columns_of_a_model():
+    assert select_columns(None, model=RoutineExerciseWithExercise) == (
+        'id,id_routine,id_exercise,days_of_week,start_hour,end_hour,exercise(id,id_type,id_sport,name,reps,sets,description,video_path,photo_path)'
+    )
+    # Projections keep the model's embeds
+    assert select_columns(list_params(fields="start_hour"), 'start_hour', RoutineExerciseWithExercise) == (
+        'start_hour,id,exercise(id,id_type,id_sport,name,reps,sets,description,video_path,photo_path)'
+    )
+    with pytest.raises(HTTPException) as error:
+        select_columns(list_params(fields="created_by"), model=RoutineExerciseWithExercise)
+    assert error.value.status_code == 400
+
+@pytest.mark.anyio
+async def test_paginate_fetches_one_extra_row():
+    rows = [{"id": 1, "name": "Ana"}, {"id": 3, "name": "Ana"}, {"id": 2, "name": "Bruno"}]
+    query = RecordingQuery(rows)
+    page = await paginate(query, list_params(limit=2), 'name')
+    assert query.calls == [('order', 'name'), ('order', 'id'), ('limit', 3)]
+    assert page.paginated
+    assert page.data == rows[:2]
+    assert page.next_cursor == encode_cursor(["Ana", 3])
+
+@pytest.mark.anyio
+async def test_paginate_quotes_the_cursor_value():
+    query = RecordingQuery([])
+    page = await paginate(query, list_params(cursor=encode_cursor(['Ana "A", B', 3])), 'name')
+    assert ('or_', 'name.gt."Ana \\"A\\", B",and(name.eq."Ana \\"A\\", B",id.gt.3)') in query.calls
+    assert page.next_cursor is None
+
+@pytest.mark.anyio
+async def test_paginate_rejects_a_cursor_of_another_sort():
+    with pytest.raises(HTTPException) as error:
+        await paginate(RecordingQuery([]), list_params(cursor=encode_cursor([3])), 'name')
+    assert error.value.status_code == 400
+
+@pytest.mark.anyio
+async def test_whole_list_is_not_limited():
+    query = RecordingQuery([{"id": 1}])
+    page = await paginate(query, None)
+    assert query.calls == [('order', 'id')]
+    assert not page.paginated
+
+def test_page_response():
+    response = Response()
+    assert page_response(response, Page([{"id": 1}])) == [{"id": 1}]
+    assert "X-Next-Cursor" not in response.headers
+
+    cursor = encode_cursor([1])
+    assert page_response(response, Page([{"id": 1}], cursor, paginated=True)) == {"items": [{"id": 1}], "next_cursor": cursor}
+    assert response.headers["X-Next-Cursor"] == cursor
@@ -0,0 +1,31 @@
+from datetime import date
+from utils.schedule import expand_weekly_slots, first_weekday_on_or_after
+
+def slot(slot_id, days_of_week, start_hour, excluded_dates=()):
+    return {"id": slot_id, "days_of_week": days_of_week, "start_hour": start_hour, "excluded_dates": set(excluded_dates)}
+
+def occurrences(slots, start, end):
+    return [(occurrence_date.isoformat(), found["id"]) for occurrence_date, found in expand_weekly_slots(slots, start, end)]
+
+def test_first_weekday_on_or_after():
+    # 2024-01-01 is a Monday
+    assert first_weekday_on_or_after(date(2024, 1, 1), 0) == date(2024, 1, 1)
+    assert first_weekday_on_or_after(date(2024, 1, 2), 0) == date(2024, 1, 8)
+    assert first_weekday_on_or_after(date(2024, 1, 1), 6) == date(2024, 1, 7)
+
+def test_occurrences_are_sorted_by_date_then_start_hour():
+    slots = [slot(1, "MONDAY", "10:00:00"), slot(2, "WEDNESDAY", "07:00:00"), slot(3, "MONDAY", "08:00:00")]
+    assert occurrences(slots, date(2024, 1, 1), date(2024, 1, 10)) == [
+        ("2024-01-01", 3), ("2024-01-01", 1), ("2024-01-03", 2), ("2024-01-08", 3), ("2024-01-08", 1), ("2024-01-10", 2)
+    ]
+
+def test_range_is_inclusive():
+    assert occurrences([slot(1, "SUNDAY", "09:00:00")], date(2024, 1, 7), date(2024, 1, 14)) == [("2024-01-07", 1), ("2024-01-14", 1)]
+    assert occurrences([slot(1, "SUNDAY", "09:00:00")], date(2024, 1, 8), date(2024, 1, 13)) == []
+
+def test_excluded_dates_are_skipped():
+    slots = [slot(1, "MONDAY", "08:00:00", {date(2024, 1, 8)})]
+    assert occurrences(slots, date(2024, 1, 1), date(2024, 1, 22)) == [("2024-01-01", 1), ("2024-01-15", 1), ("2024-01-22", 1)]
+
+def test_no_slots():
+    assert expand_weekly_slots([], date(2024, 1, 1), date(2024, 12, 31)) == []
@@ -0,0 +1,30 @@
+import pytest
+from utils.thumbnails import ImageVariant, forget_source_etag, source_etag
+
+pytestmark = pytest.mark.anyio
+
+class FakeS3:
+    """Answers HEAD requests with the ETag of the current version of each key"""
+    def __init__(self):
+        self.etags = {}
+        self.heads = 0
+
+    async def get_file_info(self, bucket, key):
+        self.heads += 1
+        etag = self.etags.get((bucket, key))
+        return {'ETag': f'"{etag}"'} if etag else None
+
+async def test_source_etag_is_cached_until_the_original_is_replaced():
+    s3 = FakeS3()
+    assert await source_etag(s3, 'photos', 'athlete/1/a.jpg') is None
+    s3.etags['photos', 'athlete/1/a.jpg'] = 'one'
+    # Missing originals are not cached
+    assert await source_etag(s3, 'photos', 'athlete/1/a.jpg') == 'one'
+    s3.etags['photos', 'athlete/1/a.jpg'] = 'two'
+    assert await source_etag(s3, 'photos', 'athlete/1/a.jpg') == 'one'
+    assert s3.heads == 2
+
+    forget_source_etag('photos', 'athlete/1/a.jpg')
+    etag = await source_etag(s3, 'photos', 'athlete/1/a.jpg')
+    assert etag == 'two'
+    assert ImageVariant(64, None, 'webp').key('athlete/1/a.jpg', etag) == 'variants/64x0/two/athlete/1/a.jpg.webp'
@@ -0,0 +1,44 @@
+from fastapi import HTTPException
+from configs.env import Env
+
+def check_batch_size(items):
+    """Rejects empty batches and batches above BULK_MAX_ITEMS"""
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > Env.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {Env.BULK_MAX_ITEMS} items")
+
+def split_duplicates(items, key):
+    """Returns the indexes of the first item of each key and per-item results for the repeated ones"""
+    seen = {}
+    unique = []
+    results = [None] * len(items)
+    for index, item in enumerate(items):
+        item_key = key(item)
+        if item_key in seen:
+            results[index] = {"index": index, "status": 409, "detail": f"Duplicate of item {seen[item_key]}"}
+        else:
+            seen[item_key] = index
+            unique.append(index)
+    return unique, results
+
+def fill_results(results, indexes, rows, status):
+    """Stores the rows returned by a multi-row write as the results of the items at the given indexes"""
+    for index, row in zip(indexes, rows):
+        results[index] = {"index": index, "status": status, "data": row}
+    return results
+
+def update_results(results, indexes, ids, rows):
+    """Stores the rows returned by a bulk update by id, marking ids that matched no live row as not found"""
+    updated = {row['id']: row for row in rows}
+    for index, item_id in zip(indexes, ids):
+        if item_id in updated:
+            results[index] = {"index": index, "status": 200, "data": updated[item_id]}
+        else:
+            results[index] = {"index": index, "status": 404, "detail": "Not found"}
+    return results
+
+def delete_results(ids, rows):
+    """Returns one result per requested id, marking ids that matched no row as not found"""
+    deleted = {row['id'] for row in rows}
+    return [{"id": item_id, "status": 204 if item_id in deleted else 404} for item_id in ids]
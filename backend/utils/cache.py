@@ -0,0 +1,359 @@
+import functools
+import inspect
+import json
+import logging
+import math
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from postgrest import APIResponse
+from configs.env import Env
+from utils.pagination import Page
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """In-process cache with per-entry TTL and LRU eviction
+
+    Entries can be tagged (e.g. "team:7") and invalidated by tag. Tuple keys
+    whose first element is a table are also invalidated by that table's name,
+    so every entry of a table can be dropped at once after a write.
+    """
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _delete(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def get(self, key):
+        """Returns (True, value) on a fresh hit, else (False, None)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    self._delete(key)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def set(self, key, value, tags=(), ttl=None):
+        with self._lock:
+            if key in self._entries:
+                self._delete(key)
+            self._entries[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl), tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._delete(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tag):
+        """Drops every entry tagged with, or read from the table named, tag"""
+        with self._lock:
+            keys = set(self._tags.get(tag, ()))
+            keys.update(key for key in self._entries if isinstance(key, tuple) and key[0] == tag)
+            for key in keys:
+                self._delete(key)
+            self.invalidations += len(keys)
+
+    def discard(self, key):
+        """Drops a single entry, e.g. after a change made by another worker"""
+        with self._lock:
+            if key in self._entries:
+                self._delete(key)
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+def pack(value):
+    """Encodes a cached Supabase result with msgpack"""
+    import msgpack
+
+    if isinstance(value, Page):
+        return msgpack.packb({"page": value.data, "next_cursor": value.next_cursor, "paginated": value.paginated})
+    return msgpack.packb({"data": value.data, "count": value.count})
+
+def unpack(payload):
+    import msgpack
+
+    value = msgpack.unpackb(payload)
+    if "page" in value:
+        return Page(value["page"], value["next_cursor"], value.get("paginated", False))
+    return APIResponse(data=value["data"], count=value["count"])
+
+class MemoryCacheBackend:
+    """Read cache local to one worker process
+
+    Every invalidation bumps a data version, which the HTTP cache turns into
+    validators without running the handler. The version is prefixed with an
+    ID of this process, since other workers count their own writes.
+    """
+    shared = False
+
+    def __init__(self, maxsize, ttl):
+        self.cache = TTLCache(maxsize, ttl)
+        self._process = uuid.uuid4().hex[:8]
+        self._version = 0
+        self._modified = time.time()
+
+    def _bump(self):
+        self._version += 1
+        self._modified = time.time()
+
+    async def version(self):
+        """Returns (version, time of the last invalidation) of the cached data"""
+        return f"{self._process}.{self._version}", self._modified
+
+    async def get(self, key):
+        return self.cache.get(key)
+
+    async def set(self, key, value, tags=(), ttl=None, version=None):
+        """Stores a read, unless the data version moved past the one read before it"""
+        if version is not None and version != f"{self._process}.{self._version}":
+            return
+        self.cache.set(key, value, tags, ttl)
+
+    async def invalidate(self, *tags):
+        """Drops the entries carrying any of the tags; with no tag, only bumps the data version"""
+        for tag in tags:
+            self.cache.invalidate(tag)
+        self._bump()
+
+    def clear(self):
+        self.cache.clear()
+        self._bump()
+
+    async def close(self):
+        pass
+
+    def stats(self):
+        return {"backend": "memory", **self.cache.stats()}
+
+# Deletes every key listed in the tag sets (KEYS[2..]), then the tag sets,
+# and bumps the data version hash (KEYS[1]), atomically
+INVALIDATE_SCRIPT = """
+local tags = {unpack(KEYS, 2)}
+local keys = {}
+if #tags > 0 then
+    keys = redis.call('SUNION', unpack(tags))
+    for i = 1, #keys, 500 do
+        redis.call('DEL', unpack(keys, i, math.min(i + 499, #keys)))
+    end
+    redis.call('DEL', unpack(tags))
+end
+local now = redis.call('TIME')
+redis.call('HINCRBY', KEYS[1], 'version', 1)
+redis.call('HSET', KEYS[1], 'modified', now[1] .. '.' .. string.format('%06d', now[2]))
+return #keys
+"""
+
+# Stores a read (KEYS[2] = ARGV[2], expiring after ARGV[3] seconds) and adds it
+# to its tag sets (KEYS[3..], expiring after ARGV[4] seconds), unless the data
+# version hash (KEYS[1]) moved past ARGV[1] (if given) since the read started,
+# atomically
+SET_SCRIPT = """
+local version = redis.call('HGET', KEYS[1], 'version') or '0'
+if ARGV[1] ~= '' and version ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[2], ARGV[2], 'EX', ARGV[3])
+for i = 3, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[2])
+    redis.call('EXPIRE', KEYS[i], ARGV[4])
+end
+return 1
+"""
+
+class RedisCacheBackend:
+    """Read cache shared by every API container through a Redis-protocol server
+
+    Values are msgpack-encoded. Each tag is a set of the keys tagged with it,
+    so invalidating "team:7" deletes every read that involved team 7, and
+    bumps the data version shared by all workers. Redis errors are logged
+    and treated as misses so the API keeps serving.
+    """
+    shared = True
+
+    def __init__(self, url, prefix, ttl, tag_ttl):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+        self.prefix = prefix
+        self.ttl = ttl
+        self.tag_ttl = tag_ttl
+        self._invalidate = self.client.register_script(INVALIDATE_SCRIPT)
+        self._set = self.client.register_script(SET_SCRIPT)
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.invalidations = 0
+
+    def _tag(self, tag):
+        return f"{self.prefix}:tag:{tag}"
+
+    async def version(self):
+        """Returns (version, time of the last invalidation) of the cached data, or None if Redis is unavailable"""
+        name = f"{self.prefix}:version"
+        try:
+            version, modified = await self.client.hmget(name, 'version', 'modified')
+            if modified is None:
+                # Nothing invalidated yet: start counting from now
+                await self.client.hsetnx(name, 'modified', repr(time.time()))
+                version, modified = await self.client.hmget(name, 'version', 'modified')
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error reading the cache version: {e}")
+            return None
+        return (version or b'0').decode(), float(modified)
+
+    async def get(self, key):
+        try:
+            payload = await self.client.get(f"{self.prefix}:{key}")
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error reading cache key {key}: {e}")
+            return False, None
+        if payload is None:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, unpack(payload)
+
+    async def set(self, key, value, tags=(), ttl=None, version=None):
+        """Stores a read, unless the data version moved past the one read before it"""
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        try:
+            await self._set(
+                keys=[f"{self.prefix}:version", f"{self.prefix}:{key}", *(self._tag(tag) for tag in tags)],
+                args=[version or '', pack(value), math.ceil(ttl), math.ceil(self.tag_ttl)]
+            )
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error writing cache key {key}: {e}")
+
+    async def invalidate(self, *tags):
+        """Drops the entries carrying any of the tags; with no tag, only bumps the data version"""
+        try:
+            self.invalidations += await self._invalidate(keys=[f"{self.prefix}:version", *(self._tag(tag) for tag in tags)])
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error invalidating cache tags {tags}: {e}")
+
+    def clear(self):
+        """Nothing to do: a shared cache is invalidated by whichever worker writes"""
+
+    async def close(self):
+        await self.client.aclose()
+
+    def stats(self):
+        return {
+            "backend": "redis",
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "invalidations": self.invalidations
+        }
+
+def create_cache_backend():
+    """Returns the read cache configured by CACHE_BACKEND"""
+    if Env.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(
+            Env.CACHE_REDIS_URL, Env.CACHE_PREFIX, Env.READ_CACHE_TTL, max(Env.READ_CACHE_TTL, Env.REFERENCE_CACHE_TTL)
+        )
+    return MemoryCacheBackend(Env.READ_CACHE_SIZE, Env.READ_CACHE_TTL)
+
+def _key_part(value):
+    if hasattr(value, 'cache_key'):
+        return value.cache_key()
+    if hasattr(value, 'model_dump'):
+        return value.model_dump()
+    return value
+
+def _format_tags(signature, tags, self, args, kwargs):
+    """Fills tags such as 'team:{team_id}' with the arguments of a call"""
+    bound = signature.bind(self, *args, **kwargs)
+    bound.apply_defaults()
+    return [tag.format(**bound.arguments) for tag in tags]
+
+def cached(*tags, cache='read_cache', ttl=None):
+    """Caches the result of an async SupabaseIntegration read method in its read cache
+
+    Entries are tagged with the given tags, formatted with the call's
+    arguments (e.g. 'team:{team_id}'), so writes can invalidate them. The
+    data version is read before the query, and the result is not stored if
+    a write invalidated the cache while the query ran.
+    """
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            key = method.__name__ + ':' + json.dumps(
+                [[_key_part(arg) for arg in args], {name: _key_part(value) for name, value in kwargs.items()}],
+                default=str, sort_keys=True, separators=(',', ':')
+            )
+            target = getattr(self, cache)
+            hit, value = await target.get(key)
+            if hit:
+                return value
+            version = await target.version()
+            value = await method(self, *args, **kwargs)
+            if version is not None:
+                await target.set(key, value, _format_tags(signature, tags, self, args, kwargs), ttl, version[0])
+            return value
+        return wrapper
+    return decorator
+
+def invalidates(*tags, cache='read_cache'):
+    """Invalidates the cached reads carrying any of the tags once an async write method succeeds"""
+    def decorator(method):
+        signature = inspect.signature(method)
+
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            result = await method(self, *args, **kwargs)
+            target = getattr(self, cache)
+            formatted = _format_tags(signature, tags, self, args, kwargs)
+            if isinstance(target, TTLCache):
+                for tag in formatted:
+                    target.invalidate(tag)
+            else:
+                await target.invalidate(*formatted)
+            return result
+        return wrapper
+    return decorator
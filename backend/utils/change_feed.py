@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+from configs.env import Env
+
+logger = logging.getLogger(__name__)
+
+# Tables holding photo/video keys
+MEDIA_TABLES = ('athlete', 'coach', 'team', 'sport', 'exercise')
+MEDIA_COLUMNS = ('photo_path', 'video_path')
+
+class CacheInvalidator:
+    """Translates row changes into targeted invalidation of one worker's in-process caches"""
+    def __init__(self, supabase_integration, schedule_index):
+        self.supabase_integration = supabase_integration
+        self.schedule_index = schedule_index
+        self.changes = 0
+        self.resets = 0
+
+    def apply(self, table, event, record=None, old_record=None):
+        record = record or {}
+        old_record = old_record or {}
+        row_id = record.get('id', old_record.get('id'))
+        self.changes += 1
+
+        read_cache = self.supabase_integration.read_cache
+        if not read_cache.shared:
+            tags = [table] if row_id is None else [table, f"{table}:{row_id}"]
+            if table == 'enrollment':
+                tags += [f"team:{team_id}" for team_id in {record.get('id_team'), old_record.get('id_team')} - {None}]
+            asyncio.get_running_loop().create_task(read_cache.invalidate(*tags))
+        if table in MEDIA_TABLES and row_id is not None:
+            for column in MEDIA_COLUMNS:
+                self.supabase_integration.media_key_cache.discard((table, column, row_id))
+
+        if table == 'routine':
+            for athlete_id in {record.get('id_athlete'), old_record.get('id_athlete')} - {None}:
+                self.schedule_index.invalidate(athlete_id)
+        elif table == 'routine_has_exercice':
+            if row_id is not None:
+                self.schedule_index.invalidate_slot(row_id)
+            for routine_id in {record.get('id_routine'), old_record.get('id_routine')} - {None}:
+                if not self.schedule_index.invalidate_routine(routine_id) and self.schedule_index.loaded_count():
+                    # The routine has no indexed slot yet, so look up which athlete owns it
+                    asyncio.get_running_loop().create_task(self._invalidate_routine_owner(routine_id))
+
+    async def _invalidate_routine_owner(self, routine_id):
+        try:
+            routine = await self.supabase_integration.get_routine_by_id(routine_id)
+        except Exception as e:
+            logger.error(f"Error resolving the athlete of routine {routine_id}: {e}")
+            return
+        if routine.data:
+            self.schedule_index.invalidate(routine.data[0]['id_athlete'])
+
+    def reset(self):
+        """Drops everything, since changes may have been missed while the feed was disconnected"""
+        self.resets += 1
+        self.supabase_integration.read_cache.clear()
+        self.supabase_integration.media_key_cache.clear()
+        self.schedule_index.invalidate_all()
+
+    def stats(self):
+        return {"changes": self.changes, "resets": self.resets}
+
+class RealtimeChangeFeed:
+    """Receives row changes from Supabase Realtime (tables must be in the supabase_realtime publication)"""
+    def __init__(self, client, tables, invalidator: CacheInvalidator):
+        self.client = client
+        self.tables = tables
+        self.invalidator = invalidator
+        self.channel = None
+
+    async def start(self):
+        self.channel = self.client.channel('cache-invalidation')
+        for table in self.tables:
+            self.channel.on_postgres_changes('*', callback=self._on_change, table=table, schema='public')
+        await self.channel.subscribe(self._on_state)
+
+    def _on_state(self, state, error):
+        if error is not None:
+            logger.error(f"Change feed subscription error: {error}")
+        elif getattr(state, 'value', state) == 'SUBSCRIBED':
+            self.invalidator.reset()
+
+    def _on_change(self, payload):
+        data = payload['data']
+        event = data['type']
+        self.invalidator.apply(data['table'], getattr(event, 'value', event), data.get('record'), data.get('old_record'))
+
+    async def stop(self):
+        if self.channel is not None:
+            await self.client.remove_channel(self.channel)
+            self.channel = None
+
+class PostgresChangeFeed:
+    """Receives row changes through LISTEN/NOTIFY on a direct Postgres connection
+
+    The notify_cache_invalidation() trigger of public/architecture/change_feed.sql
+    sends one JSON payload per changed row. The connection is watched with
+    add_reader, so no thread is held; it is reopened after a failure.
+    """
+    def __init__(self, dsn, channel, invalidator: CacheInvalidator, reconnect_delay=5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.invalidator = invalidator
+        self.reconnect_delay = reconnect_delay
+        self._task = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self._listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Change feed connection lost: {e}")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _listen(self):
+        import psycopg2
+        from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+        loop = asyncio.get_running_loop()
+        connection = await loop.run_in_executor(None, psycopg2.connect, self.dsn)
+        ready = asyncio.Event()
+        try:
+            connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            self.invalidator.reset()
+            loop.add_reader(connection.fileno(), ready.set)
+            while True:
+                await ready.wait()
+                ready.clear()
+                connection.poll()
+                while connection.notifies:
+                    self._dispatch(connection.notifies.pop(0).payload)
+        finally:
+            loop.remove_reader(connection.fileno())
+            connection.close()
+
+    def _dispatch(self, payload):
+        try:
+            change = json.loads(payload)
+            self.invalidator.apply(change['table'], change['type'], change.get('record'), change.get('old_record'))
+        except (ValueError, KeyError) as e:
+            logger.error(f"Invalid change feed payload {payload!r}: {e}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+def create_change_feed(supabase_integration, schedule_index):
+    """Returns the change feed configured by CHANGE_FEED, or None"""
+    invalidator = CacheInvalidator(supabase_integration, schedule_index)
+    tables = [table.strip() for table in Env.CHANGE_FEED_TABLES.split(',') if table.strip()]
+    if Env.CHANGE_FEED == "realtime":
+        if Env.DATABASE_BACKEND != "postgrest":
+            raise ValueError("CHANGE_FEED=realtime needs DATABASE_BACKEND=postgrest; use CHANGE_FEED=postgres")
+        return RealtimeChangeFeed(supabase_integration.get_client(), tables, invalidator)
+    if Env.CHANGE_FEED == "postgres":
+        return PostgresChangeFeed(
+            Env.CHANGE_FEED_DATABASE_URL, Env.CHANGE_FEED_CHANNEL, invalidator, Env.CHANGE_FEED_RECONNECT_DELAY
+        )
+    return None
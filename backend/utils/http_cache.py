@@ -0,0 +1,177 @@
+import hashlib
+import math
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers, MutableHeaders
+
+MEDIA_SUFFIXES = ('/photo', '/video')
+
+UNSAFE_METHODS = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+def etag_matches(if_none_match: str, etag: str):
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    etag = etag.removeprefix('W/')
+    return any(candidate.strip().removeprefix('W/') == etag for candidate in if_none_match.split(','))
+
+def not_modified_since(if_modified_since: str, last_modified: float):
+    """Whether an If-Modified-Since header is at or after a modification time"""
+    if not if_modified_since:
+        return False
+    try:
+        return parsedate_to_datetime(if_modified_since).timestamp() >= last_modified
+    except (TypeError, ValueError):
+        return False
+
+def shared_read_cache(scope):
+    """Returns the read cache of the app serving a request if its data version follows every worker's writes, else None
+
+    That holds for a shared (Redis) cache, or when a change feed invalidates
+    each worker's cache on writes made anywhere, including outside the API.
+    """
+    state = scope['app'].state
+    cache = getattr(getattr(state, 'supabase_integration', None), 'read_cache', None)
+    if cache is None or not (cache.shared or getattr(state, 'change_feed', None)):
+        return None
+    return cache
+
+class HTTPCacheMiddleware:
+    """Adds validators and Cache-Control to GET responses and answers revalidations with 304
+
+    JSON responses get a strong ETag hashed from the rendered body. When the
+    read cache's data version is known to every worker (see
+    shared_read_cache), validators come from that version instead, bumped by
+    every invalidation and every successful write request, so a revalidation
+    is answered with 304 before the handler runs; that ETag is weak, since it
+    is not derived from the body. The version also rolls over every
+    max_staleness seconds, like the read cache TTL. If the version cannot be
+    read (e.g. Redis down) the body is hashed.
+    Media responses are streamed untouched; their ETag/Last-Modified come
+    from S3 and the routes already answer conditional requests with 304.
+    Media URLs carrying a ?v= version are immutable, everything else must
+    be revalidated unless a JSON max-age is configured.
+    """
+    def __init__(self, app, prefix='/api', json_max_age=0, media_max_age=31536000, max_staleness=300, get_cache=shared_read_cache):
+        self.app = app
+        self.prefix = prefix
+        self.json_max_age = json_max_age
+        self.media_max_age = media_max_age
+        self.max_staleness = max_staleness
+        self.get_cache = get_cache
+
+    def cache_control(self, scope):
+        path = scope['path'].rstrip('/')
+        if path.startswith(f"{self.prefix}/monitoring"):
+            return 'no-store'
+        if path.endswith(MEDIA_SUFFIXES):
+            if 'v' in parse_qs(scope.get('query_string', b'').decode()):
+                return f"public, max-age={self.media_max_age}, immutable"
+            return 'no-cache'
+        if self.json_max_age > 0:
+            return f"private, max-age={self.json_max_age}"
+        return 'no-cache'
+
+    async def validators(self, scope, cache):
+        """Returns (ETag, Last-Modified timestamp) of a JSON read, or None if the data version is unknown"""
+        version = await cache.version() if cache is not None else None
+        if version is None:
+            return None
+        token, modified = version
+        epoch = math.floor(time.time() / self.max_staleness)
+        modified = max(modified, epoch * self.max_staleness)
+        url = hashlib.blake2b(f"{scope['path']}?{scope.get('query_string', b'').decode()}".encode(), digest_size=8).hexdigest()
+        return f'W/"{token}.{epoch}-{url}"', math.ceil(modified)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        if scope['method'] in UNSAFE_METHODS:
+            await self.write(scope, receive, send)
+            return
+        if scope['method'] not in ('GET', 'HEAD'):
+            await self.app(scope, receive, send)
+            return
+
+        cache_control = self.cache_control(scope)
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get('if-none-match')
+        validators = None
+        if cache_control != 'no-store' and not scope['path'].rstrip('/').endswith(MEDIA_SUFFIXES):
+            validators = await self.validators(scope, self.get_cache(scope))
+        if validators is not None:
+            etag, last_modified = validators
+            # If-None-Match takes precedence over If-Modified-Since
+            if etag_matches(if_none_match, etag) if if_none_match else not_modified_since(request_headers.get('if-modified-since'), last_modified):
+                await send({
+                    'type': 'http.response.start',
+                    'status': 304,
+                    'headers': [
+                        (b'etag', etag.encode()),
+                        (b'last-modified', formatdate(last_modified, usegmt=True).encode()),
+                        (b'cache-control', cache_control.encode())
+                    ]
+                })
+                await send({'type': 'http.response.body', 'body': b''})
+                return
+
+        start_message = None
+        body = []
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message['type'] == 'http.response.start':
+                headers = MutableHeaders(scope=message)
+                if message['status'] == 200 and headers.get('content-type', '').startswith('application/json'):
+                    if validators is not None:
+                        headers.setdefault('Cache-Control', cache_control)
+                        headers['ETag'] = validators[0]
+                        headers['Last-Modified'] = formatdate(validators[1], usegmt=True)
+                        await send(message)
+                        return
+                    # Hold the start message back until the whole body is known
+                    start_message = message
+                    return
+                if message['status'] in (200, 206, 304) and 'cache-control' not in headers:
+                    headers['Cache-Control'] = cache_control
+                await send(message)
+                return
+
+            if start_message is None or message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            body.append(message.get('body', b''))
+            if message.get('more_body', False):
+                return
+
+            content = b''.join(body)
+            etag = f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+            headers = MutableHeaders(scope=start_message)
+            headers.setdefault('Cache-Control', cache_control)
+            headers['ETag'] = etag
+            if etag_matches(if_none_match, etag):
+                start_message['status'] = 304
+                del headers['content-type']
+                del headers['content-length']
+                content = b''
+            await send(start_message)
+            await send({'type': 'http.response.body', 'body': content})
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def write(self, scope, receive, send):
+        """Runs a write request and bumps the data version before answering, so cached validators go stale"""
+        async def send_wrapper(message):
+            # Bulk writes may answer 200 with per-item errors, so anything below 400 counts
+            if message['type'] == 'http.response.start' and message['status'] < 400:
+                cache = self.get_cache(scope)
+                if cache is not None:
+                    await cache.invalidate()
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,242 @@
+import asyncio
+import time
+import weakref
+from collections import OrderedDict
+from bisect import bisect_left, insort
+from utils.schedule import WEEKDAYS
+
+def to_minutes(hour: str):
+    """Converts 'HH:MM' or 'HH:MM:SS' into minutes since midnight"""
+    parts = hour.split(':')
+    return int(parts[0]) * 60 + int(parts[1])
+
+def to_hour(minutes: int):
+    """Converts minutes since midnight into 'HH:MM'"""
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+MINUTES_PER_DAY = 24 * 60
+
+def minute_mask(start: int, end: int):
+    """Returns an int whose bits start..end-1 are set, one bit per minute of the day"""
+    return ((1 << (end - start)) - 1) << start if end > start else 0
+
+def free_windows(busy: int, start: int, end: int, duration: int):
+    """Returns the (start, end) runs of clear bits of busy within [start, end) lasting at least duration minutes
+
+    busy is a minute grid where every set bit is a minute in which someone is
+    occupied, so the union over many athletes is a plain bitwise OR and the
+    free runs are found by jumping from one run boundary to the next.
+    """
+    windows = []
+    free = ~busy & minute_mask(start, end)
+    while free:
+        run_start = (free & -free).bit_length() - 1
+        shifted = free >> run_start
+        run_length = (shifted ^ (shifted + 1)).bit_length() - 1
+        if run_length >= duration:
+            windows.append((run_start, run_start + run_length))
+        free &= ~minute_mask(run_start, run_start + run_length)
+    return windows
+
+# Postgres error raised by the check_routine_slot_overlap() trigger (migrations/004)
+EXCLUSION_VIOLATION = '23P01'
+
+class ScheduleConflictError(Exception):
+    """Raised when a routine slot overlaps other slots of the same athlete"""
+    def __init__(self, routine_exercise_ids):
+        super().__init__(f"Schedule overlaps routine exercises {routine_exercise_ids}")
+        self.routine_exercise_ids = routine_exercise_ids
+
+    @classmethod
+    def from_api_error(cls, error):
+        """Builds the error from the trigger's exclusion_violation, whose detail lists the overlapped slot IDs"""
+        return cls([int(slot_id) for slot_id in (error.details or '').split(',') if slot_id.strip().isdigit()])
+
+class IntervalIndex:
+    """Sorted set of half-open [start, end) intervals that answers overlap queries
+
+    Intervals are kept ordered by start. Any interval overlapping [start, end)
+    must begin after start - longest interval and before end, so a query only
+    bisects that window instead of scanning the whole list.
+    """
+    def __init__(self):
+        self._items = []
+        self._max_length = 0
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, start, end, key):
+        insort(self._items, (start, end, key))
+        self._max_length = max(self._max_length, end - start)
+
+    def remove(self, key):
+        self._items = [item for item in self._items if item[2] != key]
+
+    def keys(self):
+        return [key for _, _, key in self._items]
+
+    def overlapping(self, start, end):
+        """Returns the keys of the intervals overlapping [start, end)"""
+        low = bisect_left(self._items, (start - self._max_length,))
+        high = bisect_left(self._items, (end,))
+        return [key for item_start, item_end, key in self._items[low:high] if item_end > start and item_start < end]
+
+    def clusters(self):
+        """Groups intervals into runs of mutual overlap with a single sweep"""
+        groups = []
+        current = []
+        current_end = None
+        for start, end, key in self._items:
+            if current and start < current_end:
+                current.append((start, end, key))
+                current_end = max(current_end, end)
+            else:
+                if len(current) > 1:
+                    groups.append(current)
+                current = [(start, end, key)]
+                current_end = end
+        if len(current) > 1:
+            groups.append(current)
+        return groups
+
+class ScheduleIndex:
+    """Per-athlete, per-weekday interval indexes of routine exercise slots
+
+    Athletes are loaded lazily from the database, kept up to date as slots
+    are added or removed through the API and reloaded after ttl seconds. At
+    most max_athletes are kept, the least recently used being evicted with
+    their slot and routine lookups. The index only gives early, per-item
+    answers: overlaps are enforced by the database (migrations/004).
+    """
+    def __init__(self, ttl=300, max_athletes=10000):
+        self.ttl = ttl
+        self.max_athletes = max_athletes
+        self._athletes = OrderedDict()
+        self._loaded_at = {}
+        self._owners = {}
+        self._routines = {}
+        self._athlete_routines = {}
+        # Dropped as soon as no request holds or waits for them
+        self._locks = weakref.WeakValueDictionary()
+
+    def loaded_count(self):
+        """Number of athletes whose slots are currently indexed"""
+        return len(self._loaded_at)
+
+    def lock(self, athlete_id):
+        """Serializes check-then-write sequences for one athlete within this worker"""
+        lock = self._locks.get(athlete_id)
+        if lock is None:
+            lock = self._locks[athlete_id] = asyncio.Lock()
+        return lock
+
+    def is_loaded(self, athlete_id):
+        loaded_at = self._loaded_at.get(athlete_id)
+        if loaded_at is None or time.monotonic() - loaded_at >= self.ttl:
+            return False
+        self._athletes.move_to_end(athlete_id)
+        return True
+
+    def _drop(self, athlete_id):
+        """Forgets an athlete with its slot and routine lookups"""
+        for index in self._athletes.pop(athlete_id, {}).values():
+            for slot_id in index.keys():
+                if self._owners.get(slot_id) == athlete_id:
+                    del self._owners[slot_id]
+        for routine_id in self._athlete_routines.pop(athlete_id, ()):
+            if self._routines.get(routine_id) == athlete_id:
+                del self._routines[routine_id]
+        self._loaded_at.pop(athlete_id, None)
+
+    def _track_routine(self, athlete_id, routine_id):
+        previous = self._routines.get(routine_id)
+        if previous is not None and previous != athlete_id:
+            self._athlete_routines.get(previous, set()).discard(routine_id)
+        self._routines[routine_id] = athlete_id
+        self._athlete_routines.setdefault(athlete_id, set()).add(routine_id)
+
+    def load(self, athlete_id, slots):
+        """Replaces the indexes of an athlete with the given routine_has_exercice rows"""
+        self._drop(athlete_id)
+        weekdays = {}
+        for slot in slots:
+            index = weekdays.setdefault(WEEKDAYS[slot['days_of_week']], IntervalIndex())
+            index.add(to_minutes(slot['start_hour']), to_minutes(slot['end_hour']), slot['id'])
+            self._owners[slot['id']] = athlete_id
+            self._track_routine(athlete_id, slot['id_routine'])
+        self._athletes[athlete_id] = weekdays
+        self._loaded_at[athlete_id] = time.monotonic()
+        while len(self._athletes) > self.max_athletes:
+            self._drop(next(iter(self._athletes)))
+
+    async def ensure_loaded(self, supabase_integration, athlete_id):
+        """Loads the slots of an athlete unless a fresh copy is already indexed"""
+        if not self.is_loaded(athlete_id):
+            result = await supabase_integration.get_routine_exercises_by_athlete_id(athlete_id)
+            self.load(athlete_id, result.data)
+
+    def invalidate(self, athlete_id):
+        self._loaded_at.pop(athlete_id, None)
+
+    def invalidate_slot(self, slot_id):
+        """Marks the athlete owning a slot for reload"""
+        athlete_id = self._owners.get(slot_id)
+        if athlete_id is not None:
+            self.invalidate(athlete_id)
+
+    def invalidate_routine(self, routine_id):
+        """Marks the athlete owning a routine for reload; returns False if the routine is not indexed"""
+        athlete_id = self._routines.get(routine_id)
+        if athlete_id is None:
+            return False
+        self.invalidate(athlete_id)
+        return True
+
+    def invalidate_all(self):
+        self._loaded_at.clear()
+
+    def add(self, athlete_id, slot):
+        if athlete_id not in self._athletes:
+            return
+        index = self._athletes[athlete_id].setdefault(WEEKDAYS[slot['days_of_week']], IntervalIndex())
+        index.add(to_minutes(slot['start_hour']), to_minutes(slot['end_hour']), slot['id'])
+        self._owners[slot['id']] = athlete_id
+        if 'id_routine' in slot:
+            self._track_routine(athlete_id, slot['id_routine'])
+
+    def replace(self, slot, athlete_id=None):
+        """Re-indexes a slot whose weekday, hours or routine changed, under athlete_id when it moved to another athlete"""
+        owner = self._owners.get(slot['id'])
+        self.remove(slot['id'])
+        athlete_id = athlete_id if athlete_id is not None else owner
+        if athlete_id is not None:
+            self.add(athlete_id, slot)
+
+    def remove(self, slot_id):
+        athlete_id = self._owners.pop(slot_id, None)
+        if athlete_id is None:
+            return
+        for index in self._athletes.get(athlete_id, {}).values():
+            index.remove(slot_id)
+
+    def overlapping(self, athlete_id, days_of_week, start_hour, end_hour):
+        """Returns the IDs of the athlete's slots overlapping the given weekday and hours"""
+        index = self._athletes.get(athlete_id, {}).get(WEEKDAYS[days_of_week])
+        if index is None:
+            return []
+        return index.overlapping(to_minutes(start_hour), to_minutes(end_hour))
+
+    def conflicts(self, athlete_id):
+        """Returns every group of overlapping slots of an athlete, weekday by weekday"""
+        names = {number: name for name, number in WEEKDAYS.items()}
+        report = []
+        for weekday, index in sorted(self._athletes.get(athlete_id, {}).items()):
+            for group in index.clusters():
+                report.append({
+                    "days_of_week": names[weekday],
+                    "start_hour": to_hour(min(start for start, _, _ in group)),
+                    "end_hour": to_hour(max(end for _, end, _ in group)),
+                    "routine_exercise_ids": [key for _, _, key in group]
+                })
+        return report
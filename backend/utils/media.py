@@ -0,0 +1,107 @@
+import mimetypes
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Optional
+from fastapi import Header, HTTPException, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from starlette.background import BackgroundTask
+from configs.env import Env
+from utils.s3 import NotModifiedError, RangeNotSatisfiableError
+
+CHUNK_SIZE = 64 * 1024
+
+GENERIC_CONTENT_TYPES = ('binary/octet-stream', 'application/octet-stream')
+
+def media_type(path, s3_object=None):
+    """Returns the content type S3 stored for an object, falling back to a guess from its extension"""
+    content_type = (s3_object or {}).get('ContentType')
+    if content_type and content_type not in GENERIC_CONTENT_TYPES:
+        return content_type
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+async def iter_s3_body(body, chunk_size=CHUNK_SIZE):
+    """Yields an S3Body in chunks read on the S3 thread pool and closes it once exhausted"""
+    try:
+        async for chunk in body.iter_chunks(chunk_size):
+            yield chunk
+    finally:
+        await body.close()
+
+def build_streaming_response(s3_object, content_type):
+    """Wraps an S3 get_object response in a StreamingResponse
+
+    Ranged reads answer with 206 Partial Content and the Content-Range
+    reported by S3, so players can seek without downloading the whole file.
+    """
+    headers = {
+        'Accept-Ranges': 'bytes',
+        'Content-Length': str(s3_object['ContentLength'])
+    }
+    status_code = 200
+    if s3_object.get('ContentRange'):
+        headers['Content-Range'] = s3_object['ContentRange']
+        status_code = 206
+    if s3_object.get('ETag'):
+        headers['ETag'] = s3_object['ETag']
+    if s3_object.get('LastModified'):
+        headers['Last-Modified'] = format_datetime(s3_object['LastModified'].astimezone(timezone.utc), usegmt=True)
+
+    return StreamingResponse(
+        iter_s3_body(s3_object['Body']),
+        status_code=status_code,
+        media_type=content_type,
+        headers=headers,
+        # Frees the bucket slot even if the stream never started (e.g. the client left)
+        background=BackgroundTask(s3_object['Body'].close)
+    )
+
+def not_modified_response(error):
+    """Answers a conditional media request whose cached copy is still current with 304 Not Modified"""
+    headers = {}
+    if error.etag:
+        headers['ETag'] = error.etag
+    if error.last_modified:
+        headers['Last-Modified'] = error.last_modified
+    return Response(status_code=304, headers=headers)
+
+class MediaRequest:
+    """Range and conditional headers of a photo or video request, in the order the controllers take them"""
+    def __init__(
+        self,
+        byte_range: Optional[str] = Header(None, alias="Range"),
+        if_range: Optional[str] = Header(None),
+        if_none_match: Optional[str] = Header(None),
+        if_modified_since: Optional[str] = Header(None)
+    ):
+        self.byte_range = byte_range
+        self.if_range = if_range
+        self.if_none_match = if_none_match
+        self.if_modified_since = if_modified_since
+
+    @property
+    def headers(self):
+        return (self.byte_range, self.if_range, self.if_none_match, self.if_modified_since)
+
+async def serve_media(get_url, get_file, not_found="Photo not found", variant=None):
+    """Answers a photo or video route: redirect to S3, stream, 304 Not Modified or 416
+
+    :param get_url: async callable returning a presigned URL or None
+    :param get_file: async callable returning (s3_object, content_type)
+    """
+    try:
+        if Env.MEDIA_DELIVERY_MODE == "redirect" and not variant:
+            url = await get_url()
+            if url:
+                return RedirectResponse(url, status_code=Env.MEDIA_REDIRECT_STATUS)
+        s3_object, content_type = await get_file()
+        if not s3_object:
+            raise HTTPException(status_code=404, detail=not_found)
+        return build_streaming_response(s3_object, content_type)
+    except HTTPException:
+        raise
+    except NotModifiedError as e:
+        return not_modified_response(e)
+    except RangeNotSatisfiableError as e:
+        raise HTTPException(status_code=416, detail=str(e), headers={"Content-Range": f"bytes */{e.size}"})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
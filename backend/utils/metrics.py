@@ -0,0 +1,219 @@
+import bisect
+import functools
+import threading
+import time
+from contextvars import ContextVar
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.routing import Mount
+
+# Seconds; roughly exponential from 1 ms to 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+SPAN_DESCRIPTIONS = {
+    'db': 'Supabase',
+    's3': 'S3',
+    'serialize': 'JSON serialization',
+    'handler': 'Route handler'
+}
+
+class Histogram:
+    """Cumulative histogram per label set, rendered in the Prometheus text format"""
+    def __init__(self, name, help, labels, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0, 0.0]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, (counts, count, total) in sorted(self._series.items()):
+                labels = ','.join(f'{name}="{value}"' for name, value in zip(self.labels, label_values))
+                cumulative = 0
+                for bucket, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{self.name}_bucket{{{labels},le="{bucket}"}} {cumulative}')
+                lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'{self.name}_sum{{{labels}}} {total}')
+                lines.append(f'{self.name}_count{{{labels}}} {count}')
+        return '\n'.join(lines)
+
+class Counter:
+    """Monotonic counter per label set, rendered in the Prometheus text format"""
+    def __init__(self, name, help, labels):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._series[label_values] = self._series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._series.items()):
+                labels = ','.join(f'{name}="{value}"' for name, value in zip(self.labels, label_values))
+                lines.append(f'{self.name}{{{labels}}} {value}')
+        return '\n'.join(lines)
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds', 'Time until the response headers are sent', ('method', 'route', 'status')
+)
+SPAN_DURATION = Histogram(
+    'http_request_span_duration_seconds', 'Time spent per request in Supabase, S3, JSON serialization and the route handler', ('route', 'span')
+)
+SPAN_CALLS = Counter('http_request_span_calls_total', 'Supabase and S3 calls made by requests', ('route', 'span'))
+S3_BYTES = Counter('s3_response_bytes_total', 'Bytes of S3 objects opened by requests', ('route',))
+COALESCED_CALLS = Counter(
+    'supabase_coalesced_calls_total', 'Supabase reads answered by an identical call already in flight', ('method',)
+)
+METRICS = (REQUEST_DURATION, SPAN_DURATION, SPAN_CALLS, S3_BYTES, COALESCED_CALLS)
+
+class RequestSpans:
+    """Time, call count and bytes accumulated per span name while one request is handled"""
+    def __init__(self):
+        self.durations = {}
+        self.calls = {}
+        self.s3_bytes = 0
+
+    def add(self, name, seconds, calls=1):
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + calls
+
+_current = ContextVar('request_spans', default=None)
+
+def record(name, seconds, calls=1):
+    """Adds a timed call to the spans of the request being handled, if any"""
+    spans = _current.get()
+    if spans is not None:
+        spans.add(name, seconds, calls)
+
+def record_s3_bytes(size):
+    spans = _current.get()
+    if spans is not None:
+        spans.s3_bytes += size or 0
+
+def timed(name):
+    """Records the duration of an async method as a span of the current request"""
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+async def on_request(request):
+    """httpx event hook marking when a Supabase request is sent"""
+    request.extensions['started_at'] = time.perf_counter()
+
+async def on_response(response):
+    """httpx event hook recording a Supabase round trip (until the response headers arrive)"""
+    started_at = response.request.extensions.get('started_at')
+    if started_at is not None:
+        record('db', time.perf_counter() - started_at)
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse that records its serialization time as a span"""
+    def render(self, content):
+        start = time.perf_counter()
+        try:
+            return super().render(content)
+        finally:
+            record('serialize', time.perf_counter() - start, calls=0)
+
+class TimedRoute(APIRoute):
+    """APIRoute that records the whole handler (dependencies, endpoint, validation and serialization) as a span"""
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            start = time.perf_counter()
+            try:
+                return await handler(request)
+            finally:
+                record('handler', time.perf_counter() - start, calls=0)
+        return timed_handler
+
+def route_template(scope):
+    """Returns the path template of the matched route (e.g. /api/athletes/{athlete_id})"""
+    route = scope.get('route')
+    if getattr(route, 'path', None) is None:
+        return 'unmatched'
+    if isinstance(route, Mount):
+        return route.path + '/{path}'
+    # Depending on the FastAPI version, a route included through a prefixed router
+    # keeps its path relative to that router: the literal prefix is taken back
+    # from the request path (prefixes here hold no parameters)
+    segments = scope['path'].split('/')
+    prefix = segments[1:len(segments) - len(route.path.split('/')) + 1]
+    return ''.join(f'/{segment}' for segment in prefix) + route.path
+
+def render_metrics():
+    return '\n'.join(metric.render() for metric in METRICS) + '\n'
+
+class MetricsMiddleware:
+    """Collects the spans of each request, reports them in Server-Timing and feeds the /metrics histograms
+
+    Histograms are labelled by route template (e.g. /api/athletes/{athlete_id})
+    so IDs do not explode the number of series.
+    """
+    def __init__(self, app, server_timing=True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        spans = RequestSpans()
+        token = _current.set(spans)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                elapsed = time.perf_counter() - start
+                template = route_template(scope)
+                REQUEST_DURATION.observe((scope['method'], template, str(message['status'])), elapsed)
+                for name, seconds in spans.durations.items():
+                    SPAN_DURATION.observe((template, name), seconds)
+                    if spans.calls[name]:
+                        SPAN_CALLS.inc((template, name), spans.calls[name])
+                if spans.s3_bytes:
+                    S3_BYTES.inc((template,), spans.s3_bytes)
+                if self.server_timing:
+                    entries = [
+                        f'{name};dur={seconds * 1000:.1f};desc="{SPAN_DESCRIPTIONS.get(name, name)}'
+                        + (f' x{spans.calls[name]}"' if spans.calls[name] else '"')
+                        for name, seconds in spans.durations.items()
+                    ]
+                    entries.append(f'app;dur={elapsed * 1000:.1f}')
+                    MutableHeaders(scope=message).append('Server-Timing', ', '.join(entries))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
@@ -0,0 +1,147 @@
+import base64
+import json
+import re
+from typing import Generic, List, Optional, TypeVar, Union
+from pydantic import BaseModel
+from fastapi import HTTPException, Query, Response
+from configs.env import Env
+from utils.projection import columns as model_columns, embeds, projection
+
+FIELD_PATTERN = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+T = TypeVar('T')
+
+class ListParams:
+    """Query parameters shared by every list route: page size, keyset cursor and field projection
+
+    Pagination is opt-in: without limit or cursor a route returns its whole
+    list as a plain array; with either, it returns one page as
+    {"items": [...], "next_cursor": ...} (see page_response).
+    """
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=Env.LIST_MAX_LIMIT, description="Page size; returns one page instead of the whole list"),
+        cursor: Optional[str] = Query(None, description="Opaque cursor taken from next_cursor (or the X-Next-Cursor header)"),
+        fields: Optional[str] = Query(None, description="Comma-separated list of columns to return")
+    ):
+        self.paginated = limit is not None or cursor is not None
+        self.limit = limit if limit is not None else Env.LIST_DEFAULT_LIMIT
+        self.cursor = cursor
+        self.fields = fields
+        try:
+            self.cursor_values = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        self.columns = None
+        if fields:
+            self.columns = [field.strip() for field in fields.split(',') if field.strip()]
+            invalid = [field for field in self.columns if not FIELD_PATTERN.match(field)]
+            if invalid or not self.columns:
+                raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(invalid) or fields}")
+
+    def cache_key(self):
+        return (self.paginated, self.limit, self.cursor, self.fields)
+
+    def __eq__(self, other):
+        return isinstance(other, ListParams) and self.cache_key() == other.cache_key()
+
+    def __hash__(self):
+        return hash(self.cache_key())
+
+class Page:
+    """One page of rows and the cursor pointing at the next one (None on the last page)
+
+    paginated is False for a whole list returned because the route was called
+    without limit or cursor.
+    """
+    def __init__(self, data, next_cursor=None, paginated=False):
+        self.data = data
+        self.next_cursor = next_cursor
+        self.paginated = paginated
+
+class PageResponse(BaseModel, Generic[T]):
+    """Body of a paginated list route"""
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+def page_model(model):
+    """Returns the response model of a list route: a plain array, or one page when limit/cursor is given"""
+    return Union[List[model], PageResponse[model]]
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(values, list) or not values or not isinstance(values[-1], int):
+        raise ValueError("Invalid cursor")
+    return values
+
+def select_columns(params: ListParams = None, sort: str = None, model=None):
+    """Returns the column list for a select, keeping the keyset columns when a projection is requested
+
+    With a response model the default is the model's projection and ?fields=
+    may only name its columns; its embeds are always kept.
+    """
+    if model is None:
+        if params is None or not params.columns:
+            return '*'
+        columns = list(params.columns)
+        extra = []
+    else:
+        if params is None or not params.columns:
+            return projection(model)
+        allowed = model_columns(model)
+        invalid = [field for field in params.columns if field not in allowed]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid fields: {', '.join(invalid)}")
+        columns = list(params.columns)
+        extra = embeds(model)
+    for key in (sort, 'id'):
+        if key and key not in columns:
+            columns.append(key)
+    return ','.join(columns + extra)
+
+def _quote(value):
+    value = str(value).replace('\\', '\\\\').replace('"', '\\"')
+    return f'"{value}"'
+
+async def paginate(query, params: ListParams = None, sort: str = None):
+    """Orders the query by (sort, id), applies the keyset cursor and page size and executes it"""
+    if sort:
+        query = query.order(sort)
+    query = query.order('id')
+
+    if params is None or not params.paginated:
+        result = await query.execute()
+        return Page(result.data)
+
+    if params.cursor_values:
+        if sort:
+            if len(params.cursor_values) != 2:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            value, last_id = params.cursor_values
+            query = query.or_(f"{sort}.gt.{_quote(value)},and({sort}.eq.{_quote(value)},id.gt.{last_id})")
+        else:
+            query = query.gt('id', params.cursor_values[-1])
+
+    # Fetch one extra row to know whether there is a next page
+    result = await query.limit(params.limit + 1).execute()
+    rows = result.data
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last[sort], last['id']] if sort else [last['id']])
+    return Page(rows, next_cursor, paginated=True)
+
+def page_response(response: Response, page: Page):
+    """Returns the rows of a whole list, or a page with its next cursor (also exposed in the X-Next-Cursor header)"""
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.paginated:
+        return {"items": page.data, "next_cursor": page.next_cursor}
+    return page.data
@@ -0,0 +1,29 @@
+import functools
+import typing
+from pydantic import BaseModel
+
+def _embedded_model(annotation):
+    """Returns the model behind a field typed Model, Optional[Model] or List[Model], else None"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for argument in typing.get_args(annotation):
+        model = _embedded_model(argument)
+        if model is not None:
+            return model
+    return None
+
+def columns(model):
+    """Returns the plain (non-embedded) columns of a response model"""
+    return [name for name, field in model.model_fields.items() if _embedded_model(field.annotation) is None]
+
+def embeds(model):
+    """Returns the PostgREST embeds of a response model, e.g. ['exercise(id,name)']"""
+    return [
+        f"{name}({projection(_embedded_model(field.annotation))})"
+        for name, field in model.model_fields.items() if _embedded_model(field.annotation) is not None
+    ]
+
+@functools.lru_cache(maxsize=None)
+def projection(model):
+    """Returns the PostgREST select string of a response model: its columns plus embedded models as relation(columns)"""
+    return ','.join(columns(model) + embeds(model))
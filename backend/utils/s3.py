@@ -1,13 +1,44 @@
+import asyncio
 import boto3
+import functools
 import os
+from botocore.config import Config
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
 import logging
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from configs.env import Env
+from utils.metrics import timed, record_s3_bytes
 
 logger = logging.getLogger(__name__)
 
+class RangeNotSatisfiableError(Exception):
+    """Raised when a requested byte range lies outside the S3 object"""
+    def __init__(self, size):
+        super().__init__(f"Requested range not satisfiable (object size: {size})")
+        self.size = size
+
+class NotModifiedError(Exception):
+    """Raised when a conditional download finds the client's cached copy still current"""
+    def __init__(self, etag=None, last_modified=None):
+        super().__init__("Not modified")
+        self.etag = etag
+        self.last_modified = last_modified
+
+class ObjectTooLargeError(Exception):
+    """Raised when an uploaded S3 object is larger than allowed"""
+    def __init__(self, size, max_size):
+        super().__init__(f"Uploaded file is {size} bytes, at most {max_size} are allowed")
+        self.size = size
+        self.max_size = max_size
+
 class S3Client:
     _instance = None
     _client = None
+    _url_cache = {}
+    _url_cache_lock = threading.Lock()
     
     def __new__(cls):
         if cls._instance is None:
@@ -32,7 +63,13 @@ class S3Client:
                 aws_access_key_id=s3_id,
                 aws_secret_access_key=s3_key,
                 endpoint_url=s3_endpoint,
-                region_name=os.getenv('S3_REGION', 'us-east-1')
+                region_name=os.getenv('S3_REGION', 'us-east-1'),
+                config=Config(
+                    max_pool_connections=Env.S3_POOL_SIZE,
+                    connect_timeout=Env.S3_CONNECT_TIMEOUT,
+                    read_timeout=Env.S3_READ_TIMEOUT,
+                    retries={'max_attempts': Env.S3_MAX_ATTEMPTS, 'mode': 'standard'}
+                )
             )
             logger.info(f"S3 client initialized successfully with endpoint: {s3_endpoint}")
 
@@ -54,6 +91,34 @@ class S3Client:
             logger.error(f"Error generating presigned URL for {filename}: {e}")
             return None
 
+    def get_cached_file_url(self, bucket, filename, expiration=3600, refresh_margin=300, max_entries=10000):
+        """Return a presigned URL for an S3 object, reusing it until it is close to expiring
+
+        :param filename: Name/key of the file in S3
+        :param expiration: Time in seconds for a newly generated URL to remain valid
+        :param refresh_margin: Seconds before expiry at which a cached URL is regenerated
+        :param max_entries: Maximum number of URLs kept in the cache
+        :return: Presigned URL as string. If error, returns None.
+        """
+        key = (bucket, filename)
+        now = time.monotonic()
+        with S3Client._url_cache_lock:
+            cached = S3Client._url_cache.get(key)
+            if cached and cached[1] - refresh_margin > now:
+                return cached[0]
+
+        url = self.get_file_url(bucket, filename, expiration)
+        if url is None:
+            return None
+
+        with S3Client._url_cache_lock:
+            S3Client._url_cache.pop(key, None)
+            while len(S3Client._url_cache) >= max_entries:
+                # Dicts keep insertion order, so the first entry is the oldest URL
+                S3Client._url_cache.pop(next(iter(S3Client._url_cache)))
+            S3Client._url_cache[key] = (url, now + expiration)
+        return url
+
     def get_file(self, bucket, filename):
         """Download a file from S3 bucket
 
@@ -67,6 +132,58 @@ class S3Client:
             logger.error(f"Error downloading file {filename} from bucket {bucket}: {e}")
             return None
 
+    def get_file_stream(self, bucket, filename, byte_range=None, if_range=None, if_none_match=None, if_modified_since=None):
+        """Open a streaming download of a file from S3 bucket, optionally ranged or conditional
+
+        :param filename: Name/key of the file to download
+        :param byte_range: Value of the HTTP Range header (e.g. 'bytes=0-1023')
+        :param if_range: Value of the HTTP If-Range header; when the validator no
+            longer matches the object, the whole file is returned instead of the range
+        :param if_none_match: Value of the HTTP If-None-Match header
+        :param if_modified_since: Value of the HTTP If-Modified-Since header, ignored
+            when if_none_match is given
+        :return: get_object response (with a streaming 'Body') if successful, else None
+        :raises NotModifiedError: if the client's copy matches the object
+        """
+        params = {'Bucket': bucket, 'Key': filename}
+        if if_none_match:
+            params['IfNoneMatch'] = if_none_match
+        elif if_modified_since:
+            try:
+                params['IfModifiedSince'] = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                pass
+        if byte_range:
+            if not if_range:
+                params['Range'] = byte_range
+            elif if_range.startswith('"'):
+                # If-Range only allows strong comparison, which S3 does for us
+                params['Range'] = byte_range
+                params['IfMatch'] = if_range
+            elif not if_range.startswith('W/'):
+                try:
+                    params['IfUnmodifiedSince'] = parsedate_to_datetime(if_range)
+                    params['Range'] = byte_range
+                except (TypeError, ValueError):
+                    pass
+        try:
+            return S3Client._client.get_object(**params)
+        except ClientError as e:
+            error = e.response.get('Error', {})
+            if error.get('Code') in ('NotModified', '304'):
+                headers = e.response.get('ResponseMetadata', {}).get('HTTPHeaders', {})
+                raise NotModifiedError(headers.get('etag'), headers.get('last-modified'))
+            if error.get('Code') in ('PreconditionFailed', '412') and 'Range' in params:
+                # The object changed since the client cached it: send it whole
+                return self.get_file_stream(bucket, filename, if_none_match=if_none_match, if_modified_since=if_modified_since)
+            if error.get('Code') == 'InvalidRange':
+                raise RangeNotSatisfiableError(error.get('ActualObjectSize', '*'))
+            if error.get('Code') in ('NoSuchKey', '404'):
+                logger.debug(f"File {filename} not found in bucket {bucket}")
+                return None
+            logger.error(f"Error streaming file {filename} from bucket {bucket}: {e}")
+            return None
+
     def upload_file(self, bucket, filename, file_data, content_type=None):
         """Upload a file to S3 bucket
 
@@ -92,6 +209,92 @@ class S3Client:
             logger.error(f"Error uploading file {filename} to bucket {bucket}: {e}")
             return False
     
+    def get_upload_form(self, bucket, filename, content_type, max_size, expiration=3600):
+        """Generate a presigned POST that lets a client upload an object straight into S3
+
+        Unlike a presigned PUT, the signed policy bounds the body size, so S3
+        rejects uploads larger than max_size.
+
+        :param filename: S3 object key/name
+        :param content_type: MIME type the client must send as Content-Type
+        :param max_size: Largest accepted body, in bytes
+        :return: {"url", "fields"} to send as multipart/form-data. If error, returns None.
+        """
+        try:
+            return S3Client._client.generate_presigned_post(
+                bucket,
+                filename,
+                Fields={'Content-Type': content_type},
+                Conditions=[{'Content-Type': content_type}, ['content-length-range', 1, max_size]],
+                ExpiresIn=expiration
+            )
+        except ClientError as e:
+            logger.error(f"Error generating upload form for {filename}: {e}")
+            return None
+
+    def create_multipart_upload(self, bucket, filename, content_type, part_count, expiration=3600):
+        """Start a multipart upload and presign one URL per part
+
+        :param filename: S3 object key/name
+        :param part_count: Number of parts the client will upload
+        :return: (upload_id, [part URLs]) if successful, else (None, None)
+        """
+        try:
+            upload = S3Client._client.create_multipart_upload(Bucket=bucket, Key=filename, ContentType=content_type)
+            upload_id = upload['UploadId']
+            urls = [
+                S3Client._client.generate_presigned_url(
+                    'upload_part',
+                    Params={'Bucket': bucket, 'Key': filename, 'UploadId': upload_id, 'PartNumber': part_number},
+                    ExpiresIn=expiration
+                )
+                for part_number in range(1, part_count + 1)
+            ]
+            return upload_id, urls
+        except ClientError as e:
+            logger.error(f"Error starting multipart upload of {filename} to bucket {bucket}: {e}")
+            return None, None
+
+    def complete_multipart_upload(self, bucket, filename, upload_id, parts):
+        """Assemble the uploaded parts of a multipart upload into the final object
+
+        :param parts: list of (part_number, etag) tuples
+        :return: True if the object was assembled, else False
+        """
+        try:
+            S3Client._client.complete_multipart_upload(
+                Bucket=bucket,
+                Key=filename,
+                UploadId=upload_id,
+                MultipartUpload={'Parts': [{'PartNumber': number, 'ETag': etag} for number, etag in sorted(parts)]}
+            )
+            return True
+        except ClientError as e:
+            logger.error(f"Error completing multipart upload of {filename} to bucket {bucket}: {e}")
+            return False
+
+    def abort_multipart_upload(self, bucket, filename, upload_id):
+        """Abort a multipart upload and free its stored parts
+
+        :return: True if the upload was aborted, else False
+        """
+        try:
+            S3Client._client.abort_multipart_upload(Bucket=bucket, Key=filename, UploadId=upload_id)
+            return True
+        except ClientError as e:
+            logger.error(f"Error aborting multipart upload of {filename} to bucket {bucket}: {e}")
+            return False
+
+    def get_file_info(self, bucket, filename):
+        """Return the metadata of an S3 object without downloading it
+
+        :return: head_object response (ContentLength, ETag, ContentType...) if the object exists, else None
+        """
+        try:
+            return S3Client._client.head_object(Bucket=bucket, Key=filename)
+        except ClientError:
+            return None
+
     def delete_file(self, bucket, filename):
         """Delete a file from S3 bucket
 
@@ -104,4 +307,147 @@ class S3Client:
             return True
         except ClientError as e:
             logger.error(f"Error deleting file {filename} from bucket {bucket}: {e}")
-            return False
\ No newline at end of file
+            return False
+
+def parse_bucket_limits(value):
+    """Parses 'photos=32,videos=8' into {'photos': 32, 'videos': 8}"""
+    limits = {}
+    for item in (value or '').split(','):
+        if '=' in item:
+            bucket, limit = item.split('=', 1)
+            limits[bucket.strip()] = int(limit)
+    return limits
+
+class AsyncS3Client:
+    """Awaitable facade over S3Client
+
+    Blocking boto3 calls run on a dedicated thread pool sized like the
+    botocore connection pool, so a call never waits for a connection while
+    holding a thread. A semaphore per bucket caps how many calls a single
+    bucket (e.g. large videos) may have in flight.
+    """
+    _instance = None
+    _executor = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(AsyncS3Client, cls).__new__(cls)
+        return cls._instance
+
+    def __init__(self):
+        if AsyncS3Client._executor is None:
+            self.sync = S3Client()
+            self._limits = parse_bucket_limits(Env.S3_BUCKET_CONCURRENCY)
+            self._semaphores = {}
+            AsyncS3Client._executor = ThreadPoolExecutor(max_workers=Env.S3_POOL_SIZE, thread_name_prefix='s3')
+
+    @classmethod
+    def close(cls):
+        """Shuts the thread pool down; the next instance starts a new one"""
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+
+    def _semaphore(self, bucket):
+        if bucket not in self._semaphores:
+            self._semaphores[bucket] = asyncio.Semaphore(self._limits.get(bucket, Env.S3_DEFAULT_CONCURRENCY))
+        return self._semaphores[bucket]
+
+    async def _call(self, method, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(AsyncS3Client._executor, functools.partial(method, *args, **kwargs))
+
+    @timed('s3')
+    async def _run(self, bucket, method, *args, **kwargs):
+        async with self._semaphore(bucket):
+            return await self._call(method, *args, **kwargs)
+
+    @timed('s3')
+    async def _open(self, method, *args):
+        return await self._call(method, *args)
+
+    async def get_file(self, bucket, filename):
+        return await self._run(bucket, self.sync.get_file, bucket, filename)
+
+    async def get_file_stream(self, bucket, filename, byte_range=None, if_range=None, if_none_match=None, if_modified_since=None):
+        """Opens a streaming download whose Body is an S3Body holding one of the bucket's slots until it is closed"""
+        semaphore = self._semaphore(bucket)
+        await semaphore.acquire()
+        try:
+            s3_object = await self._open(self.sync.get_file_stream, bucket, filename, byte_range, if_range, if_none_match, if_modified_since)
+        except BaseException:
+            semaphore.release()
+            raise
+        if not s3_object:
+            semaphore.release()
+            return None
+        record_s3_bytes(s3_object.get('ContentLength'))
+        s3_object['Body'] = S3Body(self, s3_object['Body'], semaphore)
+        return s3_object
+
+    async def read(self, bucket, s3_object):
+        """Reads the whole body of a streaming get_object response"""
+        return await s3_object['Body'].read()
+
+    async def upload_file(self, bucket, filename, file_data, content_type=None):
+        return await self._run(bucket, self.sync.upload_file, bucket, filename, file_data, content_type)
+
+    async def delete_file(self, bucket, filename):
+        return await self._run(bucket, self.sync.delete_file, bucket, filename)
+
+    async def get_file_info(self, bucket, filename):
+        return await self._run(bucket, self.sync.get_file_info, bucket, filename)
+
+    async def create_multipart_upload(self, bucket, filename, content_type, part_count, expiration=3600):
+        return await self._run(bucket, self.sync.create_multipart_upload, bucket, filename, content_type, part_count, expiration)
+
+    async def complete_multipart_upload(self, bucket, filename, upload_id, parts):
+        return await self._run(bucket, self.sync.complete_multipart_upload, bucket, filename, upload_id, parts)
+
+    async def abort_multipart_upload(self, bucket, filename, upload_id):
+        return await self._run(bucket, self.sync.abort_multipart_upload, bucket, filename, upload_id)
+
+    # Presigning is local signing with no network round trip, so it stays synchronous
+    def get_cached_file_url(self, bucket, filename, expiration=3600, refresh_margin=300, max_entries=10000):
+        return self.sync.get_cached_file_url(bucket, filename, expiration, refresh_margin, max_entries)
+
+    def get_upload_form(self, bucket, filename, content_type, max_size, expiration=3600):
+        return self.sync.get_upload_form(bucket, filename, content_type, max_size, expiration)
+
+class S3Body:
+    """Awaitable view of a get_object streaming body
+
+    Reads run on the S3 thread pool, never on the event loop or the threadpool
+    shared with sync dependencies, and the bucket's concurrency slot taken
+    when the object was opened is held until the body is closed, so the
+    per-bucket limit covers the whole transfer of a long video.
+    """
+    def __init__(self, s3: AsyncS3Client, body, semaphore: asyncio.Semaphore):
+        self.s3 = s3
+        self.body = body
+        self.semaphore = semaphore
+        self.closed = False
+
+    async def iter_chunks(self, chunk_size):
+        try:
+            while True:
+                chunk = await self.s3._call(self.body.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            await self.close()
+
+    async def read(self):
+        try:
+            return await self.s3._call(self.body.read)
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Closes the HTTP response and frees the bucket slot; safe to call more than once"""
+        if self.closed:
+            return
+        self.closed = True
+        self.semaphore.release()
+        self.body.close()
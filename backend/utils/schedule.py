@@ -0,0 +1,45 @@
+import heapq
+from datetime import date, timedelta
+
+WEEKDAYS = {
+    'MONDAY': 0,
+    'TUESDAY': 1,
+    'WEDNESDAY': 2,
+    'THURSDAY': 3,
+    'FRIDAY': 4,
+    'SATURDAY': 5,
+    'SUNDAY': 6
+}
+
+ONE_WEEK = timedelta(days=7)
+
+def first_weekday_on_or_after(start: date, weekday: int):
+    """Returns the first date on or after start that falls on the given weekday"""
+    return start + timedelta(days=(weekday - start.weekday()) % 7)
+
+def expand_slot(slot, start: date, end: date):
+    """Yields the concrete occurrences of a weekly slot between start and end (inclusive)
+
+    The occurrences of a weekly slot form an arithmetic progression with a
+    step of seven days, so they are generated directly from the first match
+    instead of scanning every day of the range.
+    """
+    excluded = slot['excluded_dates']
+    current = first_weekday_on_or_after(start, WEEKDAYS[slot['days_of_week']])
+    while current <= end:
+        if current not in excluded:
+            yield (current, slot['start_hour'], slot)
+        current += ONE_WEEK
+
+def expand_weekly_slots(slots, start: date, end: date):
+    """Expands weekly routine slots into dated occurrences sorted by date and start hour
+
+    :param slots: dicts with days_of_week, start_hour and a set of excluded_dates
+    :return: list of (date, slot) tuples
+    """
+    # Each slot expands to an already sorted sequence; merge them in O(n log k)
+    merged = heapq.merge(
+        *(expand_slot(slot, start, end) for slot in slots),
+        key=lambda occurrence: (occurrence[0], occurrence[1])
+    )
+    return [(occurrence_date, slot) for occurrence_date, _, slot in merged]
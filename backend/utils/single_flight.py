@@ -0,0 +1,51 @@
+import asyncio
+import functools
+from utils.metrics import COALESCED_CALLS
+
+def _freeze(value):
+    """Makes list arguments (e.g. ID lists) usable in a key"""
+    if isinstance(value, (list, set)):
+        return tuple(value)
+    return value
+
+class SingleFlight:
+    """Collapses concurrent identical async calls into one and fans its result out
+
+    The first caller of a key starts the call as a task; callers arriving while
+    it runs await the same task. Awaiting through asyncio.shield means one
+    caller being cancelled (client disconnect) does not cancel the others.
+    Results are shared, so callers must not mutate them.
+    """
+    def __init__(self):
+        self._in_flight = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, factory):
+        task = self._in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+            COALESCED_CALLS.inc((key[0],))
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
+
+def coalesced(method):
+    """Shares one upstream call between concurrent identical calls of an async SupabaseIntegration read method"""
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        if self.single_flight is None:
+            return await method(self, *args, **kwargs)
+        key = (method.__name__, *map(_freeze, args), *sorted((name, _freeze(value)) for name, value in kwargs.items()))
+        return await self.single_flight.do(key, lambda: method(self, *args, **kwargs))
+    return wrapper
@@ -0,0 +1,176 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from configs.env import Env
+
+logger = logging.getLogger(__name__)
+
+# Rows soft-deleted along with a parent: table -> ((child table, foreign key), ...).
+# The cascade itself runs in soft_delete_cascade() (migrations/005); this map
+# tells which cached tables it touched
+CASCADE = {
+    'athlete': (('enrollment', 'id_athlete'), ('routine', 'id_athlete')),
+    'team': (('enrollment', 'id_team'),),
+    'routine': (('routine_has_exercice', 'id_routine'),),
+    'exercise': (('routine_has_exercice', 'id_exercise'),),
+}
+
+# Tables purged children first, so no tombstone is still referenced when it is removed
+PURGE_ORDER = (
+    'routine_has_exercice', 'routine', 'enrollment', 'athlete', 'team', 'exercise', 'coach', 'sport', 'type_exercise'
+)
+
+def cascade_tables(table):
+    """Returns a table with every table its soft deletes cascade to"""
+    tables = [table]
+    for child, _ in CASCADE.get(table, ()):
+        tables += [name for name in cascade_tables(child) if name not in tables]
+    return tables
+
+class PurgeLock:
+    """Session-level advisory lock electing the one worker, across all containers, that runs the purge
+
+    The worker that gets the lock keeps its connection, and so the lock,
+    open; if it dies the lock goes with the connection and another worker
+    takes over at its next attempt.
+    """
+    def __init__(self, dsn, name='soft_delete_purge'):
+        self.dsn = dsn
+        self.name = name
+        self._connection = None
+
+    def _acquire(self):
+        import psycopg2
+
+        if self._connection is not None:
+            try:
+                with self._connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                return True
+            except psycopg2.Error:
+                self._release()
+        connection = psycopg2.connect(self.dsn)
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_try_advisory_lock(hashtext(%s))', (self.name,))
+            acquired = cursor.fetchone()[0]
+        if acquired:
+            self._connection = connection
+        else:
+            connection.close()
+        return acquired
+
+    def _release(self):
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            finally:
+                self._connection = None
+
+    async def acquire(self):
+        """Returns whether this worker holds the lock, taking it if it is free"""
+        return await asyncio.get_running_loop().run_in_executor(None, self._acquire)
+
+    async def release(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._release)
+
+    @property
+    def held(self):
+        return self._connection is not None
+
+class PurgeJob:
+    """Hard-deletes rows soft-deleted more than SOFT_DELETE_RETENTION_DAYS ago, in batches
+
+    Runs every SOFT_DELETE_PURGE_INTERVAL seconds in the worker holding the
+    purge lock; the other workers only retry the lock. Excluded dates, which
+    have no deleted_at, are removed with the routine exercises they belong
+    to. When a batch is refused (a live row still references a tombstone)
+    its rows are retried one by one and the referenced ones are kept for a
+    later run.
+    """
+    def __init__(self, integration, interval, retention_days, batch_size, lock: PurgeLock = None):
+        self.integration = integration
+        self.interval = interval
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.lock = lock
+        self._task = None
+        self.runs = 0
+        self.purged = 0
+        self.skipped = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                if self.lock is not None and not await self.lock.acquire():
+                    continue
+                await self.purge()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Soft-delete purge failed: {e}")
+
+    async def purge(self):
+        """Purges every table once and returns the number of rows removed"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.retention_days)).replace(tzinfo=None).isoformat(timespec='seconds')
+        purged = 0
+        for table in PURGE_ORDER:
+            purged += await self._purge_table(table, cutoff)
+        self.runs += 1
+        self.purged += purged
+        return purged
+
+    async def _purge_table(self, table, cutoff):
+        purged = 0
+        last_id = 0
+        while True:
+            ids = await self.integration.get_purge_candidates(table, cutoff, last_id, self.batch_size)
+            if not ids:
+                return purged
+            last_id = ids[-1]
+            try:
+                purged += await self.integration.purge(table, ids)
+            except Exception:
+                for row_id in ids:
+                    try:
+                        purged += await self.integration.purge(table, [row_id])
+                    except Exception as e:
+                        self.skipped += 1
+                        logger.warning(f"Keeping soft-deleted {table} {row_id}: {e}")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.lock is not None:
+            await self.lock.release()
+
+    def stats(self):
+        return {
+            "runs": self.runs,
+            "purged": self.purged,
+            "skipped": self.skipped,
+            "leader": self.lock is None or self.lock.held
+        }
+
+def create_purge_job(supabase_integration):
+    """Returns the purge job configured by SOFT_DELETE_PURGE_INTERVAL, or None when it is disabled"""
+    if Env.SOFT_DELETE_PURGE_INTERVAL <= 0:
+        return None
+    if not Env.DATABASE_URL:
+        raise ValueError("SOFT_DELETE_PURGE_INTERVAL needs DATABASE_URL to elect the worker that runs the purge")
+    return PurgeJob(
+        supabase_integration,
+        Env.SOFT_DELETE_PURGE_INTERVAL,
+        Env.SOFT_DELETE_RETENTION_DAYS,
+        Env.SOFT_DELETE_PURGE_BATCH_SIZE,
+        PurgeLock(Env.DATABASE_URL)
+    )
@@ -0,0 +1,150 @@
+import asyncio
+import io
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+from fastapi import HTTPException, Query
+from configs.env import Env
+from utils.cache import TTLCache
+from utils.single_flight import SingleFlight
+
+FORMATS = {
+    'webp': ('WEBP', 'image/webp'),
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'png': ('PNG', 'image/png')
+}
+
+_pool = None
+
+# Concurrent requests for a missing variant render it once
+_renders = SingleFlight()
+
+# S3 key of an original -> its ETag, to address variants without a HEAD per request
+_source_etags = TTLCache(Env.MEDIA_KEY_CACHE_SIZE, Env.MEDIA_KEY_CACHE_TTL)
+
+class ImageVariant:
+    """A resized and/or re-encoded rendition of a stored photo"""
+    def __init__(self, width: Optional[int], height: Optional[int], format: str):
+        self.width = width
+        self.height = height
+        self.format = format
+
+    @property
+    def content_type(self):
+        return FORMATS[self.format][1]
+
+    def key(self, photo_path: str, source_etag: str):
+        """Returns the S3 key the variant of a photo is stored under
+
+        The original's ETag is part of the key, so replacing the original in
+        place never serves variants rendered from the previous file once its
+        cached ETag is dropped (forget_source_etag on upload, or after
+        MEDIA_KEY_CACHE_TTL for objects replaced outside the API).
+        """
+        return f"variants/{self.width or 0}x{self.height or 0}/{source_etag}/{photo_path}.{self.format}"
+
+async def get_image_variant(
+    w: Optional[int] = Query(None, ge=1, le=Env.THUMBNAIL_MAX_SIZE, description="Maximum width of the returned image"),
+    h: Optional[int] = Query(None, ge=1, le=Env.THUMBNAIL_MAX_SIZE, description="Maximum height of the returned image"),
+    format: Optional[str] = Query(None, description="Output format: webp, jpeg or png")
+) -> Optional[ImageVariant]:
+    """Returns the variant requested through ?w=&h=&format=, or None for the original photo"""
+    if w is None and h is None and format is None:
+        return None
+    format = (format or 'webp').lower()
+    if format == 'jpg':
+        format = 'jpeg'
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format, expected one of {', '.join(FORMATS)}")
+    return ImageVariant(w, h, format)
+
+def resize_image(data: bytes, width: Optional[int], height: Optional[int], format: str):
+    """Shrinks an image to fit within width x height (keeping its aspect ratio) and re-encodes it"""
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        if width or height:
+            image.thumbnail((width or image.width, height or image.height), Image.LANCZOS)
+        pil_format = FORMATS[format][0]
+        image = convert_mode(image, pil_format)
+        output = io.BytesIO()
+        image.save(output, pil_format, quality=Env.THUMBNAIL_QUALITY)
+        return output.getvalue()
+
+def convert_mode(image, pil_format: str):
+    """Converts an image to a mode the output format can encode (e.g. CMYK or palette photos to RGB/RGBA)"""
+    has_alpha = 'A' in image.getbands() or 'transparency' in image.info
+    if pil_format == 'JPEG':
+        return image if image.mode in ('RGB', 'L') else image.convert('RGB')
+    if pil_format == 'WEBP':
+        modes = ('RGB', 'RGBA')
+    else:
+        modes = ('1', 'L', 'LA', 'P', 'RGB', 'RGBA')
+    if image.mode in modes:
+        return image
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+def get_pool():
+    """Returns the process pool that runs image work off the event loop, creating it on first use"""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=Env.THUMBNAIL_WORKERS or None)
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+async def source_etag(s3, bucket, photo_path):
+    """Returns the ETag of an original photo without quotes, or None if it does not exist"""
+    hit, etag = _source_etags.get((bucket, photo_path))
+    if hit:
+        return etag
+    info = await s3.get_file_info(bucket, photo_path)
+    if info is None:
+        return None
+    etag = info['ETag'].strip('"')
+    _source_etags.set((bucket, photo_path), etag)
+    return etag
+
+def forget_source_etag(bucket, photo_path):
+    """Drops the cached ETag of an original that was uploaded or replaced"""
+    _source_etags.discard((bucket, photo_path))
+
+async def generate_variant(s3, bucket, photo_path, variant: ImageVariant, key: str):
+    """Renders a photo variant from the original and stores it in S3 under key; returns False if the original is missing"""
+    original = await s3.get_file(bucket, photo_path)
+    if original is None:
+        return False
+    loop = asyncio.get_running_loop()
+    data = await loop.run_in_executor(get_pool(), resize_image, original, variant.width, variant.height, variant.format)
+    return await s3.upload_file(bucket, key, data, variant.content_type)
+
+async def render_variant(s3, bucket, photo_path, variant: ImageVariant, key: str):
+    """Generates a missing variant, sharing one rendering between concurrent requests for it"""
+    return await _renders.do(('render_variant', bucket, key), lambda: generate_variant(s3, bucket, photo_path, variant, key))
+
+async def ensure_variant(s3, bucket, photo_path, variant: ImageVariant):
+    """Returns the S3 key of a photo variant, generating it first if it does not exist yet, or None"""
+    etag = await source_etag(s3, bucket, photo_path)
+    if etag is None:
+        return None
+    key = variant.key(photo_path, etag)
+    if await s3.get_file_info(bucket, key) is not None:
+        return key
+    return key if await render_variant(s3, bucket, photo_path, variant, key) else None
+
+async def get_variant_stream(s3, bucket, photo_path, variant: ImageVariant, byte_range=None, if_range=None, if_none_match=None, if_modified_since=None):
+    """Streams a photo variant from S3, generating and storing it first if it does not exist yet"""
+    etag = await source_etag(s3, bucket, photo_path)
+    if etag is None:
+        return None
+    key = variant.key(photo_path, etag)
+    s3_object = await s3.get_file_stream(bucket, key, byte_range, if_range, if_none_match, if_modified_since)
+    if s3_object:
+        return s3_object
+    if not await render_variant(s3, bucket, photo_path, variant, key):
+        return None
+    return await s3.get_file_stream(bucket, key, byte_range, if_range, if_none_match, if_modified_since)
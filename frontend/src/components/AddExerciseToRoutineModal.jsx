@@ -17,6 +17,7 @@ import {
 } from '@mui/material';
 import AddIcon from '@mui/icons-material/Add';
 import { useExercises, useAddExerciseToRoutine } from '../hooks/useApi';
+import { routineService } from '../services/apiService';
 import CreateExerciseModal from './CreateExerciseModal';
 import WeekSchedulePicker from './WeekSchedulePicker';
 import ExcludedDatesManager from './ExcludedDatesManager';
@@ -93,11 +94,15 @@ const AddExerciseToRoutineModal = ({ open, onClose, routineId, routineName, user
 
       const result = await addExerciseToRoutine.mutateAsync(payload);
       
-      // If there are excluded dates, add them
+      // If there are excluded dates, add them all in a single request
       if (excludedDates.length > 0 && result?.id) {
-        // Note: You'll need to implement the excluded dates API calls
-        // For now, we'll store them temporarily with the exercise
-        console.log('Excluded dates to add:', excludedDates, 'for exercise:', result.id);
+        await routineService.addExcludedDates(
+          excludedDates.map(({ excluded_date, reason }) => ({
+            id_routine_has_exercise: result.id,
+            excluded_date,
+            reason,
+          }))
+        );
       }
       
       // Reset form
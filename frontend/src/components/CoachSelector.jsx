@@ -17,8 +17,9 @@ import { useCoaches } from '../hooks/useApi';
 const CoachSelector = ({ value, onChange, disabled }) => {
   const { data: coaches = [], isLoading, error } = useCoaches();
 
-  const getCoachPhotoUrl = (coachId) => {
-    return `${import.meta.env.VITE_API_URL || 'http://localhost:8080'}/api/coaches/${coachId}/photo`;
+  // The photo path versions the URL, so the browser may cache it for good
+  const getCoachPhotoUrl = (coachId, photoPath) => {
+    return `${import.meta.env.VITE_API_URL || 'http://localhost:8080'}/api/coaches/${coachId}/photo?v=${encodeURIComponent(photoPath)}&w=96&h=96&format=webp`;
   };
 
   if (isLoading) {
@@ -77,7 +78,7 @@ const CoachSelector = ({ value, onChange, disabled }) => {
                 label={
                   <Box sx={{ display: 'flex', alignItems: 'center', gap: 2, ml: 1 }}>
                     <Avatar
-                      src={coach.photo_path ? getCoachPhotoUrl(coach.id) : undefined}
+                      src={coach.photo_path ? getCoachPhotoUrl(coach.id, coach.photo_path) : undefined}
                       alt={coach.name || 'Coach'}
                       sx={{ width: 48, height: 48 }}
                     >
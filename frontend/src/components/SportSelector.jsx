@@ -18,8 +18,9 @@ import SportsIcon from '@mui/icons-material/Sports';
 const SportSelector = ({ value, onChange, disabled }) => {
   const { data: sports = [], isLoading, error } = useSports();
 
-  const getSportPhotoUrl = (sportId) => {
-    return `${import.meta.env.VITE_API_URL || 'http://localhost:8080'}/api/sports/${sportId}/photo`;
+  // The photo path versions the URL, so the browser may cache it for good
+  const getSportPhotoUrl = (sportId, photoPath) => {
+    return `${import.meta.env.VITE_API_URL || 'http://localhost:8080'}/api/sports/${sportId}/photo?v=${encodeURIComponent(photoPath)}&w=96&h=96&format=webp`;
   };
 
   if (isLoading) {
@@ -78,7 +79,7 @@ const SportSelector = ({ value, onChange, disabled }) => {
                 label={
                   <Box sx={{ display: 'flex', alignItems: 'center', gap: 2, ml: 1 }}>
                     <Avatar
-                      src={sport.photo_path ? getSportPhotoUrl(sport.id) : undefined}
+                      src={sport.photo_path ? getSportPhotoUrl(sport.id, sport.photo_path) : undefined}
                       alt={sport.name || 'Sport'}
                       sx={{ width: 48, height: 48, bgcolor: '#1976d2' }}
                     >
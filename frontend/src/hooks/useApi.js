@@ -7,7 +7,8 @@ import {
   sportService,
   routineService,
   exerciseService,
-  typeExerciseService
+  typeExerciseService,
+  dashboardService
 } from '../services/apiService';
 
 // ============= TEAMS ============
@@ -36,30 +37,9 @@ export const useTeamsByCoach = (coachId) => {
 };
 
 export const useTeamsWithAthletes = () => {
-  const { data: teams, ...queryInfo } = useTeams();
-  
   return useQuery({
-    queryKey: ['teams-with-athletes'],
-    queryFn: async () => {
-      if (!teams) return [];
-      
-      const teamsWithAthletes = await Promise.all(
-        teams.map(async (team) => {
-          try {
-            const enrollments = await enrollmentService.getByTeam(team.id);
-            const athletes = enrollments.map(m => m.athlete).filter(Boolean);
-            return { ...team, athletes };
-          } catch (err) {
-            console.error(`Error to load athletes of team ${team.id}:`, err);
-            return { ...team, athletes: [] };
-          }
-        })
-      );
-      
-      return teamsWithAthletes;
-    },
-    enabled: !!teams,
-    ...queryInfo,
+    queryKey: ['teams', 'with-athletes'],
+    queryFn: dashboardService.getTeams,
   });
 };
 
@@ -180,7 +160,7 @@ export const useCreateEnrollment = () => {
     mutationFn: enrollmentService.create,
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['enrollments'] });
-      queryClient.invalidateQueries({ queryKey: ['teams-with-athletes'] });
+      queryClient.invalidateQueries({ queryKey: ['teams', 'with-athletes'] });
     },
   });
 };
@@ -192,7 +172,7 @@ export const useDeleteEnrollment = () => {
     mutationFn: enrollmentService.delete,
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['enrollments'] });
-      queryClient.invalidateQueries({ queryKey: ['teams-with-athletes'] });
+      queryClient.invalidateQueries({ queryKey: ['teams', 'with-athletes'] });
     },
   });
 };
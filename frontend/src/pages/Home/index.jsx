@@ -1,54 +1,23 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState } from 'react';
 import './style.css';
 import {useTeamsWithAthletes } from '../../hooks/useApi';
 import AddTeamModal from '../../components/AddTeamModal';
 import AthleteRoutinesModal from '../../components/AthleteRoutinesModal';
 import { Avatar } from '@mui/material';
-import api from '../../api';
 
 const Home = () => {
   const [expandedTeam, setExpandedTeam] = useState(null);
   const [modalOpen, setModalOpen] = useState(false);
   const [routinesModalOpen, setRoutinesModalOpen] = useState(false);
   const [selectedAthlete, setSelectedAthlete] = useState(null);
-  const [athletePhotos, setAthletePhotos] = useState({});
   const { data: teams = [], isLoading: loading, error } = useTeamsWithAthletes();
   
   const userName = "Derek";
 
-  // Load athlete photos as blob URLs
-  useEffect(() => {
-    const loadAthletePhotos = async () => {
-      const photos = {};
-      for (const team of teams) {
-        if (team.athletes) {
-          for (const athlete of team.athletes) {
-            try {
-              const response = await api.get(`/athletes/${athlete.id}/photo`, {
-                responseType: 'blob'
-              });
-              const imageUrl = URL.createObjectURL(response.data);
-              photos[athlete.id] = imageUrl;
-            } catch (err) {
-              console.error(`Error loading photo for athlete ${athlete.id}:`, err);
-            }
-          }
-        }
-      }
-      setAthletePhotos(photos);
-    };
+  // Let the browser fetch (and cache) avatars in parallel straight from the photo endpoint;
+  // the photo path versions the URL so a cached avatar never outlives a new upload
+  const getAthletePhotoUrl = (athleteId, photoPath) => `/api/athletes/${athleteId}/photo?v=${encodeURIComponent(photoPath)}&w=80&h=80&format=webp`;
 
-    if (teams.length > 0) {
-      loadAthletePhotos();
-    }
-
-    // Cleanup: revogar URLs de blob quando o componente desmontar
-    return () => {
-      Object.values(athletePhotos).forEach(url => {
-        if (url) URL.revokeObjectURL(url);
-      });
-    };
-  }, [teams]);
   const toggleTeam = (teamId) => {
     setExpandedTeam(expandedTeam === teamId ? null : teamId);
   };
@@ -137,7 +106,7 @@ const Home = () => {
                   team.athletes.map((athlete) => (
                     <div key={athlete.id} className="athlete-item">
                       <Avatar
-                        src={athletePhotos[athlete.id]}
+                        src={athlete.photo_path ? getAthletePhotoUrl(athlete.id, athlete.photo_path) : undefined}
                         alt={athlete.name}
                         sx={{ width: 40, height: 40 }}
                       >
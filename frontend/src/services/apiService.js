@@ -283,6 +283,11 @@ export const routineService = {
     const response = await api.delete(`/routines/exercises/${routineExerciseId}`);
     return response.data;
   },
+
+  addExcludedDates: async (excludedDates) => {
+    const response = await api.post('/routines/excluded-dates/bulk', excludedDates);
+    return response.data;
+  },
 };
 
 // Type Exercises
@@ -297,3 +302,11 @@ export const typeExerciseService = {
     return response.data;
   },
 };
+
+// Dashboard
+export const dashboardService = {
+  getTeams: async () => {
+    const response = await api.get('/dashboard/');
+    return response.data.teams;
+  },
+};